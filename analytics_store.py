@@ -0,0 +1,288 @@
+"""Analytics store: alerts, results en feature snapshots als getypte Parquet, gepartitioneerd per dag.
+
+  analytics/<tabel>/date=YYYY-MM-DD/<bron>.parquet
+
+De CSV logs blijven de bron (de bot schrijft alleen CSV); ingest() zet nieuwe/gewijzigde
+logbestanden incrementeel om. Queries lezen alleen de partities in het window en de
+gevraagde kolommen.
+
+  python analytics_store.py ingest
+  python analytics_store.py weekly --days 7
+  python analytics_store.py reconcile --days 30     # vs. report_agg (state store)
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import main as bot
+
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "analytics")
+MANIFEST = "_manifest.json"  # bronbestand -> [mtime_ns, size] bij de laatste ingest
+
+TABLES = {
+    "alerts": (bot.ALERTS_LOG, pa.schema([
+        ("timestamp", pa.timestamp("s")), ("tier", pa.string()), ("fixture_id", pa.int64()),
+        ("league", pa.string()), ("home", pa.string()), ("away", pa.string()),
+        ("minute", pa.int16()), ("score", pa.string()), ("pick", pa.string()),
+        ("dominant_score", pa.float64()), ("gap", pa.float64()), ("confidence", pa.int16()),
+        ("odd_1x2", pa.float64()),
+        ("pace10_shots", pa.int16()), ("pace10_sot", pa.int16()), ("pace5_shots", pa.int16()), ("pace5_sot", pa.int16()),
+        ("sot_half", pa.int16()), ("shots_half", pa.int16()), ("opp_sot_half", pa.int16()), ("opp_shots_half", pa.int16()),
+        ("is_risk_31_39", pa.bool_()), ("post_goal_strict", pa.bool_()), ("rules_version", pa.string()),
+    ])),
+    "results": (bot.RESULTS_LOG, pa.schema([
+        ("timestamp", pa.timestamp("s")), ("fixture_id", pa.int64()), ("tier", pa.string()),
+        ("home", pa.string()), ("away", pa.string()), ("pick", pa.string()), ("result", pa.string()),
+        ("minute_resolved", pa.int16()), ("score_at_alert", pa.string()), ("score_resolved", pa.string()),
+    ])),
+    "features": (bot.FEATURES_LOG, pa.schema([
+        ("timestamp", pa.timestamp("s")), ("fixture_id", pa.int64()), ("minute", pa.int16()), ("status", pa.string()),
+        ("score_home", pa.int16()), ("score_away", pa.int16()),
+        ("hsot", pa.int16()), ("asot", pa.int16()), ("hshots", pa.int16()), ("ashots", pa.int16()),
+        ("hcorn", pa.int16()), ("acorn", pa.int16()), ("hpos", pa.int16()), ("apos", pa.int16()),
+        ("hred", pa.int16()), ("ared", pa.int16()),
+        ("gap", pa.float64()), ("pace5_shots", pa.int16()), ("candidate", pa.bool_()),
+    ])),
+}
+
+# export van alert_index (state store), gepartitioneerd op result dag
+INDEX_SCHEMA = pa.schema([
+    ("fixture_id", pa.int64()), ("alert_ts", pa.timestamp("s")), ("tier", pa.string()), ("minute", pa.int16()),
+    ("is_risk_31_39", pa.bool_()), ("post_goal_strict", pa.bool_()),
+    ("result", pa.string()), ("result_ts", pa.timestamp("s")),
+])
+SCHEMAS = dict({name: schema for name, (_, schema) in TABLES.items()}, alert_index=INDEX_SCHEMA)
+
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+# =========================================================
+# INGEST (CSV -> Parquet)
+# =========================================================
+def _read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(root, manifest):
+    tmp = os.path.join(root, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(root, MANIFEST))
+
+
+def read_log_csv(path, schema):
+    """Eén CSV log → pyarrow Table met het vaste schema (ontbrekende kolommen = null)."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+    present = [n for n in schema.names if n in header]
+    table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+        column_types={n: schema.field(n).type for n in present},
+        include_columns=present,
+    ))
+    cols = [table[n] if n in present else pa.nulls(len(table), schema.field(n).type) for n in schema.names]
+    return pa.table(cols, schema=schema)
+
+
+def _write_partitions(root, name, source, table):
+    """Schrijft per dag een <bron>.parquet; elke bron overschrijft alleen zijn eigen part."""
+    part = os.path.splitext(os.path.basename(source))[0] + ".parquet"
+    days = pc.strftime(table["timestamp"], format="%Y-%m-%d")
+    written = 0
+    for day in pc.unique(days).to_pylist():
+        if day is None:
+            continue
+        out_dir = os.path.join(root, name, f"date={day}")
+        os.makedirs(out_dir, exist_ok=True)
+        pq.write_table(table.filter(pc.equal(days, day)), os.path.join(out_dir, part), compression="zstd")
+        written += 1
+    return written
+
+
+def ingest(root=None):
+    """Incrementeel: alleen logbestanden die sinds de vorige ingest veranderd zijn. Geeft {tabel: partities}."""
+    root = root or ANALYTICS_DIR
+    os.makedirs(root, exist_ok=True)
+    bot.flush_logs()
+    if bot.STATE_CONN["conn"] is None:
+        bot.open_state_store()
+    if bot.agg_is_empty():
+        bot.backfill_report_aggregates()
+    manifest = _read_manifest(root)
+    done = {}
+    for name, (base, schema) in TABLES.items():
+        done[name] = 0
+        for path in bot.log_paths(base):
+            st = os.stat(path)
+            sig = [st.st_mtime_ns, st.st_size]
+            if manifest.get(path) == sig:
+                continue
+            done[name] += _write_partitions(root, name, path, read_log_csv(path, schema))
+            manifest[path] = sig
+    done["alert_index"] = export_index(root, manifest)
+    _write_manifest(root, manifest)
+    return done
+
+
+def export_index(root, manifest):
+    """alert_index → Parquet; alleen result dagen vanaf de vorige export (of alles na een backfill)."""
+    conn = bot.STATE_CONN["conn"]
+    built = bot.meta_get("alert_index_built")
+    state = manifest.get("alert_index") or {}
+    since = state.get("day", "") if state.get("built") == built else ""
+    days = [d for (d,) in conn.execute(
+        "SELECT DISTINCT substr(result_ts, 1, 10) FROM alert_index WHERE result_ts >= ? ORDER BY 1", (since,))]
+    for day in days:
+        df = pd.read_sql_query(
+            "SELECT fixture_id, alert_ts, tier, minute, risk AS is_risk_31_39, post_goal AS post_goal_strict, "
+            "result, result_ts FROM alert_index WHERE result_ts >= ? AND result_ts < ?",
+            conn, params=(day, day + "~"),  # '~' > 'T..' → hele dag
+        )
+        for col in ("alert_ts", "result_ts"):
+            df[col] = pd.to_datetime(df[col])
+        out_dir = os.path.join(root, "alert_index", f"date={day}")
+        os.makedirs(out_dir, exist_ok=True)
+        table = pa.Table.from_pandas(df, schema=INDEX_SCHEMA, preserve_index=False)
+        pq.write_table(table, os.path.join(out_dir, "index.parquet"), compression="zstd")
+    if days:
+        manifest["alert_index"] = {"day": days[-1], "built": built}
+    return len(days)
+
+
+# =========================================================
+# QUERIES
+# =========================================================
+def load(name, since_day=None, until_day=None, columns=None, root=None):
+    """DataFrame van één tabel; leest alleen de partities in [since_day, until_day] en de gevraagde kolommen."""
+    path = os.path.join(root or ANALYTICS_DIR, name)
+    schema = SCHEMAS[name].append(pa.field("date", pa.string()))
+    if not os.path.isdir(path):
+        return schema.empty_table().select(columns or schema.names).to_pandas()
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING, schema=schema)
+    flt = None
+    if since_day:
+        flt = ds.field("date") >= since_day
+    if until_day:
+        flt = (ds.field("date") <= until_day) if flt is None else flt & (ds.field("date") <= until_day)
+    return dataset.to_table(columns=columns, filter=flt).to_pandas()
+
+
+INDEX_COLUMNS = ["fixture_id", "alert_ts", "tier", "minute", "is_risk_31_39", "post_goal_strict", "result", "result_ts"]
+
+
+def load_resolved(since_day, until_day=None, alert_columns=None, root=None):
+    """Resolved alerts met result dag in het window, uit de alert_index export (exacte key, geen asof join).
+
+    alert_columns: extra kolommen uit de alerts tabel, gejoind op (fixture_id, alert_ts); alleen de
+    alert dagen die in het resultaat voorkomen worden gelezen.
+    """
+    df = load("alert_index", since_day, until_day, INDEX_COLUMNS, root)
+    df = df[df["result"].isin(["HIT", "MISS"])]
+    if alert_columns and len(df):
+        days = df["alert_ts"].dt.strftime("%Y-%m-%d")
+        alerts = load("alerts", days.min(), days.max(), ["timestamp", "fixture_id"] + alert_columns, root)
+        alerts = alerts.rename(columns={"timestamp": "alert_ts"}).drop_duplicates(["fixture_id", "alert_ts"])
+        df = df.merge(alerts, on=["fixture_id", "alert_ts"], how="left")
+    return df.reset_index(drop=True)
+
+
+def minute_buckets(minutes):
+    """Vectorized bot.minute_bucket (NaN → NA)."""
+    edges = [-1] + [upper for upper, _ in bot.MINUTE_BUCKETS[:-1]] + [10_000]
+    labels = [name for _, name in bot.MINUTE_BUCKETS]
+    out = pd.cut(minutes, bins=edges, labels=labels).astype(object)
+    return out.where(minutes.notna(), bot.UNKNOWN_BUCKET)
+
+
+def weekly_summary(days=7, root=None):
+    """Dezelfde tellers als bot.weekly_aggregates, maar als pandas query over Parquet."""
+    until = date.today()
+    since = (until - timedelta(days=days - 1)).isoformat()
+    df = load_resolved(since, until.isoformat(), root=root)
+    hit = df["result"] == "HIT"
+    minute = pd.to_numeric(df["minute"], errors="coerce")
+
+    def group(keys):
+        g = hit.groupby(keys).agg(["size", "sum"])
+        return {k: [int(t), int(h)] for k, (t, h) in g.iterrows()}
+
+    def flag(mask):
+        return [int(mask.sum()), int((mask & hit).sum())]
+
+    return {
+        "total": len(df), "hits": int(hit.sum()), "misses": int((~hit).sum()),
+        "tiers": group(df["tier"]),
+        "buckets": group(minute_buckets(minute)),
+        "risk": flag(df["is_risk_31_39"].fillna(False).astype(bool)),
+        "post_goal": flag(df["post_goal_strict"].fillna(False).astype(bool)),
+        "late": flag(minute >= bot.LATE_MINUTE),
+    }
+
+
+def daily_counts(since_day, until_day=None, root=None):
+    """Per dag: alerts per tier + hits/misses (zelfde definitie als het dagrapport)."""
+    alerts = load("alerts", since_day, until_day, ["date", "tier"], root)
+    results = load("results", since_day, until_day, ["date", "result"], root)
+    results = results[results["result"].isin(["HIT", "MISS"])]
+    out = alerts.groupby(["date", "tier"]).size().unstack(fill_value=0)
+    out = out.join(results.groupby(["date", "result"]).size().unstack(fill_value=0), how="outer")
+    return out.fillna(0).astype(int)
+
+
+def reconcile(days=30, root=None):
+    """Vergelijkt de Parquet tellers per dag met report_agg; geeft (parquet, agg, [(dag, kolom)] die afwijken)."""
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+    until = date.today().isoformat()
+    parquet = daily_counts(since, until, root)
+    conn = bot.STATE_CONN["conn"] or bot.open_state_store()
+    agg = pd.read_sql_query(
+        "SELECT day AS date, tier, SUM(alerts) AS alerts, SUM(hits) AS HIT, SUM(misses) AS MISS "
+        "FROM report_agg WHERE day BETWEEN ? AND ? GROUP BY day, tier",
+        conn, params=(since, until),
+    )
+    agg = (agg.pivot_table(index="date", columns="tier", values="alerts", aggfunc="sum", fill_value=0)
+           .join(agg.groupby("date")[["HIT", "MISS"]].sum(), how="outer"))
+
+    index = parquet.index.union(agg.index)
+    columns = parquet.columns.union(agg.columns)
+    parquet = parquet.reindex(index=index, columns=columns).fillna(0).astype(int)
+    agg = agg.reindex(index=index, columns=columns).fillna(0).astype(int)
+    mismatch = (parquet != agg).stack()
+    return parquet, agg, list(mismatch[mismatch].index)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parquet analytics store voor alerts/results/features.")
+    ap.add_argument("command", choices=["ingest", "weekly", "reconcile"])
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--dir", default=ANALYTICS_DIR)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    done = ingest(args.dir)
+    print(f"📦 ingest {done} in {time.perf_counter() - t0:.2f}s")
+
+    if args.command == "weekly":
+        print(weekly_summary(args.days, args.dir))
+    elif args.command == "reconcile":
+        _, _, diff = reconcile(args.days, args.dir)
+        if diff:
+            print(f"⚠️ {len(diff)} afwijkingen vs report_agg: {diff[:20]}")
+        else:
+            print(f"✅ Parquet en report_agg kloppen ({args.days} dagen)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Eenmalige backfill: bouwt de report aggregates (report_agg in de state store) opnieuw op
+uit de bestaande CSV logs. Daarna houdt de bot ze zelf bij bij elke alert/result.
+
+  python backfill_aggregates.py
+  python backfill_aggregates.py --alerts oud/alerts_log_premium.csv --results oud/results_log_premium.csv
+"""
+import argparse
+import time
+
+import main as bot
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild report aggregates from the CSV logs.")
+    ap.add_argument("--alerts", default=bot.ALERTS_LOG)
+    ap.add_argument("--results", default=bot.RESULTS_LOG)
+    ap.add_argument("--db", default=bot.STATE_DB)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    bot.open_state_store(args.db)
+    n_alerts, n_results = bot.backfill_report_aggregates(args.alerts, args.results)
+    print(f"📚 {n_alerts} alerts + {n_results} results → report_agg in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
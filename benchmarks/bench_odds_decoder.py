@@ -0,0 +1,106 @@
+"""1X2 odds: oude find_1x2_odd (geneste scan + substring match per pass) vs. index_odds/decode_1x2.
+
+Draaien vanuit de repo root:  python benchmarks/bench_odds_decoder.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import decode_1x2, find_1x2_odd, safe_float  # noqa: E402
+
+BOOKMAKERS = 15
+BETS_PER_BOOK = 30
+HOME, AWAY = "Ajax", "PSV"
+
+
+# ---- oude implementatie (zoals find_1x2_odd vóór de decoder) ----
+def legacy_find_1x2_odd(odds_response, pick_side, home_name, away_name):
+    if not odds_response:
+        return None
+    market_keywords = ["match winner", "1x2", "full time result", "winner"]
+    want = "1" if pick_side == "HOME" else "2"
+    for item in odds_response:
+        for book in item.get("bookmakers", []):
+            for bet in book.get("bets", []):
+                bet_name = (bet.get("name") or "").lower()
+                if not any(k in bet_name for k in market_keywords):
+                    continue
+                for v in bet.get("values", []):
+                    v_value = (v.get("value") or "").strip().lower()
+                    if v_value == want or (want == "1" and v_value in ["home", home_name.lower()]) or (want == "2" and v_value in ["away", away_name.lower()]):
+                        return safe_float(v.get("odd"))
+    return None
+
+
+def legacy_all_prices(odds_response, pick_side, home_name, away_name):
+    # wat de oude aanpak kost als je best/median wilt: alle bookmakers aflopen met dezelfde matching
+    market_keywords = ["match winner", "1x2", "full time result", "winner"]
+    want = "1" if pick_side == "HOME" else "2"
+    out = []
+    for item in odds_response:
+        for book in item.get("bookmakers", []):
+            for bet in book.get("bets", []):
+                bet_name = (bet.get("name") or "").lower()
+                if not any(k in bet_name for k in market_keywords):
+                    continue
+                for v in bet.get("values", []):
+                    v_value = (v.get("value") or "").strip().lower()
+                    if v_value == want or (want == "1" and v_value in ["home", home_name.lower()]) or (want == "2" and v_value in ["away", away_name.lower()]):
+                        out.append(safe_float(v.get("odd")))
+    return out
+
+
+def make_response(seed):
+    rnd = random.Random(seed)
+    books = []
+    for b in range(BOOKMAKERS):
+        bets = [{"id": 100 + i, "name": f"Market {i}", "values": [{"value": f"Over {i}.5", "odd": "1.9"}, {"value": f"Under {i}.5", "odd": "1.9"}]}
+                for i in range(BETS_PER_BOOK - 1)]
+        # 1X2 ergens halverwege de lijst, zoals in echte payloads
+        bets.insert(rnd.randint(5, BETS_PER_BOOK - 5), {"id": 1, "name": "Match Winner", "values": [
+            {"value": "Home", "odd": f"{rnd.uniform(1.6, 2.4):.2f}"},
+            {"value": "Draw", "odd": f"{rnd.uniform(3.0, 3.8):.2f}"},
+            {"value": "Away", "odd": f"{rnd.uniform(2.8, 4.5):.2f}"},
+        ]})
+        books.append({"id": b, "name": f"Book{b}", "bets": bets})
+    return [{"fixture": {"id": seed}, "bookmakers": books}]
+
+
+def main():
+    responses = [make_response(seed) for seed in range(50)]
+
+    # eerste bookmaker = oude uitkomst
+    for resp in responses:
+        for side in ("HOME", "AWAY"):
+            assert legacy_find_1x2_odd(resp, side, HOME, AWAY) == find_1x2_odd(resp, side, HOME, AWAY, price="first")
+
+    n = 100
+    # oud: 1 scan per vraag; hier alleen de pick side (first) — meer kon de oude code niet
+    t_legacy = timeit.timeit(lambda: [legacy_find_1x2_odd(r, "HOME", HOME, AWAY) for r in responses], number=n)
+    # nieuw: 1x indexeren, daarna first/best/median voor beide kanten
+    def decoded_all():
+        for r in responses:
+            d = decode_1x2(r, HOME, AWAY)
+            for side in ("HOME", "AWAY"):
+                p = d[side]
+                p.first, p.best, p.median
+    t_new = timeit.timeit(decoded_all, number=n)
+    t_legacy_all = timeit.timeit(
+        lambda: [(legacy_all_prices(r, "HOME", HOME, AWAY), legacy_all_prices(r, "AWAY", HOME, AWAY)) for r in responses],
+        number=n)
+    pre = [(r, decode_1x2(r, HOME, AWAY)) for r in responses]
+    t_lookup = timeit.timeit(lambda: [find_1x2_odd(r, "HOME", HOME, AWAY, decoded=d) for r, d in pre], number=n)
+
+    per = len(responses) * n
+    print(f"{len(responses)} responses x {BOOKMAKERS} bookmakers x {BETS_PER_BOOK} markets")
+    print(f"legacy   {t_legacy / per * 1e6:8.1f} us per response (1 prijs: eerste bookmaker, 1 kant)")
+    print(f"legacy   {t_legacy_all / per * 1e6:8.1f} us per response (alle bookmakers, beide kanten: nodig voor best/median)")
+    print(f"decoder  {t_new / per * 1e6:8.1f} us per response (index + first/best/median, beide kanten)")
+    print(f"lookup   {t_lookup / per * 1e6:8.2f} us per prijs op een al geïndexeerde response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Pace history: oude list-of-dicts + lineaire scan vs. PaceHistory (array('h') + bisect).
+
+Draaien vanuit de repo root:  python benchmarks/bench_pace_history.py
+"""
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import PaceHistory, clamp_nonnegative  # noqa: E402
+
+FIXTURES = 150
+ROWS = 80
+
+
+# ---- oude implementatie (zoals HISTORY vóór PaceHistory) ----
+def legacy_update(hist, minute, hsot, asot, hshots, ashots, hcorn, acorn):
+    row = {"minute": minute, "hsot": hsot, "asot": asot, "hshots": hshots, "ashots": ashots, "hcorn": hcorn, "acorn": acorn}
+    if hist and hist[-1]["minute"] == minute:
+        hist[-1] = row
+    else:
+        hist.append(row)
+    if len(hist) > 80:
+        del hist[:-80]
+
+
+def legacy_snapshot(hist, target_minute):
+    for row in reversed(hist):
+        if row["minute"] <= target_minute:
+            return row
+    return None
+
+
+def legacy_pace(hist, cur_minute, window_minutes, pick_side):
+    cur = legacy_snapshot(hist, cur_minute)
+    old = legacy_snapshot(hist, max(0, cur_minute - window_minutes))
+    if not cur or not old:
+        return (0, 0)
+    if pick_side == "HOME":
+        return (clamp_nonnegative(cur["hshots"] - old["hshots"]), clamp_nonnegative(cur["hsot"] - old["hsot"]))
+    return (clamp_nonnegative(cur["ashots"] - old["ashots"]), clamp_nonnegative(cur["asot"] - old["asot"]))
+
+
+def legacy_windows(hist, minute):
+    # zo deed de scan loop het: 3 windows per kant = 6 scans
+    out = {}
+    for side in ("HOME", "AWAY"):
+        out[side] = (
+            *legacy_pace(hist, minute, 10, side),
+            *legacy_pace(hist, minute, 5, side),
+            *legacy_pace(hist, minute - 5 if minute >= 5 else minute, 5, side),
+        )
+    return out
+
+
+def make_rows(seed):
+    rnd = random.Random(seed)
+    rows, c = [], [0] * 6
+    for minute in range(5, 5 + ROWS):
+        c = [v + rnd.randint(0, 1) for v in c]
+        rows.append((minute, *c))
+    return rows
+
+
+def build_legacy(data):
+    out = {}
+    for fid, rows in data.items():
+        hist = out[fid] = []
+        for r in rows:
+            legacy_update(hist, *r)
+    return out
+
+
+def build_new(data):
+    out = {}
+    for fid, rows in data.items():
+        hist = out[fid] = PaceHistory()
+        for r in rows:
+            hist.update(*r)
+    return out
+
+
+def measure_memory(builder, data):
+    tracemalloc.start()
+    obj = builder(data)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    data = {fid: make_rows(fid) for fid in range(FIXTURES)}
+
+    legacy, legacy_bytes = measure_memory(build_legacy, data)
+    new, new_bytes = measure_memory(build_new, data)
+
+    # zelfde uitkomst voor elke minuut
+    for fid in data:
+        for minute in range(0, 5 + ROWS + 3):
+            w = new[fid].windows(minute)
+            assert legacy_windows(legacy[fid], minute) == {k: tuple(v) for k, v in w.items()}, (fid, minute)
+
+    minute = 5 + ROWS - 1
+    n = 200
+    t_legacy = timeit.timeit(lambda: [legacy_windows(h, minute) for h in legacy.values()], number=n)
+    t_new = timeit.timeit(lambda: [h.windows(minute) for h in new.values()], number=n)
+
+    # worst case: vroeg in de history (lineaire scan loopt bijna alles af)
+    early = 10
+    t_legacy_early = timeit.timeit(lambda: [legacy_windows(h, early) for h in legacy.values()], number=n)
+    t_new_early = timeit.timeit(lambda: [h.windows(early) for h in new.values()], number=n)
+
+    per = FIXTURES * n
+    print(f"{FIXTURES} fixtures x {ROWS} snapshots")
+    print(f"memory   legacy {legacy_bytes / 1024:8.1f} KiB | PaceHistory {new_bytes / 1024:8.1f} KiB "
+          f"({legacy_bytes / new_bytes:.1f}x kleiner)")
+    print(f"lookup   legacy {t_legacy / per * 1e6:8.2f} us | PaceHistory {t_new / per * 1e6:8.2f} us per fixture (laatste minuut)")
+    print(f"lookup   legacy {t_legacy_early / per * 1e6:8.2f} us | PaceHistory {t_new_early / per * 1e6:8.2f} us per fixture (vroege minuut)")
+
+
+if __name__ == "__main__":
+    main()
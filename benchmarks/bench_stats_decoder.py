@@ -0,0 +1,77 @@
+"""/fixtures/statistics parsing: oude stat() per naam vs. decode_stats_response (één pass).
+
+Draaien vanuit de repo root:  python benchmarks/bench_stats_decoder.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import decode_stats_response, safe_int  # noqa: E402
+
+# volgorde zoals API-Football ze teruggeeft
+STAT_TYPES = [
+    "Shots on Goal", "Shots off Goal", "Total Shots", "Blocked Shots", "Shots insidebox",
+    "Shots outsidebox", "Fouls", "Corner Kicks", "Offsides", "Ball Possession",
+    "Yellow Cards", "Red Cards", "Goalkeeper Saves", "Total passes", "Passes accurate",
+    "Passes %", "expected_goals",
+]
+
+
+# ---- oude implementatie ----
+def legacy_stat(team_stats_list, name):
+    for s in team_stats_list:
+        if s.get("type") == name:
+            return safe_int(s.get("value"))
+    return 0
+
+
+def legacy_decode(stats_response):
+    home = stats_response[0].get("statistics", [])
+    away = stats_response[1].get("statistics", [])
+    return tuple(
+        (legacy_stat(team, "Shots on Goal"), legacy_stat(team, "Total Shots"), legacy_stat(team, "Corner Kicks"),
+         legacy_stat(team, "Ball Possession"), legacy_stat(team, "Red Cards"))
+        for team in (home, away)
+    )
+
+
+def make_response(seed):
+    rnd = random.Random(seed)
+
+    def team():
+        stats = []
+        for t in STAT_TYPES:
+            if t == "Ball Possession" or t == "Passes %":
+                v = f"{rnd.randint(30, 70)}%"
+            elif t == "Red Cards":
+                v = rnd.choice([None, None, 1])
+            elif t == "expected_goals":
+                v = f"{rnd.random() * 2:.2f}"
+            else:
+                v = rnd.randint(0, 20)
+            stats.append({"type": t, "value": v})
+        return {"team": {"id": seed}, "statistics": stats}
+
+    return [team(), team()]
+
+
+def main():
+    responses = [make_response(i) for i in range(150)]
+
+    for r in responses:
+        assert legacy_decode(r) == tuple(tuple(t) for t in decode_stats_response(r))
+
+    n = 200
+    t_legacy = timeit.timeit(lambda: [legacy_decode(r) for r in responses], number=n)
+    t_new = timeit.timeit(lambda: [decode_stats_response(r) for r in responses], number=n)
+    per = len(responses) * n
+    print(f"{len(responses)} responses x {len(STAT_TYPES)} stats per team")
+    print(f"decode   legacy {t_legacy / per * 1e6:7.2f} us | decoder {t_new / per * 1e6:7.2f} us per fixture "
+          f"({t_legacy / t_new:.1f}x sneller)")
+
+
+if __name__ == "__main__":
+    main()
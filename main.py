@@ -1,8 +1,28 @@
 import time
 import os
+import heapq
 import requests
+from requests.adapters import HTTPAdapter
 import csv
-from datetime import date, datetime, timedelta
+import glob
+import re
+import json
+import random
+import hashlib
+import gzip
+import sqlite3
+import threading
+import traceback
+import queue
+import signal
+import multiprocessing
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from statistics import median
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # =========================================================
 # ENV VARS
@@ -11,10 +31,6 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
 API_KEY = os.getenv("API_FOOTBALL_KEY")
 
-if not BOT_TOKEN or not CHAT_ID or not API_KEY:
-    print("❌ ERROR: Missing env vars. Check BOT_TOKEN, CHAT_ID, API_FOOTBALL_KEY")
-    raise SystemExit(1)
-
 BASE_URL = "https://v3.football.api-sports.io"
 HEADERS = {"x-apisports-key": API_KEY}
 
@@ -38,6 +54,9 @@ POST_GOAL_STRICT_UNTIL_SECONDS = 480  # was 600 → 8 min
 # Score regels
 MAX_BEHIND_GOALS = 2  # dominant team mag max 2 goals achter
 
+# Rust: niet eerder opnieuw checken dan dit (status HT)
+HALF_TIME_RECHECK_SECONDS = 600
+
 # =========================================================
 # TIERS (basis)
 # =========================================================
@@ -87,21 +106,113 @@ LATE_MIN_SHOTS_10 = 7   # was 8
 LATE_MAX_OPP_SOT = 2    # was 1 (iets soepeler)
 LATE_MIN_ODD = 1.55     # was 1.6 (iets soepeler)
 
+# Alert sender (anti spam zit hier, niet in de scanner)
+ALERT_BURST = 2                # max alerts direct achter elkaar
+ALERT_PER_MINUTE = 3           # daarna max zoveel per minuut
+ALERT_MAX_AGE_SECONDS = 150    # oudere alerts in de queue zijn waardeloos → droppen
+TIER_RANK = {"EXTREME": 0, "PREMIUM": 1, "NORMAL": 2}
+
 # Odds filter (1X2)
 ODD_MIN = 1.5
 REQUIRE_ODDS = False
 
+# Odds cache (1X2 beweegt binnen ~een minuut nauwelijks)
+ODDS_TTL_SECONDS = 90
+ODDS_NEGATIVE_TTL_SECONDS = 180  # geen odds gevonden → zo lang niet opnieuw proberen
+ODDS_CACHE_MAX = 500             # LRU: oudste fixtures eruit
+ODDS_BULK_MIN = 2                # vanaf zoveel cache misses 1 bulk /odds/live call i.p.v. per fixture
+ODDS_PRICE = "median"            # welke 1X2 prijs telt: "median" (consensus), "best" of "first" (oude gedrag)
+
+# =========================================================
+# Loop / concurrency
+# =========================================================
+LOOP_SLEEP_SECONDS = 91  # max tijd tussen twee live polls
+STATS_WORKERS = 8  # max parallelle stats/odds calls per cycle
+# Shards: prefilter + stats + scoring verdeeld over zoveel processen (per league); 0 = alles in dit proces
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+SHARD_START_METHOD = os.getenv("SHARD_START_METHOD", "spawn")  # spawn: geen geërfde threads/sockets
+SHARD_TIMEOUT_SECONDS = 120  # geen antwoord van een worker → herstarten
+
+# Adaptieve poll cadence per fixture
+POLL_FAST_SECONDS = 45     # dicht bij alert drempels of PENDING
+POLL_NORMAL_SECONDS = 91
+POLL_SLOW_SECONDS = 180    # ver van elke drempel
+HOT_PACE5_SHOTS = 3        # pace5 vanaf hier = hot
+HOT_GAP_MARGIN = 6.0       # gap binnen NORMAL_MIN_GAP +/- marge = hot
+
+# Pending die niet (meer) in de live feed staan: /fixtures?ids= bundelt zoveel fixtures per call
+PENDING_BATCH_SIZE = 20
+PENDING_RECHECK_SECONDS = 60   # nog niet afgelopen → opnieuw na 60s, 120s, 240s, ...
+PENDING_RECHECK_MAX = 900
+
+# /fixtures/events: exacte volgorde + minuut van de goal na een alert
+EVENTS_OWN_GOAL_FOR_OPPONENT = True  # "Own Goal" event staat bij de ploeg van de speler → telt voor de andere
+EVENTS_MAX_WAIT_CYCLES = 2           # beide ploegen gescoord maar events lopen achter → zo vaak wachten
+
+# =========================================================
+# Telegram delivery (achtergrond worker)
+# =========================================================
+TELEGRAM_QUEUE_SIZE = 200
+TELEGRAM_MAX_RETRIES = 5
+TELEGRAM_BACKOFF_BASE = 2      # sec, verdubbelt per poging
+TELEGRAM_BACKOFF_MAX = 60
+RESULT_BATCH_SECONDS = 3       # RESULT berichten die binnen dit venster binnenkomen → 1 bericht
+RESULT_BATCH_MAX = 8
+TELEGRAM_MAX_CHARS = 4096
+TELEGRAM_FLUSH_SECONDS = 20    # bij afsluiten hooguit zo lang wachten tot de queue leeg is
+
+# =========================================================
+# API budget (plan quota; headers overschrijven deze waarden)
+# =========================================================
+API_DAILY_LIMIT = int(os.getenv("API_DAILY_LIMIT", "7500"))
+API_PER_MINUTE_LIMIT = int(os.getenv("API_PER_MINUTE_LIMIT", "300"))
+API_BUDGET_RESERVE = 0.05      # deel van de dagquota dat we nooit aanspreken
+API_BUDGET_PEAK_FACTOR = 3.0   # wedstrijduren mogen x keer het daggemiddelde gebruiken
+API_MAX_SLOWDOWN = 4.0         # loop sleep max x LOOP_SLEEP_SECONDS bij krappe quota
+API_RATE_LIMIT_BACKOFF = 15    # sec pauze na 429 zonder Retry-After
+
+# =========================================================
+# Storingen (circuit breakers per upstream + backoff van de main loop)
+# =========================================================
+BREAKER_FAILURES = 5           # zoveel fouten op rij → circuit open (geen calls meer)
+BREAKER_OPEN_SECONDS = 60      # eerste keer open; verdubbelt bij elke mislukte proefcall
+BREAKER_OPEN_MAX = 900
+BREAKER_PROBE_SECONDS = 30     # half open: 1 proefcall tegelijk; na zoveel sec zonder uitkomst mag een volgende
+ERROR_BACKOFF_BASE = 15        # main loop na een fout: 15s, 30s, 60s, ... (met jitter)
+ERROR_BACKOFF_MAX = 900
+ERROR_ALERT_REPEAT_SECONDS = 1800  # dezelfde fout hooguit zo vaak naar Telegram
+
+# Metrics endpoint (GET /metrics, Prometheus tekst formaat); 0 = uit
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# =========================================================
+# HTTP (keep-alive pools per host)
+# =========================================================
+HTTP_POOL_SIZE = 16  # >= STATS_WORKERS, anders wachten threads op een vrije connectie
+HTTP_DEFAULT_TIMEOUT = (5, 25)  # (connect, read)
+HTTP_TIMEOUTS = {
+    "/fixtures": (5, 25),
+    "/fixtures/statistics": (5, 15),
+    "/fixtures/events": (5, 10),
+    "/odds": (5, 10),
+    "/odds/live": (5, 10),
+    "telegram": (5, 10),
+}
+
 # =========================================================
 # Blacklist rommel
 # =========================================================
+# hele woorden (hoofdletterongevoelig); "*" achteraan = ook woorden die zo beginnen ("Fem*" → Femenino)
 EXCLUDE_KEYWORDS = [
     "U21", "U20", "U19", "U18", "U17", "U16",
-    "Youth", "Junior",
+    "Youth", "Junior*",
     "Reserves", "Reserve", "B Team", "B-team", "II",
-    "Women", "Womens", "Fem", "Dames",
+    "Women", "Womens", "Fem*", "Dames",
     "Futsal",
     "Esports", "E-sports", "Virtual",
 ]
+EXCLUDE_KEYWORDS_FILE = os.getenv("EXCLUDE_KEYWORDS_FILE")  # optioneel: 1 keyword per regel, herladen bij wijziging
 
 # =========================================================
 # STATE
@@ -113,40 +224,679 @@ HALF_TIME_SNAPSHOT = {}
 SCORE_STATE = {}  # fid -> {"score": (gh,ga), "changed_at": epoch}
 
 # Rolling history for pace
-HISTORY = {}  # fid -> list of snapshots dicts
+HISTORY = {}  # fid -> PaceHistory
 
 # Pending alerts for HIT/MISS tracking
 PENDING = {}  # fid -> dict
+PENDING_RECHECK = {}  # fid -> {"due": epoch, "tries": n} voor pending buiten de live feed
+EVENTS_CURSOR = {}    # fid -> {"n": verwerkte events, "goals": [(side, (elapsed, extra)), ...]} voor pending fixtures
+
+# Poll scheduler: heap van (due, fid); NEXT_DUE is leidend (oude heap entries worden overgeslagen)
+POLL_QUEUE = []
+NEXT_DUE = {}    # fid -> epoch
+POLL_HINTS = {}  # fid -> (gap, pace5_shots) van de laatste scoring
+
+# Alert queue: fid -> alert (nieuwste versie per fixture), verstuurd door drain_alert_queue
+ALERT_QUEUE = {}
+ALERT_TOKENS = {"tokens": float(ALERT_BURST), "at": None}
+ALERT_STATS = {"sent": 0, "dropped_stale": 0, "replaced": 0}
+
+# Pre-filter: fixtures die (tijdelijk) geen alert kunnen geven
+INELIGIBLE = {}       # fid -> {"rule": str, "until": epoch of None, "score": (gh, ga)}
+PREFILTER_SAVED = {}  # rule -> aantal uitgespaarde stats calls (per dag)
+LAST_CYCLE_AT = None
+NEXT_CYCLE_AT = None  # geplande start van de volgende cycle (voor loop lag)
 
 # CSV logging
 ALERTS_LOG = "alerts_log_premium.csv"
 RESULTS_LOG = "results_log_premium.csv"
 WEEKLY_SUMMARY_LOG = "weekly_summary.csv"
+FEATURES_LOG = "features_log.csv"  # 1 rij per gescoorde fixture per cycle (voor analytics_store.py)
+LOG_FEATURES = os.getenv("LOG_FEATURES", "1") == "1"
+LOG_ROTATE_DAILY = os.getenv("LOG_ROTATE_DAILY", "1") == "1"  # alerts_log_premium_2026-10-16.csv etc.
+LOG_FSYNC_SECONDS = 300  # flush elke cycle, fsync hooguit zo vaak
+WORKER_OUTBOX = None  # alleen in een shard worker: {"features": [...], "messages": [...]} gaan mee terug naar de coordinator
+
+# Recorder: ruwe live/stats/odds payloads per cycle (gzip JSONL per dag) voor replay.py
+RECORD_PAYLOADS = os.getenv("RECORD_PAYLOADS", "0") == "1"
+RECORD_DIR = os.getenv("RECORD_DIR", "recordings")
+
+# State store (overleeft restarts/deploys)
+STATE_DB = os.getenv("STATE_DB", "bot_state.sqlite3")
+
+FETCH_POOL = ThreadPoolExecutor(max_workers=STATS_WORKERS)
 
 # =========================================================
-# BASIC HELPERS
+# HTTP CLIENT
+# =========================================================
+def make_session(headers=None):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    if headers:
+        session.headers.update(headers)
+    return session
+
+API_SESSION = make_session(HEADERS)
+TELEGRAM_SESSION = make_session()
+
+def http_stats():
+    """Per sessie: requests, nieuwe TCP/TLS connecties en hergebruikte connecties."""
+    out = {}
+    for name, session in (("api", API_SESSION), ("telegram", TELEGRAM_SESSION)):
+        reqs = conns = 0
+        pools = session.get_adapter("https://").poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            reqs += pool.num_requests
+            conns += pool.num_connections
+        out[name] = {"requests": reqs, "connections": conns, "reused": max(0, reqs - conns)}
+    return out
+
+# =========================================================
+# API BUDGET
+# =========================================================
+class ApiBudgetExceeded(Exception):
+    pass
+
+BUDGET_LOCK = threading.Lock()
+BUDGET = {
+    "day": None,              # UTC datum waarop de teller loopt (API-Football reset 00:00 UTC)
+    "day_limit": API_DAILY_LIMIT,
+    "day_remaining": None,    # uit x-ratelimit-requests-remaining, anders geschat
+    "calls_today": 0,
+    "minute_limit": API_PER_MINUTE_LIMIT,
+    "minute_calls": deque(),  # timestamps van calls in de laatste 60s
+    "blocked_until": 0.0,
+}
+
+def _utc_today():
+    return datetime.now(timezone.utc).date()
+
+def seconds_until_quota_reset():
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return max(60, (tomorrow - now).total_seconds())
+
+def _budget_roll_day():
+    # onder BUDGET_LOCK aanroepen
+    today = _utc_today()
+    if BUDGET["day"] != today:
+        BUDGET["day"] = today
+        BUDGET["calls_today"] = 0
+        BUDGET["day_remaining"] = None
+
+def _budget_day_remaining():
+    if BUDGET["day_remaining"] is not None:
+        return BUDGET["day_remaining"]
+    return BUDGET["day_limit"] - BUDGET["calls_today"]
+
+def budget_acquire():
+    """Wacht tot er ruimte is in het minuut-venster; faalt direct als de dagquota op is."""
+    while True:
+        with BUDGET_LOCK:
+            _budget_roll_day()
+            if _budget_day_remaining() <= 0:
+                raise ApiBudgetExceeded("dagquota API-Football op")
+
+            now = time.time()
+            calls = BUDGET["minute_calls"]
+            while calls and now - calls[0] >= 60:
+                calls.popleft()
+
+            wait = BUDGET["blocked_until"] - now
+            if wait <= 0 and len(calls) < BUDGET["minute_limit"]:
+                calls.append(now)
+                BUDGET["calls_today"] += 1
+                if BUDGET["day_remaining"] is not None:
+                    BUDGET["day_remaining"] -= 1
+                return
+            if wait <= 0:
+                wait = 60 - (now - calls[0])
+        time.sleep(min(max(wait, 0.05), 5))
+
+def budget_update_from_headers(headers):
+    day_limit = safe_int(headers.get("x-ratelimit-requests-limit"))
+    day_remaining = headers.get("x-ratelimit-requests-remaining")
+    minute_limit = safe_int(headers.get("x-ratelimit-limit"))
+    minute_remaining = headers.get("x-ratelimit-remaining")
+
+    with BUDGET_LOCK:
+        _budget_roll_day()
+        if day_limit > 0:
+            BUDGET["day_limit"] = day_limit
+        if day_remaining is not None:
+            BUDGET["day_remaining"] = safe_int(day_remaining)
+        if minute_limit > 0:
+            BUDGET["minute_limit"] = min(API_PER_MINUTE_LIMIT, minute_limit)
+        if minute_remaining is not None and safe_int(minute_remaining) <= 0:
+            BUDGET["blocked_until"] = max(BUDGET["blocked_until"], time.time() + API_RATE_LIMIT_BACKOFF)
+
+def budget_rate_limited(retry_after):
+    pause = safe_int(retry_after) or API_RATE_LIMIT_BACKOFF
+    with BUDGET_LOCK:
+        BUDGET["blocked_until"] = max(BUDGET["blocked_until"], time.time() + pause)
+
+def budget_count_external(n):
+    """Calls die een shard worker (eigen proces, eigen BUDGET) deed, meetellen voor de dagquota."""
+    with BUDGET_LOCK:
+        _budget_roll_day()
+        BUDGET["calls_today"] += n
+        if BUDGET["day_remaining"] is not None:
+            BUDGET["day_remaining"] -= n
+
+def budget_day_exhausted():
+    with BUDGET_LOCK:
+        _budget_roll_day()
+        BUDGET["day_remaining"] = 0
+
+def budget_cycle_allowance(cycle_seconds):
+    """Aantal calls dat deze cycle mag kosten, zodat de resterende quota de dag haalt."""
+    with BUDGET_LOCK:
+        _budget_roll_day()
+        usable = _budget_day_remaining() - int(BUDGET["day_limit"] * API_BUDGET_RESERVE)
+    if usable <= 0:
+        return 0
+    share = usable * cycle_seconds / seconds_until_quota_reset() * API_BUDGET_PEAK_FACTOR
+    return max(1, min(usable, int(share)))
+
+def budget_next_sleep(base_seconds, wanted_calls, allowance):
+    """Rek de loop op als we meer calls wilden dan de quota toeliet."""
+    if allowance <= 0:
+        return base_seconds * API_MAX_SLOWDOWN
+    factor = max(1.0, min(API_MAX_SLOWDOWN, wanted_calls / allowance))
+    return base_seconds * factor
+
+def budget_status():
+    with BUDGET_LOCK:
+        _budget_roll_day()
+        return {"day_remaining": _budget_day_remaining(), "calls_today": BUDGET["calls_today"]}
+
+# =========================================================
+# CIRCUIT BREAKERS (per upstream: bij een storing geen quota/CPU verbranden)
+# =========================================================
+class UpstreamUnavailable(Exception):
+    """Circuit staat open: de call is niet gedaan."""
+    def __init__(self, upstream, retry_in):
+        super().__init__(f"{upstream} onbereikbaar (circuit open, nog {retry_in:.0f}s)")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+API_UPSTREAMS = {
+    "/fixtures": "fixtures",
+    "/fixtures/events": "fixtures",
+    "/fixtures/statistics": "statistics",
+    "/odds": "odds",
+    "/odds/live": "odds",
+}
+BREAKER_LOCK = threading.Lock()
+# upstream -> {"failures": fouten op rij, "opened": keer open zonder herstel, "open_until": epoch,
+#              "probe_in_flight": start van de lopende proefcall (0 = geen)}
+# opened > 0 en open_until voorbij = half open: 1 proefcall; slaagt die → dicht, 1 fout → meteen weer open (langer)
+BREAKERS = {name: {"failures": 0, "opened": 0, "open_until": 0.0, "probe_in_flight": 0.0}
+            for name in ("fixtures", "statistics", "odds", "telegram")}
+
+def breaker_check(name):
+    """Raist UpstreamUnavailable zolang het circuit open is, en half open voor iedereen behalve de proefcall."""
+    with BREAKER_LOCK:
+        b = BREAKERS[name]
+        if not b["opened"]:
+            return
+        now = time.time()
+        if now < b["open_until"]:
+            raise UpstreamUnavailable(name, b["open_until"] - now)
+        probing = now - b["probe_in_flight"]
+        if probing < BREAKER_PROBE_SECONDS:  # parallelle calls (fetch_concurrent) wachten op de uitkomst
+            raise UpstreamUnavailable(name, BREAKER_PROBE_SECONDS - probing)
+        b["probe_in_flight"] = now
+
+def breaker_release(name):
+    """Proefcall ging niet door (bv. quota op): volgende caller mag proberen, zonder oordeel over de upstream."""
+    with BREAKER_LOCK:
+        BREAKERS[name]["probe_in_flight"] = 0.0
+
+def breaker_success(name):
+    with BREAKER_LOCK:
+        b = BREAKERS[name]
+        recovered = b["opened"]
+        b.update(failures=0, opened=0, open_until=0.0, probe_in_flight=0.0)
+    if recovered:
+        print(f"🔌 {name} weer bereikbaar", flush=True)
+        if name != "telegram":
+            send_message(f"🔌 {name} weer bereikbaar ✅")
+
+def breaker_failure(name):
+    with BREAKER_LOCK:
+        b = BREAKERS[name]
+        now = time.time()
+        b["failures"] += 1
+        if now < b["open_until"] or (not b["opened"] and b["failures"] < BREAKER_FAILURES):
+            return  # al open (parallelle calls van vóór het openen) of nog onder de drempel
+        b["opened"] += 1
+        b["probe_in_flight"] = 0.0
+        wait = min(BREAKER_OPEN_MAX, BREAKER_OPEN_SECONDS * 2 ** (b["opened"] - 1))
+        b["open_until"] = now + wait * random.uniform(1.0, 1.2)
+        first = b["opened"] == 1
+    print(f"🔌 circuit {name} open voor {wait}s ({b['failures']} fouten op rij)", flush=True)
+    if first and name != "telegram":  # 1 melding per storing, niet per mislukte proefcall
+        send_message(f"🔌 {name} onbereikbaar ({BREAKER_FAILURES} fouten op rij) — calls gepauzeerd")
+
+def breaker_status():
+    now = time.time()
+    with BREAKER_LOCK:
+        return {name: max(0, round(b["open_until"] - now)) for name, b in BREAKERS.items() if b["opened"]}
+
 # =========================================================
-def send_message(text: str):
+# METRICS (latency histogrammen + tellers; Prometheus tekst op METRICS_PORT)
+# =========================================================
+METRICS_LOCK = threading.Lock()
+METRIC_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # seconden
+METRIC_HELP = {
+    "cycle_seconds": ("histogram", "Duur van een scan cycle"),
+    "cycle_stage_seconds": ("histogram", "Duur per stage van de cycle"),
+    "loop_lag_seconds": ("histogram", "Start van de cycle later dan gepland"),
+    "api_request_seconds": ("histogram", "Latency per API-Football call"),
+    "api_requests_total": ("counter", "API-Football calls per endpoint en uitkomst"),
+    "telegram_send_seconds": ("histogram", "Latency van Telegram sendMessage"),
+    "telegram_delivery_seconds": ("histogram", "Van send_message tot afgeleverd"),
+    "odds_lookups_total": ("counter", "Odds lookups per endpoint en uitkomst"),
+    "log_rows_total": ("counter", "Geschreven CSV rijen per log"),
+    "fixtures_total": ("counter", "Fixtures per stage: live, eligible, scored, candidate, alert, sent"),
+    "cycles_total": ("counter", "Afgeronde cycles"),
+    "api_quota_remaining": ("gauge", "Resterende API calls vandaag"),
+    "pending_alerts": ("gauge", "Alerts die op HIT/MISS wachten"),
+    "telegram_backlog": ("gauge", "Berichten in de Telegram queue"),
+    "circuit_open_seconds": ("gauge", "Resterende open tijd per circuit breaker"),
+    "shard_errors_total": ("counter", "Shard worker fouten en herstarts"),
+}
+HISTOGRAMS = {}  # (naam, labels) -> {"counts": [per bucket..., +Inf], "sum": float}
+COUNTERS = {}    # (naam, labels) -> waarde
+METRICS_DAY = {"base": None}  # snapshot bij de dag reset; het dagrapport toont het verschil
+METRICS_SERVER = {"server": None}
+
+def observe(name, seconds, **labels):
+    i = bisect_left(METRIC_BUCKETS, seconds)
+    key = (name, tuple(sorted(labels.items())))
+    with METRICS_LOCK:
+        h = HISTOGRAMS.get(key)
+        if h is None:
+            h = HISTOGRAMS[key] = {"counts": [0] * (len(METRIC_BUCKETS) + 1), "sum": 0.0}
+        h["counts"][i] += 1
+        h["sum"] += seconds
+
+def inc(name, n=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with METRICS_LOCK:
+        COUNTERS[key] = COUNTERS.get(key, 0) + n
+
+def stage_timer():
+    """lap("stage") → tijd sinds de vorige lap in cycle_stage_seconds."""
+    last = [time.monotonic()]
+    def lap(stage):
+        now = time.monotonic()
+        observe("cycle_stage_seconds", now - last[0], stage=stage)
+        last[0] = now
+    return lap
+
+def metrics_snapshot():
+    with METRICS_LOCK:
+        return {
+            "hist": {k: (list(h["counts"]), h["sum"]) for k, h in HISTOGRAMS.items()},
+            "counters": dict(COUNTERS),
+        }
+
+def metrics_merge(snap):
+    """Telt een metrics_snapshot() van een shard worker op bij de eigen histogrammen/tellers."""
+    with METRICS_LOCK:
+        for key, (counts, total) in snap["hist"].items():
+            h = HISTOGRAMS.get(key)
+            if h is None:
+                h = HISTOGRAMS[key] = {"counts": [0] * (len(METRIC_BUCKETS) + 1), "sum": 0.0}
+            h["counts"] = [a + b for a, b in zip(h["counts"], counts)]
+            h["sum"] += total
+        for key, n in snap["counters"].items():
+            COUNTERS[key] = COUNTERS.get(key, 0) + n
+
+def metric_gauges():
+    """Gauges worden bij het uitlezen berekend: (naam, labels, waarde)."""
+    out = [
+        ("pending_alerts", (), len(PENDING)),
+        ("telegram_backlog", (), TELEGRAM_QUEUE.qsize()),
+    ]
+    remaining = budget_status()["day_remaining"]
+    if remaining is not None:
+        out.append(("api_quota_remaining", (), remaining))
+    out.extend(("circuit_open_seconds", (("upstream", name),), left) for name, left in breaker_status().items())
+    return out
+
+def _metric_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}" if items else ""
+
+def metrics_text():
+    """Prometheus text exposition format (0.0.4)."""
+    snap = metrics_snapshot()
+    by_name = {}
+    for (name, labels), (counts, total) in snap["hist"].items():
+        by_name.setdefault(name, []).append(("histogram", labels, (counts, total)))
+    for (name, labels), value in snap["counters"].items():
+        by_name.setdefault(name, []).append(("counter", labels, value))
+    for name, labels, value in metric_gauges():
+        by_name.setdefault(name, []).append(("gauge", labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, text = METRIC_HELP.get(name, ("untyped", name))
+        lines += [f"# HELP livebets_{name} {text}", f"# TYPE livebets_{name} {kind}"]
+        for _, labels, value in sorted(by_name[name], key=lambda item: item[1]):
+            if kind != "histogram":
+                lines.append(f"livebets_{name}{_metric_labels(labels)} {value}")
+                continue
+            counts, total = value
+            cum = 0
+            for le, n in zip(METRIC_BUCKETS + ("+Inf",), counts):
+                cum += n
+                lines.append(f"livebets_{name}_bucket{_metric_labels(labels, [('le', le)])} {cum}")
+            lines.append(f"livebets_{name}_sum{_metric_labels(labels)} {round(total, 6)}")
+            lines.append(f"livebets_{name}_count{_metric_labels(labels)} {cum}")
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # geen access log per scrape
+
+def start_metrics_server(port=None):
+    """GET /metrics op METRICS_HOST:port in een daemon thread; port 0 = uit."""
+    port = METRICS_PORT if port is None else port
+    if not port or METRICS_SERVER["server"] is not None:
+        return METRICS_SERVER["server"]
+    server = ThreadingHTTPServer((METRICS_HOST, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    METRICS_SERVER["server"] = server
+    return server
+
+def _hist_since(name, base, **match):
+    """Histogram van name (labels die matchen samengevoegd) sinds de snapshot base: (counts, sum)."""
+    snap = metrics_snapshot()
+    counts, total = [0] * (len(METRIC_BUCKETS) + 1), 0.0
+    for (n, labels), (c, t) in snap["hist"].items():
+        if n != name or any(dict(labels).get(k) != v for k, v in match.items()):
+            continue
+        b = (base or {}).get("hist", {}).get((n, labels), ([0] * len(c), 0.0))
+        counts = [x + y - z for x, y, z in zip(counts, c, b[0])]
+        total += t - b[1]
+    return counts, total
+
+def _quantile(counts, q):
+    """Bovengrens van de bucket waarin het q-kwantiel valt (None = geen data, inf = boven de laatste bucket)."""
+    n = sum(counts)
+    if not n:
+        return None
+    cum = 0
+    for le, c in zip(METRIC_BUCKETS + (float("inf"),), counts):
+        cum += c
+        if cum >= q * n:
+            return le
+    return float("inf")
+
+def _counters_since(name, base, by):
+    out = {}
+    for (n, labels), value in metrics_snapshot()["counters"].items():
+        if n != name:
+            continue
+        prev = (base or {}).get("counters", {}).get((n, labels), 0)
+        key = dict(labels).get(by)
+        out[key] = out.get(key, 0) + value - prev
+    return out
+
+def metrics_summary(base=None):
+    """Korte performance samenvatting sinds snapshot base (voor het dagrapport)."""
+    def fmt(v):
+        return "—" if v is None else ">60s" if v == float("inf") else f"≤{v}s"
+
+    cycles, cycle_sum = _hist_since("cycle_seconds", base)
+    n_cycles = sum(cycles)
+    lag, _ = _hist_since("loop_lag_seconds", base)
+    calls = _counters_since("api_requests_total", base, "outcome")
+    n_calls = sum(calls.values())
+    n_err = n_calls - calls.get("ok", 0)
+    funnel = _counters_since("fixtures_total", base, "stage")
+    stages = []
+    for stage in ("live", "results", "prefilter", "stats", "shards", "scoring", "odds", "alerts", "record", "pending", "logging"):
+        c, t = _hist_since("cycle_stage_seconds", base, stage=stage)
+        if sum(c):
+            stages.append(f"{stage} {t / sum(c):.2f}s")
+    api_p95 = ", ".join(
+        f"{label} {fmt(_quantile(_hist_since('api_request_seconds', base, endpoint=path)[0], 0.95))}"
+        for label, path in (("live", "/fixtures"), ("stats", "/fixtures/statistics"), ("odds", "/odds/live"))
+    )
+    tg, _ = _hist_since("telegram_delivery_seconds", base)
+    return (
+        f"⏱️ Cycles: {n_cycles} | gem {cycle_sum / n_cycles if n_cycles else 0:.2f}s | "
+        f"p95 {fmt(_quantile(cycles, 0.95))} | loop lag p95 {fmt(_quantile(lag, 0.95))}\n"
+        f"🌐 API: {n_calls} calls | fouten {n_err} ({round(n_err / n_calls * 100, 1) if n_calls else 0.0}%) | p95 {api_p95}\n"
+        f"🔎 Fixtures: live {funnel.get('live', 0)} → eligible {funnel.get('eligible', 0)} → "
+        f"gescoord {funnel.get('scored', 0)} → kandidaat {funnel.get('candidate', 0)} → "
+        f"alert {funnel.get('alert', 0)} (verstuurd {funnel.get('sent', 0)})\n"
+        f"🐢 Stages (gem): {', '.join(stages) or '—'}\n"
+        f"📨 Telegram aflevering p95 {fmt(_quantile(tg, 0.95))}"
+    )
+
+# =========================================================
+# TELEGRAM DELIVERY
+# =========================================================
+TELEGRAM_QUEUE = queue.Queue(maxsize=TELEGRAM_QUEUE_SIZE)
+TELEGRAM_LOCK = threading.Lock()
+TELEGRAM_STATS = {"queued": 0, "sent": 0, "failed": 0, "retries": 0, "dropped": 0,
+                  "latency_sum": 0.0, "latency_max": 0.0}
+TELEGRAM_WORKER = {"thread": None}
+
+def send_message(text: str, kind: str = "info"):
+    """Zet een bericht in de queue; de scanner wacht nooit op het netwerk."""
+    if WORKER_OUTBOX is not None:
+        WORKER_OUTBOX["messages"].append((text, kind))  # shard worker: de coordinator verstuurt
+        return
+    _ensure_telegram_worker()
+    try:
+        TELEGRAM_QUEUE.put_nowait((kind, text, time.time()))
+        with TELEGRAM_LOCK:
+            TELEGRAM_STATS["queued"] += 1
+    except queue.Full:
+        with TELEGRAM_LOCK:
+            TELEGRAM_STATS["dropped"] += 1
+
+def telegram_stats():
+    with TELEGRAM_LOCK:
+        out = dict(TELEGRAM_STATS)
+    delivered = out["sent"]
+    out["latency_avg"] = round(out["latency_sum"] / delivered, 2) if delivered else 0.0
+    out["backlog"] = TELEGRAM_QUEUE.qsize()
+    return out
+
+def _ensure_telegram_worker():
+    with TELEGRAM_LOCK:
+        t = TELEGRAM_WORKER["thread"]
+        if t is not None and t.is_alive():
+            return
+        t = threading.Thread(target=_telegram_worker, name="telegram", daemon=True)
+        TELEGRAM_WORKER["thread"] = t
+    t.start()
+
+def _telegram_post(text):
+    """(ok, retry_after): None = niet opnieuw proberen, 0 = storing (netwerk/5xx), >0 = rate limit (429)."""
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
     payload = {"chat_id": CHAT_ID, "text": text}
+    t0 = time.monotonic()
     try:
-        requests.post(url, data=payload, timeout=10)
-    except:
-        pass
+        r = TELEGRAM_SESSION.post(url, data=payload, timeout=HTTP_TIMEOUTS["telegram"])
+    except requests.RequestException:
+        return (False, 0)
+    finally:
+        observe("telegram_send_seconds", time.monotonic() - t0)
+    if r.status_code == 200:
+        return (True, None)
+    if r.status_code == 429:
+        try:
+            retry_after = safe_int(r.json().get("parameters", {}).get("retry_after"))
+        except ValueError:
+            retry_after = 0
+        return (False, retry_after or TELEGRAM_BACKOFF_BASE)  # 0 is voor storingen gereserveerd
+    if r.status_code >= 500:
+        return (False, 0)
+    return (False, None)  # 4xx: bericht zelf is fout, retry helpt niet
+
+def _deliver(text, queued_times):
+    for attempt in range(TELEGRAM_MAX_RETRIES + 1):
+        try:
+            breaker_check("telegram")
+        except UpstreamUnavailable as e:
+            time.sleep(max(1.0, e.retry_in))  # worker thread: wachten tot de proefcall mag
+            continue
+        ok, retry_after = _telegram_post(text)
+        if ok:
+            breaker_success("telegram")
+            now = time.time()
+            with TELEGRAM_LOCK:
+                for t in queued_times:
+                    lat = now - t
+                    observe("telegram_delivery_seconds", lat)
+                    TELEGRAM_STATS["sent"] += 1
+                    TELEGRAM_STATS["latency_sum"] += lat
+                    TELEGRAM_STATS["latency_max"] = max(TELEGRAM_STATS["latency_max"], lat)
+            return
+        if retry_after == 0:  # netwerk/5xx; 429 en 4xx zijn geen storing
+            breaker_failure("telegram")
+        else:
+            breaker_success("telegram")  # wel een antwoord: een eventuele proefcall is geslaagd
+        if retry_after is None or attempt == TELEGRAM_MAX_RETRIES:
+            break
+        with TELEGRAM_LOCK:
+            TELEGRAM_STATS["retries"] += 1
+        backoff = min(TELEGRAM_BACKOFF_MAX, TELEGRAM_BACKOFF_BASE * (2 ** attempt))
+        time.sleep(max(retry_after, backoff))
+    with TELEGRAM_LOCK:
+        TELEGRAM_STATS["failed"] += len(queued_times)
+    print(f"⚠️ Telegram delivery mislukt: {text[:60]!r}", flush=True)
+
+def _telegram_worker():
+    held = None
+    while True:
+        kind, text, queued_at = held or TELEGRAM_QUEUE.get()
+        held = None
+
+        if kind != "result":
+            _deliver(text, [queued_at])
+            TELEGRAM_QUEUE.task_done()
+            continue
+
+        # RESULT berichten bundelen; een ander bericht breekt de batch direct af
+        texts, times = [text], [queued_at]
+        deadline = time.time() + RESULT_BATCH_SECONDS
+        while len(texts) < RESULT_BATCH_MAX:
+            try:
+                item = TELEGRAM_QUEUE.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if item[0] != "result":
+                held = item
+                break
+            if sum(len(t) for t in texts) + len(item[1]) + 2 * len(texts) > TELEGRAM_MAX_CHARS:
+                held = item
+                break
+            texts.append(item[1])
+            times.append(item[2])
+        _deliver("\n\n".join(texts), times)
+        for _ in texts:
+            TELEGRAM_QUEUE.task_done()
+
+def flush_telegram(timeout=TELEGRAM_FLUSH_SECONDS):
+    """Bij afsluiten: wacht (begrensd) tot alles in de queue afgeleverd of opgegeven is; geeft wat er nog stond."""
+    deadline = time.monotonic() + timeout
+    t = TELEGRAM_WORKER["thread"]
+    while TELEGRAM_QUEUE.unfinished_tasks and t is not None and t.is_alive() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    return TELEGRAM_QUEUE.unfinished_tasks
+
+# =========================================================
+# BASIC HELPERS
+# =========================================================
+def _api_metric(path, t0, outcome):
+    observe("api_request_seconds", time.monotonic() - t0, endpoint=path)
+    inc("api_requests_total", endpoint=path, outcome=outcome)
 
 def api_get(path, params=None):
-    r = requests.get(f"{BASE_URL}{path}", headers=HEADERS, params=params, timeout=25)
-    r.raise_for_status()
-    return r.json()
+    timeout = HTTP_TIMEOUTS.get(path, HTTP_DEFAULT_TIMEOUT)
+    upstream = API_UPSTREAMS.get(path, "fixtures")
+    for attempt in range(2):
+        breaker_check(upstream)
+        try:
+            budget_acquire()
+        except ApiBudgetExceeded:
+            breaker_release(upstream)
+            raise
+        t0 = time.monotonic()
+        try:
+            r = API_SESSION.get(f"{BASE_URL}{path}", params=params, timeout=timeout)
+        except requests.RequestException:
+            _api_metric(path, t0, "error")
+            breaker_failure(upstream)
+            raise
+        budget_update_from_headers(r.headers)
+        if r.status_code == 429 and attempt == 0:
+            _api_metric(path, t0, "rate_limited")
+            breaker_success(upstream)  # antwoord = bereikbaar (ook als proefcall)
+            budget_rate_limited(r.headers.get("Retry-After"))
+            continue
+        if r.status_code >= 400:
+            _api_metric(path, t0, f"http_{r.status_code // 100}xx")
+            if r.status_code >= 500:
+                breaker_failure(upstream)
+            else:
+                breaker_success(upstream)
+        r.raise_for_status()
+        try:
+            data = r.json()
+        except ValueError:
+            _api_metric(path, t0, "bad_json")
+            breaker_failure(upstream)
+            raise
+        breaker_success(upstream)
+        errors = data.get("errors")
+        _api_metric(path, t0, "api_error" if isinstance(errors, dict) and errors else "ok")
+        if isinstance(errors, dict) and errors:
+            if "requests" in errors:
+                budget_day_exhausted()
+                raise ApiBudgetExceeded(errors["requests"])
+            if "rateLimit" in errors and attempt == 0:
+                budget_rate_limited(None)
+                continue
+        return data
+    return data
 
 def get_live_matches():
     data = api_get("/fixtures", params={"live": "all"})
     return data.get("response", [])
 
-def get_fixture_by_id(fid):
-    data = api_get("/fixtures", params={"id": fid})
-    resp = data.get("response", [])
-    return resp[0] if resp else None
+def get_fixtures_by_ids(fids):
+    """Max PENDING_BATCH_SIZE fixtures in 1 call."""
+    data = api_get("/fixtures", params={"ids": "-".join(str(fid) for fid in fids)})
+    return data.get("response", [])
+
+def get_fixture_events(fixture_id):
+    data = api_get("/fixtures/events", params={"fixture": fixture_id})
+    return data.get("response", [])
 
 def get_match_statistics(fixture_id):
     data = api_get("/fixtures/statistics", params={"fixture": fixture_id})
@@ -170,111 +920,648 @@ def safe_float(v):
     except:
         return None
 
-def stat(team_stats_list, name):
-    for s in team_stats_list:
-        if s.get("type") == name:
-            return safe_int(s.get("value"))
-    return 0
-
 def clamp_nonnegative(x):
     return x if x > 0 else 0
 
-def is_excluded_match(league_name, home_name, away_name):
-    text = f"{league_name} {home_name} {away_name}".lower()
-    for kw in EXCLUDE_KEYWORDS:
-        if kw.lower() in text:
-            return True
-    return False
-
 def cleanup_finished(fid):
+    ALERT_QUEUE.pop(fid, None)
+    NEXT_DUE.pop(fid, None)
+    POLL_HINTS.pop(fid, None)
+    INELIGIBLE.pop(fid, None)
     HALF_TIME_SNAPSHOT.pop(fid, None)
     SCORE_STATE.pop(fid, None)
     PENDING.pop(fid, None)
+    EVENTS_CURSOR.pop(fid, None)
     HISTORY.pop(fid, None)
 
 # =========================================================
-# HISTORY / PACE
+# BLACKLIST MATCHER (1 regex, beslissingen gememoized per league/teams)
 # =========================================================
-def update_history(fid, minute, hsot, asot, hshots, ashots, hcorn, acorn):
-    if fid not in HISTORY:
-        HISTORY[fid] = []
-    hist = HISTORY[fid]
-    if hist and hist[-1]["minute"] == minute:
-        hist[-1] = {"minute": minute, "hsot": hsot, "asot": asot, "hshots": hshots, "ashots": ashots, "hcorn": hcorn, "acorn": acorn}
-    else:
-        hist.append({"minute": minute, "hsot": hsot, "asot": asot, "hshots": hshots, "ashots": ashots, "hcorn": hcorn, "acorn": acorn})
-    if len(hist) > 80:
-        HISTORY[fid] = hist[-80:]
-
-def get_snapshot_at_or_before(hist, target_minute):
-    best = None
-    for row in reversed(hist):
-        if row["minute"] <= target_minute:
-            best = row
+EXCLUDE_MEMO = {}  # (league_id, home_id, away_id) of namen -> bool
+
+def compile_exclude_keywords(keywords):
+    """Eén regex met woordgrenzen; "kw*" matcht ook langere woorden die met kw beginnen.
+    Keywords lowercase i.p.v. re.IGNORECASE: de tekst wordt 1x gelowercased (sneller)."""
+    parts = []
+    for kw in sorted({kw.strip().lower() for kw in keywords}, key=len, reverse=True):
+        if not kw or kw == "*":
+            continue
+        if kw.endswith("*"):
+            parts.append(re.escape(kw[:-1]) + r"\w*")
+        else:
+            parts.append(re.escape(kw))
+    if not parts:
+        return None
+    return re.compile(r"(?<!\w)(?:" + "|".join(parts) + r")(?!\w)")
+
+def read_exclude_keywords(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def is_excluded_match(league_name, home_name, away_name, key=None):
+    """key: (league_id, home_id, away_id) → beslissing 1x per league/teams combinatie."""
+    memo_key = key if key and None not in key else (league_name, home_name, away_name)
+    hit = EXCLUDE_MEMO.get(memo_key)
+    if hit is not None:
+        return hit
+    regex = RULES.exclude_regex
+    excluded = bool(regex and regex.search(f"{league_name}\n{home_name}\n{away_name}".lower()))
+    EXCLUDE_MEMO[memo_key] = excluded
+    return excluded
+
+# =========================================================
+# RULES (drempels uit RULES_FILE, hot reload tussen cycles)
+# =========================================================
+# RULES_FILE: JSON met overrides op de constants hierboven, bv. {"NORMAL_MIN_GAP": 20, "LATE_MIN_ODD": 1.6}.
+# Gewijzigd bestand → nieuw Rules object (gevalideerd, regex al gecompileerd) dat run_cycle vóór de
+# volgende cycle in 1 keer omwisselt; pace history, cooldowns en pending blijven gewoon staan.
+RULES_FILE = os.getenv("RULES_FILE", "rules.json")
+RULE_NAMES = (
+    "FIRST_HALF_MIN", "FIRST_HALF_MAX", "SECOND_HALF_MIN", "SECOND_HALF_MAX",
+    "EARLY_RISK_START", "EARLY_RISK_END",
+    "GOAL_COOLDOWN_SECONDS", "POST_GOAL_STRICT_UNTIL_SECONDS", "MAX_BEHIND_GOALS", "HALF_TIME_RECHECK_SECONDS",
+    "NORMAL_MIN_SCORE", "NORMAL_MIN_GAP", "NORMAL_MAX_OPP_SOT", "NORMAL_MAX_OPP_SHOTS",
+    "PREMIUM_MIN_SCORE", "PREMIUM_MIN_GAP", "PREMIUM_MIN_SOT_DIFF", "PREMIUM_MAX_OPP_SOT",
+    "PREMIUM_MAX_OPP_SHOTS", "PREMIUM_MIN_CONF",
+    "EXTREME_SCORE", "EXTREME_MIN_GAP", "EXTREME_MAX_OPP_SOT", "EXTREME_MAX_OPP_SHOTS",
+    "W_SOT", "W_SHOTS", "W_CORNERS", "W_POSSESSION", "RED_CARD_BONUS",
+    "PACE1_MIN_SHOTS_10", "PACE1_MIN_SHOTS_5", "PACE1_MIN_SOT_10",
+    "PACE2_MIN_SHOTS_10", "PACE2_MIN_SHOTS_5", "PACE2_MIN_SOT_10",
+    "LATE_MINUTE", "LATE_MIN_SOT_DIFF", "LATE_MIN_SHOTS_10", "LATE_MAX_OPP_SOT", "LATE_MIN_ODD",
+    "ODD_MIN", "REQUIRE_ODDS", "ODDS_PRICE",
+    "HOT_PACE5_SHOTS", "HOT_GAP_MARGIN",
+    "EXCLUDE_KEYWORDS",
+)
+Rules = namedtuple("Rules", RULE_NAMES + ("exclude_regex", "version"))
+RULES_SOURCE = {"mtimes": None}  # (RULES_FILE, EXCLUDE_KEYWORDS_FILE) mtimes bij de laatste reload
+
+def _coerce_rule(name, raw):
+    """Waarde uit JSON of --set NAAM=WAARDE → het type van de default in de code."""
+    cur = globals()[name]
+    if isinstance(cur, bool):
+        if isinstance(raw, str):
+            return raw.strip().lower() in ("1", "true", "yes", "ja")
+        return bool(raw)
+    if isinstance(cur, (list, tuple)):
+        if isinstance(raw, str):
+            raw = raw.split(",")
+        return tuple(str(kw).strip() for kw in raw if str(kw).strip())
+    if isinstance(cur, int):
+        value = float(raw)
+        if not value.is_integer():
+            raise ValueError(f"{name}: geheel getal verwacht, kreeg {raw!r}")
+        return int(value)
+    return type(cur)(raw)
+
+def build_rules(overrides=None, base=None):
+    """Nieuw (immutable) Rules object: defaults of base + overrides; ValueError bij onbekende of foute waarden."""
+    values = {name: getattr(base, name) if base else globals()[name] for name in RULE_NAMES}
+    for name, raw in (overrides or {}).items():
+        if name not in values:
+            raise ValueError(f"onbekende instelling: {name}")
+        try:
+            values[name] = _coerce_rule(name, raw)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{name}={raw!r}: {e}") from None
+    values["EXCLUDE_KEYWORDS"] = tuple(values["EXCLUDE_KEYWORDS"])
+
+    if values["ODDS_PRICE"] not in ("first", "best", "median"):
+        raise ValueError(f"ODDS_PRICE moet first/best/median zijn, niet {values['ODDS_PRICE']!r}")
+    if not (values["FIRST_HALF_MIN"] <= values["FIRST_HALF_MAX"] < values["SECOND_HALF_MIN"] <= values["SECOND_HALF_MAX"]):
+        raise ValueError("time windows: FIRST_HALF_MIN <= FIRST_HALF_MAX < SECOND_HALF_MIN <= SECOND_HALF_MAX")
+
+    version = hashlib.sha1(json.dumps(values, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    return Rules(**values, exclude_regex=compile_exclude_keywords(values["EXCLUDE_KEYWORDS"]), version=version)
+
+RULES = build_rules()
+
+def _file_mtime(path):
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def load_rules():
+    """Rules uit RULES_FILE (+ EXCLUDE_KEYWORDS_FILE, dat wint voor de blacklist); OSError/ValueError bij een fout bestand."""
+    overrides = {}
+    if _file_mtime(RULES_FILE) is not None:
+        with open(RULES_FILE, "r", encoding="utf-8") as f:
+            try:
+                overrides = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{RULES_FILE}: {e}") from None
+        if not isinstance(overrides, dict):
+            raise ValueError(f"{RULES_FILE}: verwacht een JSON object")
+    if _file_mtime(EXCLUDE_KEYWORDS_FILE) is not None:
+        overrides["EXCLUDE_KEYWORDS"] = read_exclude_keywords(EXCLUDE_KEYWORDS_FILE)
+    return build_rules(overrides)
+
+def set_rules(rules):
+    """Wisselt het actieve Rules object om; geeft de namen die veranderd zijn."""
+    global RULES
+    changed = [name for name in RULE_NAMES if getattr(rules, name) != getattr(RULES, name)]
+    if rules.EXCLUDE_KEYWORDS != RULES.EXCLUDE_KEYWORDS:
+        EXCLUDE_MEMO.clear()
+    RULES = rules
+    return changed
+
+def reload_rules():
+    """Alleen als een van de bestanden veranderde: opnieuw laden en omwisselen. Geeft de gewijzigde namen.
+    Bij een fout bestand blijft het oude Rules object actief (de fout komt 1x, tot het bestand weer wijzigt)."""
+    mtimes = (_file_mtime(RULES_FILE), _file_mtime(EXCLUDE_KEYWORDS_FILE))
+    if mtimes == RULES_SOURCE["mtimes"]:
+        return []
+    RULES_SOURCE["mtimes"] = mtimes
+    return set_rules(load_rules())
+
+# =========================================================
+# STATS DECODER (/fixtures/statistics → vaste slots)
+# =========================================================
+TeamStats = namedtuple("TeamStats", "sot shots corners possession red_cards")
+STAT_SLOTS = {
+    "Shots on Goal": 0,
+    "Total Shots": 1,
+    "Corner Kicks": 2,
+    "Ball Possession": 3,
+    "Red Cards": 4,
+}
+
+def decode_team_stats(team_stats_list):
+    """Eén pass over de statistics list; eerste waarde per type telt (zoals de API ze levert)."""
+    values = [0, 0, 0, 0, 0]
+    found = 0
+    slots = STAT_SLOTS
+    for s in team_stats_list:
+        i = slots.get(s.get("type"))
+        if i is None or found & (1 << i):
+            continue
+        found |= 1 << i
+        v = s.get("value")
+        if type(v) is int:
+            values[i] = v
+        elif type(v) is str and v.endswith("%") and v[:-1].isdigit():
+            values[i] = int(v[:-1])  # "55%" → 55 zonder float omweg
+        elif v is not None:
+            values[i] = safe_int(v)
+        if found == 0b11111:
             break
-    return best
-
-def pace_last_window(fid, cur_minute, window_minutes, pick_side):
-    hist = HISTORY.get(fid, [])
-    if not hist or cur_minute is None:
-        return (0, 0)
-
-    start_minute = max(0, cur_minute - window_minutes)
-    cur = get_snapshot_at_or_before(hist, cur_minute)
-    old = get_snapshot_at_or_before(hist, start_minute)
-    if not cur or not old:
-        return (0, 0)
-
-    if pick_side == "HOME":
-        shots = clamp_nonnegative(cur["hshots"] - old["hshots"])
-        sot = clamp_nonnegative(cur["hsot"] - old["hsot"])
-    else:
-        shots = clamp_nonnegative(cur["ashots"] - old["ashots"])
-        sot = clamp_nonnegative(cur["asot"] - old["asot"])
+    return TeamStats._make(values)
+
+def decode_stats_response(stats_response):
+    """(home TeamStats, away TeamStats) of None als de response niet bruikbaar is."""
+    if not stats_response or len(stats_response) != 2:
+        return None
+    return (
+        decode_team_stats(stats_response[0].get("statistics") or []),
+        decode_team_stats(stats_response[1].get("statistics") or []),
+    )
+
+# =========================================================
+# STATE STORE (SQLite, WAL)
+# =========================================================
+STATE_CONN = {"conn": None}
+STATE_WRITTEN = {}  # bucket -> {fid: json}, laatst weggeschreven versie (voor diffs)
+
+def _state_buckets():
+    return {
+        "alerted": {fid: 1 for fid in ALERTED_MATCHES},
+        "ht_snapshot": HALF_TIME_SNAPSHOT,
+        "score_state": SCORE_STATE,
+        "history": {fid: h.to_rows() for fid, h in HISTORY.items()},
+        "pending": PENDING,
+    }
+
+def open_state_store(path=None):
+    conn = sqlite3.connect(path or STATE_DB)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS state ("
+        "bucket TEXT NOT NULL, fid INTEGER NOT NULL, value TEXT NOT NULL, "
+        "PRIMARY KEY (bucket, fid))"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS report_agg ("
+        "day TEXT NOT NULL, tier TEXT NOT NULL, bucket TEXT NOT NULL, "
+        "risk INTEGER NOT NULL, post_goal INTEGER NOT NULL, late INTEGER NOT NULL, "
+        "alerts INTEGER NOT NULL DEFAULT 0, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (day, tier, bucket, risk, post_goal, late))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS alert_index ("
+        "fixture_id INTEGER NOT NULL, alert_ts TEXT NOT NULL, tier TEXT NOT NULL, minute INTEGER, "
+        "risk INTEGER NOT NULL, post_goal INTEGER NOT NULL, result TEXT, result_ts TEXT, "
+        "PRIMARY KEY (fixture_id, alert_ts))"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS alert_index_result_ts ON alert_index (result_ts)")
+    conn.commit()
+    STATE_CONN["conn"] = conn
+    return conn
+
+def load_state():
+    """Vult de state dicts vanuit de store; geeft de opgeslagen TODAY (of None)."""
+    conn = STATE_CONN["conn"]
+    STATE_WRITTEN.clear()
+    for bucket, fid, value in conn.execute("SELECT bucket, fid, value FROM state"):
+        STATE_WRITTEN.setdefault(bucket, {})[fid] = value
+        v = json.loads(value)
+        if bucket == "alerted":
+            ALERTED_MATCHES.add(fid)
+        elif bucket == "ht_snapshot":
+            HALF_TIME_SNAPSHOT[fid] = v
+        elif bucket == "score_state":
+            SCORE_STATE[fid] = {"score": tuple(v["score"]), "changed_at": v["changed_at"]}
+        elif bucket == "history":
+            HISTORY[fid] = PaceHistory.from_rows(v)
+        elif bucket == "pending":
+            v["score_at_alert"] = tuple(v["score_at_alert"])
+            PENDING[fid] = v
+
+    row = conn.execute("SELECT value FROM meta WHERE key = 'today'").fetchone()
+    return date.fromisoformat(row[0]) if row else None
+
+def save_state():
+    """Schrijft alleen wat sinds de vorige save veranderd is (1 transactie)."""
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return 0
+    changes = 0
+    with conn:
+        for bucket, data in _state_buckets().items():
+            written = STATE_WRITTEN.setdefault(bucket, {})
+            current = {fid: json.dumps(v, sort_keys=True) for fid, v in data.items()}
+            upserts = [(bucket, fid, js) for fid, js in current.items() if written.get(fid) != js]
+            deletes = [(bucket, fid) for fid in written if fid not in current]
+            if upserts:
+                conn.executemany("INSERT OR REPLACE INTO state (bucket, fid, value) VALUES (?, ?, ?)", upserts)
+            if deletes:
+                conn.executemany("DELETE FROM state WHERE bucket = ? AND fid = ?", deletes)
+            STATE_WRITTEN[bucket] = current
+            changes += len(upserts) + len(deletes)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('today', ?)", (TODAY.isoformat(),))
+    return changes
+
+def meta_get(key):
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return None
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def meta_set(key, value):
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+# =========================================================
+# RECORDER (voor replay.py)
+# =========================================================
+RECORDER = {"day": None, "fh": None}
+
+def record_cycle(ts, matches, stats_by_fid, odds_by_fid):
+    """Eén JSON regel per cycle: live payload + de stats/odds responses die deze cycle opgehaald zijn."""
+    if not RECORD_PAYLOADS:
+        return
+    day = date.today().isoformat()
+    if RECORDER["day"] != day:
+        if RECORDER["fh"]:
+            RECORDER["fh"].close()
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        RECORDER["fh"] = gzip.open(os.path.join(RECORD_DIR, f"{day}.jsonl.gz"), "at", encoding="utf-8")
+        RECORDER["day"] = day
+    line = {
+        "ts": ts,
+        "live": matches,
+        "stats": {str(fid): r for fid, r in stats_by_fid.items() if r},
+        "odds": {str(fid): r for fid, r in odds_by_fid.items() if r},
+    }
+    RECORDER["fh"].write(json.dumps(line, separators=(",", ":")) + "\n")
+    RECORDER["fh"].flush()  # sync flush: bestand blijft leesbaar na een crash
+
+# =========================================================
+# HISTORY / PACE
+# =========================================================
+HISTORY_MAX_ROWS = 80
+HISTORY_COLUMNS = ("minute", "hsot", "asot", "hshots", "ashots", "hcorn", "acorn")
 
-    return (shots, sot)
+# Pace van één team: laatste 10 min, laatste 5 min en de 5 min daarvoor
+PaceWindow = namedtuple("PaceWindow", "pace10_shots pace10_sot pace5_shots pace5_sot prev5_shots prev5_sot")
+NO_PACE = PaceWindow(0, 0, 0, 0, 0, 0)
+
+class PaceHistory:
+    """Cumulatieve stats per minuut in parallelle array('h') kolommen (oplopende minuut)."""
+    __slots__ = HISTORY_COLUMNS
+
+    def __init__(self):
+        for col in HISTORY_COLUMNS:
+            setattr(self, col, array("h"))
+
+    def __len__(self):
+        return len(self.minute)
+
+    def update(self, minute, hsot, asot, hshots, ashots, hcorn, acorn):
+        row = (minute, hsot, asot, hshots, ashots, hcorn, acorn)
+        if self.minute and self.minute[-1] == minute:
+            for col, v in zip(HISTORY_COLUMNS, row):
+                getattr(self, col)[-1] = v
+            return
+        for col, v in zip(HISTORY_COLUMNS, row):
+            getattr(self, col).append(v)
+        if len(self.minute) > HISTORY_MAX_ROWS:
+            for col in HISTORY_COLUMNS:
+                del getattr(self, col)[0]
+
+    def windows(self, cur_minute):
+        """{"HOME": PaceWindow, "AWAY": PaceWindow} in één keer (4 bisects voor beide kanten)."""
+        if not self.minute or cur_minute is None:
+            return {"HOME": NO_PACE, "AWAY": NO_PACE}
+        prev_minute = cur_minute - 5 if cur_minute >= 5 else cur_minute
+        minutes = self.minute
+        cur = bisect_right(minutes, cur_minute) - 1
+        old10 = bisect_right(minutes, max(0, cur_minute - 10)) - 1
+        old5 = bisect_right(minutes, max(0, cur_minute - 5)) - 1
+        prev = bisect_right(minutes, prev_minute) - 1
+        prev_old = bisect_right(minutes, max(0, prev_minute - 5)) - 1
+
+        out = {}
+        for side, shots, sot in (("HOME", self.hshots, self.hsot), ("AWAY", self.ashots, self.asot)):
+            p10 = p5 = (0, 0)
+            if cur >= 0 and old10 >= 0:
+                p10 = (clamp_nonnegative(shots[cur] - shots[old10]), clamp_nonnegative(sot[cur] - sot[old10]))
+            if cur >= 0 and old5 >= 0:
+                p5 = (clamp_nonnegative(shots[cur] - shots[old5]), clamp_nonnegative(sot[cur] - sot[old5]))
+            pr5 = (0, 0)
+            if prev >= 0 and prev_old >= 0:
+                pr5 = (clamp_nonnegative(shots[prev] - shots[prev_old]), clamp_nonnegative(sot[prev] - sot[prev_old]))
+            out[side] = PaceWindow(p10[0], p10[1], p5[0], p5[1], pr5[0], pr5[1])
+        return out
+
+    def to_rows(self):
+        return [list(getattr(self, col)) for col in HISTORY_COLUMNS]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Kolommen uit to_rows(), of de oude list-of-dicts vorm."""
+        h = cls()
+        if rows and isinstance(rows[0], dict):
+            for r in rows:
+                h.update(*(r[col] for col in HISTORY_COLUMNS))
+            return h
+        for col, values in zip(HISTORY_COLUMNS, rows):
+            getattr(h, col).extend(values)
+        return h
+
+# =========================================================
+# POLL SCHEDULER
+# =========================================================
+def schedule_poll(fid, due):
+    NEXT_DUE[fid] = due
+    heapq.heappush(POLL_QUEUE, (due, fid))
+
+def pop_due_polls(now):
+    """[(due, fid)] die nu aan de beurt zijn, meest achterstallig eerst."""
+    due = []
+    while POLL_QUEUE and POLL_QUEUE[0][0] <= now:
+        t, fid = heapq.heappop(POLL_QUEUE)
+        if NEXT_DUE.get(fid) == t:
+            due.append((t, fid))
+    return due
+
+def seconds_until_next_poll(now):
+    while POLL_QUEUE and NEXT_DUE.get(POLL_QUEUE[0][1]) != POLL_QUEUE[0][0]:
+        heapq.heappop(POLL_QUEUE)
+    if not POLL_QUEUE:
+        return None
+    return POLL_QUEUE[0][0] - now
+
+def poll_interval(fid):
+    r = RULES
+    gap, pace5_shots = POLL_HINTS.get(fid, (0.0, 0))
+    if pace5_shots >= r.HOT_PACE5_SHOTS or gap >= r.NORMAL_MIN_GAP - r.HOT_GAP_MARGIN:
+        return POLL_FAST_SECONDS
+    if gap < r.NORMAL_MIN_GAP / 2 and pace5_shots <= 1:
+        return POLL_SLOW_SECONDS
+    return POLL_NORMAL_SECONDS
+
+def next_tick_sleep(now, spare_calls=0):
+    """Slaap tot de eerstvolgende due fixture, binnen [POLL_FAST_SECONDS, LOOP_SLEEP_SECONDS].
+    Pending alerts (live payload = HIT/MISS) alleen sneller als deze cycle quota over hield voor die extra live call."""
+    wait = seconds_until_next_poll(now)
+    if SHARDS["next_due"] is not None:  # poll queues van de shard workers
+        shard_wait = SHARDS["next_due"] - now
+        wait = shard_wait if wait is None else min(wait, shard_wait)
+    if PENDING and spare_calls > 0:
+        wait = POLL_FAST_SECONDS if wait is None else min(wait, POLL_FAST_SECONDS)
+    if wait is None:
+        return LOOP_SLEEP_SECONDS
+    return max(POLL_FAST_SECONDS, min(LOOP_SLEEP_SECONDS, wait))
 
 # =========================================================
 # ODDS (1X2)
 # =========================================================
-def get_live_odds(fixture_id):
-    endpoints = [
-        ("/odds/live", {"fixture": fixture_id}),
-        ("/odds", {"fixture": fixture_id, "live": "all"}),
-        ("/odds", {"fixture": fixture_id}),
-    ]
-    for path, params in endpoints:
+ODDS_ENDPOINTS = (
+    ("/odds/live", lambda fid: {"fixture": fid}),
+    ("/odds", lambda fid: {"fixture": fid, "live": "all"}),
+    ("/odds", lambda fid: {"fixture": fid}),
+)
+ODDS_LOCK = threading.Lock()
+ODDS_CACHE = OrderedDict()  # fid -> (expires_at, response of None)
+ODDS_ENDPOINT = {}          # league_id -> index in ODDS_ENDPOINTS dat laatst antwoordde
+ODDS_STATS = {"calls": 0, "cache_hits": 0, "bulk": 0, "alerts": 0}
+ODDS_INDEX = {}             # fid -> (response, gedecodeerde 1X2) zodat een gecachte response 1x geïndexeerd wordt
+
+def odds_cache_get(fid, now):
+    """(True, response) bij een geldige cache entry, anders (False, None)."""
+    with ODDS_LOCK:
+        entry = ODDS_CACHE.get(fid)
+        if entry is None or entry[0] < now:
+            return False, None
+        ODDS_CACHE.move_to_end(fid)
+        return True, entry[1]
+
+def odds_cache_put(fid, response, now):
+    ttl = ODDS_TTL_SECONDS if response else ODDS_NEGATIVE_TTL_SECONDS
+    with ODDS_LOCK:
+        ODDS_CACHE[fid] = (now + ttl, response)
+        ODDS_CACHE.move_to_end(fid)
+        while len(ODDS_CACHE) > ODDS_CACHE_MAX:
+            old_fid, _ = ODDS_CACHE.popitem(last=False)
+            ODDS_INDEX.pop(old_fid, None)
+
+def _odds_call(path, params):
+    with ODDS_LOCK:
+        ODDS_STATS["calls"] += 1
+    return api_get(path, params=params).get("response", [])
+
+def get_live_odds(fixture_id, league_id=None, allowance=None):
+    """Geeft (response of None, aantal API calls). allowance: {"left": n}, gedeeld door parallelle lookups;
+    op = stoppen, ook als er nog endpoints over zijn."""
+    # endpoint dat voor deze league laatst werkte eerst
+    first = ODDS_ENDPOINT.get(league_id, 0)
+    order = [first] + [i for i in range(len(ODDS_ENDPOINTS)) if i != first]
+    resp, calls, errors = None, 0, 0
+    for i in order:
+        if allowance is not None:
+            with ODDS_LOCK:
+                if allowance["left"] <= 0:
+                    break
+                allowance["left"] -= 1
+        path, params = ODDS_ENDPOINTS[i]
+        calls += 1
         try:
-            data = api_get(path, params=params)
-            resp = data.get("response", [])
-            if resp:
-                return resp
-        except:
+            resp = _odds_call(path, params(fixture_id))
+        except ApiBudgetExceeded:
+            raise
+        except Exception:
+            inc("odds_lookups_total", endpoint=path, outcome="error")
+            errors += 1
             continue
+        inc("odds_lookups_total", endpoint=path, outcome="hit" if resp else "empty")
+        if resp:
+            if league_id is not None:
+                ODDS_ENDPOINT[league_id] = i
+            break
+    # "geen odds" alleen cachen als elk endpoint echt leeg antwoordde (geen timeout/5xx/open circuit, niet afgekapt)
+    if resp or (calls == len(order) and not errors):
+        odds_cache_put(fixture_id, resp or None, time.time())
+    return resp or None, calls
+
+def prefetch_live_odds():
+    """1 call /odds/live (alle live fixtures) → cache; geeft het aantal gevulde fixtures."""
+    with ODDS_LOCK:
+        ODDS_STATS["bulk"] += 1
+    try:
+        items = _odds_call("/odds/live", None)
+    except ApiBudgetExceeded:
+        raise
+    except Exception:
+        return 0
+    by_fid = {}
+    for item in items:
+        fid = (item.get("fixture") or {}).get("id")
+        if fid:
+            by_fid.setdefault(fid, []).append(item)
+        league_id = (item.get("league") or {}).get("id")
+        if league_id is not None:
+            ODDS_ENDPOINT[league_id] = 0  # /odds/live dekt deze league
+    now = time.time()
+    for fid, resp in by_fid.items():
+        odds_cache_put(fid, resp, now)
+    return len(by_fid)
+
+def fetch_odds(candidates, max_calls):
+    """Odds voor kandidaten: cache eerst, bij genoeg misses 1 bulk call, daarna per fixture.
+    Geeft (fid -> response, aantal API calls gebudgetteerd)."""
+    now = time.time()
+    out, missing = {}, []
+    for c in candidates:
+        found, resp = odds_cache_get(c["fid"], now)
+        if found:
+            out[c["fid"]] = resp
+            with ODDS_LOCK:
+                ODDS_STATS["cache_hits"] += 1
+        else:
+            missing.append(c)
+
+    calls = 0
+    if len(missing) >= ODDS_BULK_MIN and max_calls > 0:
+        prefetch_live_odds()
+        calls += 1
+        still = []
+        for c in missing:
+            found, resp = odds_cache_get(c["fid"], now)
+            if found:
+                out[c["fid"]] = resp
+            else:
+                still.append(c)
+        missing = still
+
+    # per fixture tot 3 endpoints: alle lookups delen wat er van max_calls over is
+    allowance = {"left": max(0, max_calls - calls)}
+    leagues = {c["fid"]: c.get("league_id") for c in missing[:allowance["left"]]}
+    for fid, res in fetch_concurrent(lambda fid: get_live_odds(fid, leagues[fid], allowance), list(leagues)).items():
+        resp, n = res or (None, 0)
+        out[fid] = resp
+        calls += n
+    return out, calls
+
+def odds_stats():
+    with ODDS_LOCK:
+        s = dict(ODDS_STATS)
+    s["per_alert"] = round(s["calls"] / s["alerts"], 1) if s["alerts"] else None
+    return s
+
+# 1X2 markten: /odds "Match Winner" (id 1), /odds/live "Fulltime Result" (id 59); namen alleen als fallback
+ODDS_1X2_MARKET_IDS = frozenset((1, 59))
+ODDS_1X2_MARKET_NAMES = frozenset(("match winner", "1x2", "full time result", "fulltime result"))
+SidePrices = namedtuple("SidePrices", "first best median n")
+
+def _odds_side(value, home_l, away_l):
+    v = (value or "").strip().lower()
+    if v in ("home", "1") or v == home_l:
+        return "HOME"
+    if v in ("away", "2") or v == away_l:
+        return "AWAY"
+    if v in ("draw", "x"):
+        return "DRAW"
     return None
 
-def find_1x2_odd(odds_response, pick_side, home_name, away_name):
+def index_odds(odds_response, home_name, away_name):
+    """Eén pass: 1X2 market id -> side -> [prijs per bookmaker, in volgorde van de response]."""
+    markets = {}
+    home_l, away_l = home_name.lower(), away_name.lower()
+    for item in odds_response or ():
+        # /odds: bookmakers[].bets[]; /odds/live: odds[] direct op het item
+        for book in item.get("bookmakers") or ({"bets": item.get("odds") or ()},):
+            for bet in book.get("bets") or ():
+                market = bet.get("id")
+                if market not in ODDS_1X2_MARKET_IDS:
+                    name = (bet.get("name") or "").strip().lower()
+                    if name not in ODDS_1X2_MARKET_NAMES:
+                        continue
+                    market = market if market is not None else name
+                sides = markets.setdefault(market, {})
+                for v in bet.get("values") or ():
+                    if v.get("suspended"):
+                        continue
+                    side = _odds_side(v.get("value"), home_l, away_l)
+                    odd = safe_float(v.get("odd"))
+                    if side and odd and odd > 1.0:
+                        sides.setdefault(side, []).append(odd)
+    return markets
+
+def decode_1x2(odds_response, home_name, away_name):
+    """side -> SidePrices(first, best, median, n) over alle 1X2 markten/bookmakers."""
+    prices = {}
+    for sides in index_odds(odds_response, home_name, away_name).values():
+        for side, odds in sides.items():
+            prices.setdefault(side, []).extend(odds)
+    return {
+        side: SidePrices(odds[0], max(odds), round(median(odds), 2), len(odds))
+        for side, odds in prices.items()
+    }
+
+def decoded_odds(fid, odds_response, home_name, away_name):
+    """decode_1x2 met memo per fixture zolang de (gecachte) response dezelfde is."""
+    memo = ODDS_INDEX.get(fid)
+    if memo is not None and memo[0] is odds_response:
+        return memo[1]
+    decoded = decode_1x2(odds_response, home_name, away_name)
+    ODDS_INDEX[fid] = (odds_response, decoded)
+    return decoded
+
+def find_1x2_odd(odds_response, pick_side, home_name, away_name, price=None, decoded=None):
     if not odds_response:
         return None
-
-    market_keywords = ["match winner", "1x2", "full time result", "winner"]
-    want = "1" if pick_side == "HOME" else "2"
-
-    for item in odds_response:
-        bookmakers = item.get("bookmakers", [])
-        for book in bookmakers:
-            bets = book.get("bets", [])
-            for bet in bets:
-                bet_name = (bet.get("name") or "").lower()
-                if not any(k in bet_name for k in market_keywords):
-                    continue
-
-                values = bet.get("values", [])
-                for v in values:
-                    v_value = (v.get("value") or "").strip().lower()
-                    if v_value == want or (want == "1" and v_value in ["home", home_name.lower()]) or (want == "2" and v_value in ["away", away_name.lower()]):
-                        return safe_float(v.get("odd"))
-    return None
+    if decoded is None:
+        decoded = decode_1x2(odds_response, home_name, away_name)
+    prices = decoded.get(pick_side)
+    return getattr(prices, price or RULES.ODDS_PRICE) if prices else None
 
 # =========================================================
 # CONFIDENCE (pace-leidend)
@@ -332,57 +1619,306 @@ def ensure_csv_header(file_path, header_cols):
         with open(file_path, "w", newline="", encoding="utf-8") as f:
             csv.writer(f).writerow(header_cols)
 
+ALERTS_HEADER = [
+    "timestamp", "tier", "fixture_id", "league", "home", "away",
+    "minute", "score", "pick", "dominant_score", "gap", "confidence", "odd_1x2",
+    "pace10_shots", "pace10_sot", "pace5_shots", "pace5_sot",
+    "sot_half", "shots_half", "opp_sot_half", "opp_shots_half",
+    "is_risk_31_39", "post_goal_strict", "rules_version"
+]
+RESULTS_HEADER = [
+    "timestamp", "fixture_id", "tier", "home", "away", "pick", "result",
+    "minute_resolved", "score_at_alert", "score_resolved"
+]
+FEATURES_HEADER = [
+    "timestamp", "fixture_id", "minute", "status", "score_home", "score_away",
+    "hsot", "asot", "hshots", "ashots", "hcorn", "acorn", "hpos", "apos", "hred", "ared",
+    "gap", "pace5_shots", "candidate"
+]
+
+# base path -> {"day", "path", "fh", "writer", "dirty"}; 1 open handle per log
+LOG_WRITERS = {}
+LOG_SYNC = {"at": 0.0}
+
+def log_path_for(base, day):
+    if not LOG_ROTATE_DAILY:
+        return base
+    root, ext = os.path.splitext(base)
+    return f"{root}_{day}{ext}"
+
+def log_paths(base, since_day=None):
+    """Alle bestanden van een log (oude ongeroteerde file eerst, dan per dag), optioneel vanaf since_day."""
+    root, ext = os.path.splitext(base)
+    paths = [base] if os.path.exists(base) else []
+    for path in sorted(glob.glob(f"{glob.escape(root)}_????-??-??{ext}")):
+        day = path[len(root) + 1:len(root) + 11]
+        if since_day is None or day >= since_day:
+            paths.append(path)
+    return paths
+
+def _upgrade_log_header(path, header):
+    """Log van vandaag met een oudere (kortere) header: nieuwe kolommen achteraan, oude rijen aangevuld."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    old = rows[0] if rows else header
+    if old == header or header[:len(old)] != old:
+        return
+    pad = [""] * (len(header) - len(old))
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(row + pad for row in rows[1:])
+    os.replace(tmp, path)
+
+def _log_writer(base, header):
+    day = date.today().isoformat()
+    w = LOG_WRITERS.get(base)
+    if w and w["day"] == day:
+        return w
+    if w:
+        _close_log(w)
+    path = log_path_for(base, day)
+    if os.path.exists(path):
+        _upgrade_log_header(path, header)
+    fh = open(path, "a", newline="", encoding="utf-8")
+    w = LOG_WRITERS[base] = {"day": day, "path": path, "fh": fh, "writer": csv.writer(fh), "dirty": False}
+    if fh.tell() == 0:
+        w["writer"].writerow(header)
+    return w
+
+def _close_log(w):
+    w["fh"].flush()
+    os.fsync(w["fh"].fileno())
+    w["fh"].close()
+
+def write_log_row(base, header, row):
+    w = _log_writer(base, header)
+    w["writer"].writerow(row)
+    w["dirty"] = True
+    inc("log_rows_total", log=base)
+
+def flush_logs(force_sync=False):
+    """Einde cycle: buffers naar de OS; fsync volgens LOG_FSYNC_SECONDS (of force_sync)."""
+    sync = force_sync or time.time() - LOG_SYNC["at"] >= LOG_FSYNC_SECONDS
+    for w in LOG_WRITERS.values():
+        if not w["dirty"]:
+            continue
+        w["fh"].flush()
+        if sync:
+            os.fsync(w["fh"].fileno())
+            w["dirty"] = False
+    if sync:
+        LOG_SYNC["at"] = time.time()
+
+def close_logs():
+    for w in LOG_WRITERS.values():
+        _close_log(w)
+    LOG_WRITERS.clear()
+
 def log_alert_row(row):
-    ensure_csv_header(ALERTS_LOG, [
-        "timestamp", "tier", "fixture_id", "league", "home", "away",
-        "minute", "score", "pick", "dominant_score", "gap", "confidence", "odd_1x2",
-        "pace10_shots", "pace10_sot", "pace5_shots", "pace5_sot",
-        "sot_half", "shots_half", "opp_sot_half", "opp_shots_half",
-        "is_risk_31_39", "post_goal_strict"
-    ])
-    with open(ALERTS_LOG, "a", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow(row)
+    write_log_row(ALERTS_LOG, ALERTS_HEADER, row)
 
 def log_result_row(row):
-    ensure_csv_header(RESULTS_LOG, [
-        "timestamp", "fixture_id", "tier", "home", "away", "pick", "result",
-        "minute_resolved", "score_at_alert", "score_resolved"
-    ])
-    with open(RESULTS_LOG, "a", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow(row)
+    write_log_row(RESULTS_LOG, RESULTS_HEADER, row)
+
+def log_feature_row(ctx, home_stats, away_stats, hint, is_candidate):
+    if not LOG_FEATURES:
+        return
+    gap, pace5_shots = hint
+    row = [
+        datetime.now().isoformat(timespec="seconds"), ctx["fid"], ctx["minute"], ctx["status_short"],
+        ctx["gh"], ctx["ga"],
+        home_stats.sot, away_stats.sot, home_stats.shots, away_stats.shots,
+        home_stats.corners, away_stats.corners, home_stats.possession, away_stats.possession,
+        home_stats.red_cards, away_stats.red_cards,
+        round(gap, 2), pace5_shots, int(is_candidate),
+    ]
+    if WORKER_OUTBOX is not None:
+        WORKER_OUTBOX["features"].append(row)  # 1 schrijver per CSV: de coordinator
+        return
+    write_log_row(FEATURES_LOG, FEATURES_HEADER, row)
 
 # =========================================================
-# DAILY REPORT (zonder leagues)
+# REPORT AGGREGATES (lopende tellers i.p.v. hele CSV's herlezen)
 # =========================================================
-def send_daily_report(report_date):
-    day_str = report_date.isoformat()
+# per (dag, tier, minuut bucket, risk, post-goal, late): alerts op de alert dag,
+# hits/misses op de result dag (met de vlaggen van de alert)
+MINUTE_BUCKETS = (
+    (25, "15-25"), (30, "26-30"), (39, "31-39 (risk)"), (45, "40-45"),
+    (60, "46-60"), (75, "61-75"), (None, "76-85"),
+)
+UNKNOWN_BUCKET = "NA"
+
+def minute_bucket(minute):
+    if minute is None:
+        return UNKNOWN_BUCKET
+    for upper, name in MINUTE_BUCKETS:
+        if upper is None or minute <= upper:
+            return name
+
+def _agg_key(day, tier, minute, is_risk, post_goal):
+    late = minute is not None and minute >= LATE_MINUTE
+    return (day, tier, minute_bucket(minute), int(bool(is_risk)), int(bool(post_goal)), int(late))
+
+def _agg_write(conn, counts):
+    """counts: {key: [alerts, hits, misses]} → optellen bij wat er al staat."""
+    conn.executemany(
+        "INSERT INTO report_agg (day, tier, bucket, risk, post_goal, late, alerts, hits, misses) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (day, tier, bucket, risk, post_goal, late) DO UPDATE SET "
+        "alerts = alerts + excluded.alerts, hits = hits + excluded.hits, misses = misses + excluded.misses",
+        [(*key, *c) for key, c in counts.items()],
+    )
 
-    normal_count = premium_count = extreme_count = 0
-    total_alerts = 0
-    try:
-        with open(ALERTS_LOG, "r", encoding="utf-8") as f:
-            rows = list(csv.DictReader(f))
-        day_rows = [r for r in rows if r["timestamp"].startswith(day_str)]
-        normal_count = sum(1 for r in day_rows if r["tier"] == "NORMAL")
-        premium_count = sum(1 for r in day_rows if r["tier"] == "PREMIUM")
-        extreme_count = sum(1 for r in day_rows if r["tier"] == "EXTREME")
-        total_alerts = len(day_rows)
-    except FileNotFoundError:
-        pass
+def agg_add(day, tier, minute, is_risk, post_goal, alerts=0, hits=0, misses=0):
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return
+    with conn:
+        _agg_write(conn, {_agg_key(day, tier, minute, is_risk, post_goal): [alerts, hits, misses]})
 
-    hits = misses = 0
-    total_results = 0
+def agg_rows(since_day, until_day):
+    """Opgetelde tellers over [since_day, until_day] (iso datums), per tier/bucket/vlaggen."""
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return []
+    return conn.execute(
+        "SELECT tier, bucket, risk, post_goal, late, SUM(alerts), SUM(hits), SUM(misses) "
+        "FROM report_agg WHERE day BETWEEN ? AND ? "
+        "GROUP BY tier, bucket, risk, post_goal, late",
+        (since_day, until_day),
+    ).fetchall()
+
+def agg_is_empty():
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return True
+    return (conn.execute("SELECT 1 FROM report_agg LIMIT 1").fetchone() is None
+            or conn.execute("SELECT 1 FROM alert_index LIMIT 1").fetchone() is None)
+
+# ---- alert -> result index: 1 rij per alert, key (fixture_id, alert_ts) ----
+def _index_add_alert(conn, fid, alert_ts, tier, minute, is_risk, post_goal):
+    conn.execute(
+        "INSERT OR IGNORE INTO alert_index (fixture_id, alert_ts, tier, minute, risk, post_goal) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (fid, alert_ts, tier, minute, int(bool(is_risk)), int(bool(post_goal))),
+    )
+
+def _index_resolve(conn, fid, alert_ts, result, result_ts):
+    """Zet het result op de alert; zonder alert_ts (oude pending/CSV) de laatste open alert vóór result_ts.
+    Geeft (tier, minute, risk, post_goal) van die alert of None."""
+    if alert_ts is None:
+        row = conn.execute(
+            "SELECT alert_ts FROM alert_index WHERE fixture_id = ? AND alert_ts <= ? AND result IS NULL "
+            "ORDER BY alert_ts DESC LIMIT 1",
+            (fid, result_ts),
+        ).fetchone()
+        if row is None:
+            return None
+        alert_ts = row[0]
+    conn.execute(
+        "UPDATE alert_index SET result = ?, result_ts = ? WHERE fixture_id = ? AND alert_ts = ?",
+        (result, result_ts, fid, alert_ts),
+    )
+    return conn.execute(
+        "SELECT tier, minute, risk, post_goal FROM alert_index WHERE fixture_id = ? AND alert_ts = ?",
+        (fid, alert_ts),
+    ).fetchone()
+
+def index_add_alert(fid, alert_ts, tier, minute, is_risk, post_goal):
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return
+    with conn:
+        _index_add_alert(conn, fid, alert_ts, tier, minute, is_risk, post_goal)
+
+def index_resolve(fid, alert_ts, result, result_ts):
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return None
+    with conn:
+        return _index_resolve(conn, fid, alert_ts, result, result_ts)
+
+def index_resolved_rows(since_day, until_day):
+    """(tier, minute, risk, post_goal, result, aantal) voor results met result dag in [since_day, until_day]."""
+    conn = STATE_CONN["conn"]
+    if conn is None:
+        return []
+    until_next = (date.fromisoformat(until_day) + timedelta(days=1)).isoformat()
+    return conn.execute(
+        "SELECT tier, minute, risk, post_goal, result, COUNT(*) FROM alert_index "
+        "WHERE result_ts >= ? AND result_ts < ? GROUP BY tier, minute, risk, post_goal, result",
+        (since_day, until_next),
+    ).fetchall()
+
+def _iter_csv(path):
     try:
-        with open(RESULTS_LOG, "r", encoding="utf-8") as f:
-            rrows = list(csv.DictReader(f))
-        day_rrows = [r for r in rrows if r["timestamp"].startswith(day_str)]
-        hits = sum(1 for r in day_rrows if r["result"] == "HIT")
-        misses = sum(1 for r in day_rrows if r["result"] == "MISS")
-        total_results = len(day_rrows)
+        with open(path, "r", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
     except FileNotFoundError:
-        pass
+        return
+
+def _iter_log(base):
+    for path in log_paths(base):
+        yield from _iter_csv(path)
+
+def backfill_report_aggregates(alerts_file=None, results_file=None):
+    """Eenmalig: bouwt report_agg en alert_index opnieuw op uit de CSV logs. Geeft (alerts, results).
+
+    Elk result hoort bij de laatste nog open alert van die fixture ervóór (niet: de laatste alert ooit).
+    """
+    conn = STATE_CONN["conn"]
+    counts = {}
+    n_alerts = n_results = 0
+
+    flush_logs()
+    with conn:
+        conn.execute("DELETE FROM report_agg")
+        conn.execute("DELETE FROM alert_index")
+
+        for a in _iter_log(alerts_file or ALERTS_LOG):
+            ts = a.get("timestamp") or ""
+            fid = safe_int(a.get("fixture_id"))
+            flags = (a.get("tier", "NA"), safe_int(a.get("minute")), a.get("is_risk_31_39") == "1", a.get("post_goal_strict") == "1")
+            _index_add_alert(conn, fid, ts, *flags)
+            counts.setdefault(_agg_key(ts[:10], *flags), [0, 0, 0])[0] += 1
+            n_alerts += 1
+
+        for r in _iter_log(results_file or RESULTS_LOG):
+            result = r.get("result")
+            if result not in ("HIT", "MISS"):
+                continue
+            ts = r.get("timestamp") or ""
+            flags = _index_resolve(conn, safe_int(r.get("fixture_id")), None, result, ts)
+            tier, minute, is_risk, post_goal = flags or (r.get("tier", "NA"), None, False, False)
+            c = counts.setdefault(_agg_key(ts[:10], r.get("tier") or tier, minute, is_risk, post_goal), [0, 0, 0])
+            c[1 if result == "HIT" else 2] += 1
+            n_results += 1
+
+        _agg_write(conn, counts)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('alert_index_built', ?)",
+                     (datetime.now().isoformat(timespec="seconds"),))
+    return n_alerts, n_results
+
+# =========================================================
+# DAILY REPORT (zonder leagues)
+# =========================================================
+def send_daily_report(report_date):
+    day_str = report_date.isoformat()
+
+    tier_counts = {"NORMAL": 0, "PREMIUM": 0, "EXTREME": 0}
+    total_alerts = hits = misses = 0
+    for tier, _, _, _, _, n_alerts, n_hits, n_misses in agg_rows(day_str, day_str):
+        tier_counts[tier] = tier_counts.get(tier, 0) + n_alerts
+        total_alerts += n_alerts
+        hits += n_hits
+        misses += n_misses
+    normal_count, premium_count, extreme_count = tier_counts["NORMAL"], tier_counts["PREMIUM"], tier_counts["EXTREME"]
+    total_results = hits + misses
 
     hitrate = round((hits / total_results) * 100, 1) if total_results else 0.0
+    odds = odds_stats()
 
     send_message(
         f"📊 DAGRAPPORT ({day_str})\n\n"
@@ -395,47 +1931,52 @@ def send_daily_report(report_date):
         f"🔥 EXTREME: {extreme_count}\n\n"
         f"🤖 Optimalisatie tips:\n"
         f"• Minder strenge 1e helft + milde risk window + pace iets lager ✅\n"
-        f"• 6 min goal cooldown + milde post-goal strict ✅"
+        f"• 6 min goal cooldown + milde post-goal strict ✅\n\n"
+        f"🧹 Pre-filter (stats calls bespaard): {prefilter_summary()}\n"
+        f"💰 Odds calls: {odds['calls']} (bulk {odds['bulk']}, cache hits {odds['cache_hits']}) | "
+        f"per alert: {odds['per_alert'] if odds['per_alert'] is not None else '—'}\n\n"
+        f"📈 Performance:\n{metrics_summary(METRICS_DAY['base'])}"
     )
 
 # =========================================================
 # WEEKLY REPORT (in dezelfde file → geen module error)
 # =========================================================
-def _read_csv_rows(path):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return list(csv.DictReader(f))
-    except FileNotFoundError:
-        return []
+def weekly_aggregates(days=7):
+    """Resolved tellers van de laatste X dagen, direct uit alert_index (geen join, geen CSV scan)."""
+    until = date.today()
+    since = until - timedelta(days=days - 1)  # X kalenderdagen incl. vandaag
+    out = {"total": 0, "hits": 0, "misses": 0, "tiers": {}, "buckets": {},
+           "risk": [0, 0], "post_goal": [0, 0], "late": [0, 0]}  # [resolved, hits]
+    for tier, minute, risk, post_goal, result, n in index_resolved_rows(since.isoformat(), until.isoformat()):
+        n_hits = n if result == "HIT" else 0
+        out["total"] += n
+        out["hits"] += n_hits
+        out["misses"] += n - n_hits
+        late = minute is not None and minute >= LATE_MINUTE
+        for group, key in (("tiers", tier), ("buckets", minute_bucket(minute))):
+            c = out[group].setdefault(key, [0, 0])
+            c[0] += n
+            c[1] += n_hits
+        for flag, on in (("risk", risk), ("post_goal", post_goal), ("late", late)):
+            if on:
+                out[flag][0] += n
+                out[flag][1] += n_hits
+    return out
 
 def build_weekly_report(days=7):
-    since = datetime.now() - timedelta(days=days)
-    alerts = _read_csv_rows(ALERTS_LOG)
-    results = _read_csv_rows(RESULTS_LOG)
+    agg = weekly_aggregates(days)
 
-    # filter resolved results laatste X dagen
-    results_recent = []
-    for r in results:
-        try:
-            ts = datetime.fromisoformat(r["timestamp"])
-            if ts >= since:
-                results_recent.append(r)
-        except:
-            continue
-
-    if not results_recent:
+    if not agg["total"]:
         return ("📊 WEEKRAPPORT\nGeen (resolved) data in de laatste 7 dagen.", None)
 
-    total = len(results_recent)
-    hits = sum(1 for r in results_recent if r.get("result") == "HIT")
-    misses = sum(1 for r in results_recent if r.get("result") == "MISS")
+    total = agg["total"]
+    hits = agg["hits"]
+    misses = agg["misses"]
     hitrate = round((hits / total) * 100, 1) if total else 0.0
 
     # tier stats (op results)
     def tier_counts(tier):
-        rows = [r for r in results_recent if r.get("tier") == tier]
-        t = len(rows)
-        h = sum(1 for r in rows if r.get("result") == "HIT")
+        t, h = agg["tiers"].get(tier, (0, 0))
         hr = round((h / t) * 100, 1) if t else 0.0
         return t, hr
 
@@ -443,46 +1984,10 @@ def build_weekly_report(days=7):
     p_cnt, p_hr = tier_counts("PREMIUM")
     e_cnt, e_hr = tier_counts("EXTREME")
 
-    # risk window + post-goal strict analyse (op alerts, gekoppeld via fixture_id)
-    alerts_map = {}
-    for a in alerts:
-        fid = a.get("fixture_id")
-        if fid:
-            alerts_map[fid] = a
-
-    risk_cnt = risk_hit = 0
-    pg_cnt = pg_hit = 0
-    late_cnt = late_hit = 0
-
-    for r in results_recent:
-        fid = r.get("fixture_id")
-        a = alerts_map.get(fid)
-        if not a:
-            continue
-
-        try:
-            minute_alert = int(float(a.get("minute", "0")))
-        except:
-            minute_alert = 0
-
-        is_risk = (a.get("is_risk_31_39") == "1")
-        is_pg = (a.get("post_goal_strict") == "1")
-        is_late = (minute_alert >= LATE_MINUTE)
-
-        if is_risk:
-            risk_cnt += 1
-            if r.get("result") == "HIT":
-                risk_hit += 1
-
-        if is_pg:
-            pg_cnt += 1
-            if r.get("result") == "HIT":
-                pg_hit += 1
-
-        if is_late:
-            late_cnt += 1
-            if r.get("result") == "HIT":
-                late_hit += 1
+    # risk window + post-goal strict + late (vlaggen van de alert, meegeteld bij het result)
+    risk_cnt, risk_hit = agg["risk"]
+    pg_cnt, pg_hit = agg["post_goal"]
+    late_cnt, late_hit = agg["late"]
 
     def pct(h, t):
         return round((h / t) * 100, 1) if t else 0.0
@@ -548,21 +2053,99 @@ def maybe_send_weekly_report():
     if not (11 <= now.hour <= 12):  # venster 11:00-12:59 om 1x te pakken
         return
 
-    # voorkom dubbel sturen: check of er vandaag al een weekly_summary row is
+    # voorkom dubbel sturen (meta i.p.v. weekly_summary.csv herlezen)
     today_str = now.date().isoformat()
-    rows = _read_csv_rows(WEEKLY_SUMMARY_LOG)
-    if any(r.get("week_ending") == today_str for r in rows):
+    sent = meta_get("weekly_sent")
+    if sent == today_str:
+        return
+    if sent is None and any(r.get("week_ending") == today_str for r in _iter_csv(WEEKLY_SUMMARY_LOG)):
         return
 
     text, row = build_weekly_report(days=7)
     send_message(text)
     if row:
         log_weekly_summary(row)
+    meta_set("weekly_sent", today_str)
 
 # =========================================================
 # HIT/MISS TRACKING
 # =========================================================
-def resolve_pending_from_match(match):
+def next_goal_result(pick_side, score_at_alert, gh, ga):
+    """HIT/MISS zodra er sinds de alert gescoord is, anders None."""
+    old_gh, old_ga = score_at_alert
+    goal_home = gh > old_gh
+    goal_away = ga > old_ga
+    if not (goal_home or goal_away):
+        return None
+    scorer = "HOME" if goal_home and not goal_away else "AWAY" if goal_away and not goal_home else ("HOME" if goal_home else "AWAY")
+    return "HIT" if scorer == pick_side else "MISS"
+
+def record_result(fid, p, result, minute, score_resolved):
+    """Result loggen + alert_index en report_agg bijwerken (zelfde timestamp overal)."""
+    old_gh, old_ga = p["score_at_alert"]
+    result_ts = datetime.now().isoformat(timespec="seconds")
+    log_result_row([
+        result_ts, fid, p["tier"], p["home"], p["away"], p["pick_team"],
+        result, minute, f"{old_gh}-{old_ga}", score_resolved
+    ])
+    # pending van vóór de index kent alert_ts niet → laatste open alert van de fixture
+    flags = index_resolve(fid, p.get("alert_ts"), result, result_ts)
+    tier, minute_alert, is_risk, post_goal = flags or (p["tier"], p.get("minute"), p.get("is_risk"), p.get("post_goal_strict"))
+    agg_add(result_ts[:10], tier, minute_alert, is_risk, post_goal,
+            hits=int(result == "HIT"), misses=int(result == "MISS"))
+
+def _event_side(ev, p):
+    team = ev.get("team") or {}
+    if team.get("id") is not None and team.get("id") in (p.get("home_id"), p.get("away_id")):
+        return "HOME" if team["id"] == p.get("home_id") else "AWAY"
+    name = team.get("name")
+    return "HOME" if name == p["home"] else "AWAY" if name == p["away"] else None
+
+def track_goal_events(fid, events, p):
+    """Verwerkt alleen events na de cursor van deze fixture; geeft alle goals tot nu toe [(side, (elapsed, extra))]."""
+    cur = EVENTS_CURSOR.get(fid)
+    if cur is None or len(events) < cur["n"]:  # lijst gekrompen (VAR correctie) → opnieuw vanaf 0
+        cur = EVENTS_CURSOR[fid] = {"n": 0, "goals": []}
+    for ev in events[cur["n"]:]:
+        kind = (ev.get("type") or "").lower()
+        detail = (ev.get("detail") or "").lower()
+        side = _event_side(ev, p)
+        if kind == "goal" and detail != "missed penalty":
+            if detail == "own goal" and EVENTS_OWN_GOAL_FOR_OPPONENT and side:
+                side = "AWAY" if side == "HOME" else "HOME"
+            t = ev.get("time") or {}
+            cur["goals"].append((side, (t.get("elapsed") or 0, t.get("extra") or 0)))
+        elif kind == "var" and "goal" in detail and ("cancelled" in detail or "disallowed" in detail):
+            for i in range(len(cur["goals"]) - 1, -1, -1):
+                if cur["goals"][i][0] == side:
+                    del cur["goals"][i]
+                    break
+    cur["n"] = len(events)
+    return cur["goals"]
+
+def _goal_counts(goals):
+    return sum(1 for side, _ in goals if side == "HOME"), sum(1 for side, _ in goals if side == "AWAY")
+
+def event_minute_text(minute):
+    elapsed, extra = minute
+    return f"{elapsed}+{extra}" if extra else str(elapsed)
+
+def goal_after_alert(fid, p, events, gh, ga):
+    """(side, (elapsed, extra)) van de eerste goal na de alert, of None als de events (nog) niet kloppen met de stand."""
+    if not events:
+        return None
+    goals = track_goal_events(fid, events, p)
+    if _goal_counts(goals) != (gh, ga):
+        # event aangepast of eerder ingevoegd (lijst niet gekrompen) → cursor kan stale zijn: 1x alles opnieuw
+        EVENTS_CURSOR.pop(fid, None)
+        goals = track_goal_events(fid, events, p)
+        if _goal_counts(goals) != (gh, ga):
+            return None  # events lopen (nog) achter op de stand
+    i = sum(p["score_at_alert"])  # goals vóór de alert staan ook in de lijst
+    return goals[i] if i < len(goals) else None
+
+def resolve_pending_from_match(match, events=None):
+    """events: /fixtures/events response (of "events" uit een /fixtures?ids= item) → exacte volgorde + minuut."""
     fixture = match.get("fixture", {})
     fid = fixture.get("id")
     if not fid or fid not in PENDING:
@@ -577,28 +2160,32 @@ def resolve_pending_from_match(match):
     p = PENDING[fid]
     old_gh, old_ga = p["score_at_alert"]
 
-    goal_home = gh > old_gh
-    goal_away = ga > old_ga
-
-    if goal_home or goal_away:
-        scorer = "HOME" if goal_home and not goal_away else "AWAY" if goal_away and not goal_home else ("HOME" if goal_home else "AWAY")
-        result = "HIT" if scorer == p["pick_side"] else "MISS"
-
+    result = next_goal_result(p["pick_side"], p["score_at_alert"], gh, ga)
+    if result:
+        minute_text = str(minute)
+        goal = goal_after_alert(fid, p, events if events is not None else match.get("events"), gh, ga)
+        if goal:
+            scorer, (minute, extra) = goal
+            minute_text = event_minute_text((minute, extra))  # 45+2' i.p.v. 47'
+            result = "HIT" if scorer == p["pick_side"] else "MISS"
+        elif gh > old_gh and ga > old_ga and status_short not in FINISHED_STATUSES \
+                and p.get("events_wait", 0) < EVENTS_MAX_WAIT_CYCLES:
+            # allebei gescoord: volgorde alleen uit de events te halen → volgende cycle nog eens
+            p["events_wait"] = p.get("events_wait", 0) + 1
+            return
         send_message(
             f"📌 RESULT ({p['tier']})\n\n"
             f"{p['home']} vs {p['away']}\n"
             f"Pick: {p['pick_team']}\n\n"
-            f"{'✅ HIT' if result == 'HIT' else '❌ MISS'} — goal gevallen rond {minute}'\n"
-            f"Score: {old_gh}-{old_ga} ➜ {gh}-{ga}"
+            f"{'✅ HIT' if result == 'HIT' else '❌ MISS'} — goal gevallen {'in' if goal else 'rond'} {minute_text}'\n"
+            f"Score: {old_gh}-{old_ga} ➜ {gh}-{ga}",
+            kind="result",
         )
 
-        log_result_row([
-            datetime.now().isoformat(timespec="seconds"),
-            fid, p["tier"], p["home"], p["away"], p["pick_team"],
-            result, minute, f"{old_gh}-{old_ga}", f"{gh}-{ga}"
-        ])
+        record_result(fid, p, result, minute, f"{gh}-{ga}")
 
         PENDING.pop(fid, None)
+        EVENTS_CURSOR.pop(fid, None)
         return
 
     if status_short in ("FT", "AET", "PEN"):
@@ -607,408 +2194,1129 @@ def resolve_pending_from_match(match):
             f"{p['home']} vs {p['away']}\n"
             f"Pick: {p['pick_team']}\n\n"
             f"❌ MISS — geen volgende goal meer gevallen.\n"
-            f"Score bleef: {gh}-{ga}"
+            f"Score bleef: {gh}-{ga}",
+            kind="result",
         )
 
-        log_result_row([
-            datetime.now().isoformat(timespec="seconds"),
-            fid, p["tier"], p["home"], p["away"], p["pick_team"],
-            "MISS", minute, f"{old_gh}-{old_ga}", f"{gh}-{ga}"
-        ])
+        record_result(fid, p, "MISS", minute, f"{gh}-{ga}")
 
         PENDING.pop(fid, None)
         cleanup_finished(fid)
         return
 
-def resolve_pending_not_in_live():
-    for fid in list(PENDING.keys()):
-        match = get_fixture_by_id(fid)
-        if match:
+def pending_goal_events(match_map, max_calls):
+    """Pending fixtures in de live feed waar sinds de alert gescoord is → hun /fixtures/events (parallel)."""
+    fids = [
+        fid for fid, m in match_map.items()
+        if fid in PENDING and next_goal_result(PENDING[fid]["pick_side"], PENDING[fid]["score_at_alert"],
+                                               m.get("goals", {}).get("home", 0), m.get("goals", {}).get("away", 0))
+    ]
+    return fetch_concurrent(get_fixture_events, fids[:max(0, max_calls)])
+
+def pending_not_in_live(live_fids, now):
+    """Pending fixtures zonder live payload deze cycle waarvan de recheck due is (nooit gecheckt eerst)."""
+    for fid in [fid for fid in PENDING_RECHECK if fid in live_fids or fid not in PENDING]:
+        PENDING_RECHECK.pop(fid)
+    fids = [fid for fid in PENDING if fid not in live_fids and PENDING_RECHECK.get(fid, {}).get("due", 0) <= now]
+    return sorted(fids, key=lambda fid: PENDING_RECHECK.get(fid, {}).get("due", 0))
+
+def resolve_pending_not_in_live(live_fids, max_calls=None):
+    """Alleen pending die niet in de live feed zaten, PENDING_BATCH_SIZE per call; geeft het aantal calls."""
+    now = time.time()
+    fids = pending_not_in_live(live_fids, now)
+    batches = [fids[i:i + PENDING_BATCH_SIZE] for i in range(0, len(fids), PENDING_BATCH_SIZE)]
+    if max_calls is not None:
+        batches = batches[:max_calls]
+    for batch in batches:
+        for match in get_fixtures_by_ids(batch):
             resolve_pending_from_match(match)
+        for fid in batch:
+            if fid not in PENDING:
+                PENDING_RECHECK.pop(fid, None)
+                continue
+            # nog niet afgelopen (onderbroken, uit de feed gevallen): steeds minder vaak opnieuw
+            tries = PENDING_RECHECK.get(fid, {}).get("tries", 0) + 1
+            wait = min(PENDING_RECHECK_MAX, PENDING_RECHECK_SECONDS * 2 ** (tries - 1))
+            PENDING_RECHECK[fid] = {"due": now + wait, "tries": tries}
+    return len(batches)
 
 # =========================================================
-# START
+# PRE-FILTER (alleen live payload, geen API calls)
 # =========================================================
-send_message("🟢 Bot gestart – logging + WEEKRAPPORT + minder strenge filters ✅")
+def _prefilter_mark_valid(mark, now, status_short, gh, ga):
+    if mark["until"] is not None and now >= mark["until"]:
+        return False
+    if mark["rule"] == "score_gap":
+        return mark["score"] == (gh, ga)
+    if mark["rule"] == "half_time":
+        return status_short == "HT"
+    return True
+
+def prefilter_rule(status_short, minute, gh, ga, league_name, home, away, now, key=None):
+    """(rule, until) — until None = rest van de match; een wedstrijdminuut duurt nooit korter dan 60s."""
+    r = RULES
+    if is_excluded_match(league_name, home, away, key):
+        return ("excluded", None)
+    if minute > r.SECOND_HALF_MAX:
+        return ("past_window", None)
+    if status_short == "HT":
+        return ("half_time", now + r.HALF_TIME_RECHECK_SECONDS)
+    if minute < r.FIRST_HALF_MIN:
+        return ("before_window", now + (r.FIRST_HALF_MIN - minute) * 60)
+    if r.FIRST_HALF_MAX < minute < r.SECOND_HALF_MIN:
+        return ("between_windows", now + (r.SECOND_HALF_MIN - minute) * 60)
+    if abs(gh - ga) > r.MAX_BEHIND_GOALS:
+        return ("score_gap", None)  # tot de stand verandert
+    return (None, None)
+
+def prefilter_reason(fid, status_short, minute, gh, ga, league_name, home, away, now, key=None):
+    """Regel die de fixture (tijdelijk) uitsluit van een stats call, of None."""
+    mark = INELIGIBLE.get(fid)
+    if mark and _prefilter_mark_valid(mark, now, status_short, gh, ga):
+        return mark["rule"]
+
+    rule, until = prefilter_rule(status_short, minute, gh, ga, league_name, home, away, now, key)
+    if rule:
+        INELIGIBLE[fid] = {"rule": rule, "until": until, "score": (gh, ga)}
+    else:
+        INELIGIBLE.pop(fid, None)
+    return rule
+
+def count_saved(rule):
+    PREFILTER_SAVED[rule] = PREFILTER_SAVED.get(rule, 0) + 1
+
+def prefilter_summary():
+    if not PREFILTER_SAVED:
+        return "—"
+    return ", ".join(f"{k} {v}" for k, v in sorted(PREFILTER_SAVED.items(), key=lambda kv: -kv[1]))
 
 # =========================================================
-# MAIN LOOP
+# SCAN STAGES (eerst alles ophalen, dan scoren)
 # =========================================================
-while True:
-    try:
-        # weekly report check (maandag)
-        maybe_send_weekly_report()
-
-        # new day -> report yesterday
-        if date.today() != TODAY:
-            yesterday = TODAY
-            send_daily_report(yesterday)
-
-            TODAY = date.today()
-            ALERTED_MATCHES.clear()
-            HALF_TIME_SNAPSHOT.clear()
-            SCORE_STATE.clear()
-            PENDING.clear()
-            HISTORY.clear()
-
-            send_message("🔄 Nieuwe dag — reset uitgevoerd ✅")
-
-        matches = get_live_matches()
-        match_map = {m.get("fixture", {}).get("id"): m for m in matches if m.get("fixture", {}).get("id")}
-
-        # 1) pending results
-        for fid, m in list(match_map.items()):
-            if fid in PENDING:
-                resolve_pending_from_match(m)
-
-        if PENDING:
-            resolve_pending_not_in_live()
-
-        # 2) nieuwe alerts zoeken
-        for match in matches:
-            fixture = match.get("fixture", {})
-            fid = fixture.get("id")
-            if not fid:
-                continue
+def fetch_concurrent(fn, fids):
+    """Roept fn(fid) parallel aan; geeft fid -> resultaat (None bij fout)."""
+    results = {}
+    futures = {FETCH_POOL.submit(fn, fid): fid for fid in fids}
+    for fut in as_completed(futures):
+        fid = futures[fut]
+        try:
+            results[fid] = fut.result()
+        except Exception:
+            results[fid] = None
+    return results
 
-            if fid in ALERTED_MATCHES:
-                continue
+FINISHED_STATUSES = ("FT", "AET", "PEN", "CANC", "PST", "ABD", "AWD", "WO")
 
-            status_short = fixture.get("status", {}).get("short", "")
-            if status_short in ("FT", "AET", "PEN", "CANC", "PST", "ABD", "AWD", "WO"):
-                cleanup_finished(fid)
-                continue
+def parse_live_fixture(match):
+    """Velden uit één /fixtures?live=all item die de scanner gebruikt."""
+    fixture = match.get("fixture", {})
+    league = match.get("league", {})
+    goals = match.get("goals", {})
+    return {
+        "fid": fixture.get("id"),
+        "status_short": fixture.get("status", {}).get("short", ""),
+        "minute": fixture.get("status", {}).get("elapsed"),
+        "home": match.get("teams", {}).get("home", {}).get("name", "HOME"),
+        "away": match.get("teams", {}).get("away", {}).get("name", "AWAY"),
+        "home_id": match.get("teams", {}).get("home", {}).get("id"),
+        "away_id": match.get("teams", {}).get("away", {}).get("id"),
+        "league_id": league.get("id"),
+        "league_name": league.get("name", "Unknown League"),
+        "league_country": league.get("country", ""),
+        "gh": goals.get("home", 0),
+        "ga": goals.get("away", 0),
+    }
+
+def exclude_key(ctx):
+    return (ctx["league_id"], ctx["home_id"], ctx["away_id"])
+
+def track_score_change(score_state, fid, gh, ga, now):
+    """Houdt per fixture bij wanneer de stand voor het laatst veranderde; geeft seconden sindsdien."""
+    cur_score = (gh, ga)
+    if fid not in score_state or cur_score != score_state[fid]["score"]:
+        score_state[fid] = {"score": cur_score, "changed_at": now}
+    return now - score_state[fid]["changed_at"]
+
+def collect_eligible(matches):
+    """Goedkope checks op de live payload; alleen deze fixtures krijgen een stats call."""
+    eligible = []
+    now = time.time()
+    for match in matches:
+        ctx = parse_live_fixture(match)
+        fid = ctx["fid"]
+        if not fid:
+            continue
 
-            minute = fixture.get("status", {}).get("elapsed")
-            if minute is None:
-                continue
+        if fid in ALERTED_MATCHES:
+            count_saved("alerted")
+            continue
 
-            in_first_window = FIRST_HALF_MIN <= minute <= FIRST_HALF_MAX
-            in_second_window = SECOND_HALF_MIN <= minute <= SECOND_HALF_MAX
-            if not (in_first_window or in_second_window):
-                continue
+        if ctx["status_short"] in FINISHED_STATUSES:
+            cleanup_finished(fid)
+            continue
 
-            home = match.get("teams", {}).get("home", {}).get("name", "HOME")
-            away = match.get("teams", {}).get("away", {}).get("name", "AWAY")
+        if ctx["minute"] is None:
+            NEXT_DUE.pop(fid, None)  # opnieuw inplannen zodra er weer een minuut is
+            continue
 
-            league = match.get("league", {})
-            league_name = league.get("name", "Unknown League")
-            league_country = league.get("country", "")
+        rule = prefilter_reason(fid, ctx["status_short"], ctx["minute"], ctx["gh"], ctx["ga"],
+                                ctx["league_name"], ctx["home"], ctx["away"], now, exclude_key(ctx))
+        if rule:
+            count_saved(rule)
+            NEXT_DUE.pop(fid, None)
+            continue
 
-            if is_excluded_match(league_name, home, away):
-                continue
+        # cooldown na score change
+        since_change = track_score_change(SCORE_STATE, fid, ctx["gh"], ctx["ga"], now)
+        if since_change < RULES.GOAL_COOLDOWN_SECONDS:
+            count_saved("cooldown")
+            # pas weer pollen als de cooldown voorbij is
+            cooldown_end = SCORE_STATE[fid]["changed_at"] + RULES.GOAL_COOLDOWN_SECONDS
+            if NEXT_DUE.get(fid) != cooldown_end:
+                schedule_poll(fid, cooldown_end)
+            continue
 
-            # score
-            goals = match.get("goals", {})
-            gh = goals.get("home", 0)
-            ga = goals.get("away", 0)
+        if fid not in NEXT_DUE:
+            schedule_poll(fid, now)
+
+        ctx["since_change"] = since_change
+        eligible.append(ctx)
+    return eligible
+
+def apply_stats(fid, minute, status_short, home_stats, away_stats, history, ht_snapshots):
+    """Werkt pace history + rust snapshot bij in de meegegeven dicts; geeft (PaceHistory, snapshot of None)."""
+    hist = history.get(fid)
+    if hist is None:
+        hist = history[fid] = PaceHistory()
+    hist.update(minute, home_stats.sot, away_stats.sot, home_stats.shots, away_stats.shots,
+                home_stats.corners, away_stats.corners)
+
+    # halftime snapshot
+    if (status_short == "HT" or minute >= 45) and fid not in ht_snapshots:
+        ht_snapshots[fid] = {
+            "home": {"sot": home_stats.sot, "shots": home_stats.shots, "corn": home_stats.corners},
+            "away": {"sot": away_stats.sot, "shots": away_stats.shots, "corn": away_stats.corners},
+        }
+    return hist, ht_snapshots.get(fid)
+
+def score_fixture(ctx, stats_response):
+    """Live wrapper: state bijwerken en scoren; geeft een kandidaat (zonder odds) of None."""
+    decoded = decode_stats_response(stats_response)
+    if not decoded:
+        return None
+    home_stats, away_stats = decoded
+    hist, ht_snap = apply_stats(ctx["fid"], ctx["minute"], ctx["status_short"], home_stats, away_stats,
+                                HISTORY, HALF_TIME_SNAPSHOT)
+    cand, hint = score_candidate(ctx, home_stats, away_stats, hist, ht_snap)
+    POLL_HINTS[ctx["fid"]] = hint  # poll cadence hint (ook als de fixture afvalt)
+    log_feature_row(ctx, home_stats, away_stats, hint, cand is not None)
+    return cand
+
+ScanResult = namedtuple("ScanResult", "candidates stats eligible scored deferred wanted")
+
+def scan_fixtures(matches, max_calls, lap):
+    """Stap 2 van de cycle op (een deel van) de live payload: prefilter, due polls, stats, scoren.
+    Alleen fixtures in de scoring windows waarvan de poll due is, meest achterstallig eerst
+    (die krijgen de quota als eerste)."""
+    by_fid = {c["fid"]: c for c in collect_eligible(matches)}
+    lap("prefilter")
+    due = []
+    for t, fid in pop_due_polls(time.time()):
+        if fid in by_fid:
+            due.append((t, fid))
+        else:
+            NEXT_DUE.pop(fid, None)  # niet in deze payload: collect_eligible plant opnieuw in als hij terugkomt
+    for t, fid in due[max(0, max_calls):]:
+        schedule_poll(fid, t)  # blijft due voor de volgende tick
+    deferred = max(0, len(due) - max(0, max_calls))
+    eligible = [by_fid[fid] for _, fid in due[:max(0, max_calls)]]
+
+    stats_by_fid = fetch_concurrent(get_match_statistics, [c["fid"] for c in eligible])
+    lap("stats")
+
+    candidates = []
+    for ctx in eligible:
+        cand = score_fixture(ctx, stats_by_fid.get(ctx["fid"]))
+        if cand:
+            candidates.append(cand)
+        schedule_poll(ctx["fid"], time.time() + poll_interval(ctx["fid"]))
+    lap("scoring")
+    return ScanResult(candidates, stats_by_fid, len(by_fid), len(eligible), deferred, len(due))
+
+def score_candidate(ctx, home_stats, away_stats, hist, ht_snap):
+    """Pure scoring (alleen RULES, geen I/O): (kandidaat of None, (gap, pace5_shots))."""
+    r = RULES  # 1 snapshot; RULES wisselt alleen tussen cycles
+    minute = ctx["minute"]
+    gh, ga = ctx["gh"], ctx["ga"]
+    since_change = ctx["since_change"]
+
+    hsot_total, asot_total = home_stats.sot, away_stats.sot
+    hshots_total, ashots_total = home_stats.shots, away_stats.shots
+    hcorn_total, acorn_total = home_stats.corners, away_stats.corners
+    hpos_total, apos_total = home_stats.possession, away_stats.possession
+    hred_total, ared_total = home_stats.red_cards, away_stats.red_cards
+
+    # per-half stats
+    in_second_half = minute > 45
+    use_half_stats = in_second_half and ht_snap is not None
+
+    if use_half_stats:
+        snap = ht_snap
+        hsot = clamp_nonnegative(hsot_total - snap["home"]["sot"])
+        asot = clamp_nonnegative(asot_total - snap["away"]["sot"])
+        hshots = clamp_nonnegative(hshots_total - snap["home"]["shots"])
+        ashots = clamp_nonnegative(ashots_total - snap["away"]["shots"])
+        hcorn = clamp_nonnegative(hcorn_total - snap["home"]["corn"])
+        acorn = clamp_nonnegative(acorn_total - snap["away"]["corn"])
+        half_text = "2e helft"
+    else:
+        hsot, asot = hsot_total, asot_total
+        hshots, ashots = hshots_total, ashots_total
+        hcorn, acorn = hcorn_total, acorn_total
+        half_text = "1e helft"
+
+    # red card bonus
+    red_adv_home = ared_total - hred_total
+    red_adv_away = hred_total - ared_total
+    red_bonus_home = max(0, red_adv_home) * r.RED_CARD_BONUS
+    red_bonus_away = max(0, red_adv_away) * r.RED_CARD_BONUS
+
+    # dominance score
+    score_home = (
+        (hsot - asot) * r.W_SOT +
+        (hshots - ashots) * r.W_SHOTS +
+        (hcorn - acorn) * r.W_CORNERS +
+        ((hpos_total - 50) * r.W_POSSESSION) +
+        red_bonus_home
+    )
+    score_away = (
+        (asot - hsot) * r.W_SOT +
+        (ashots - hshots) * r.W_SHOTS +
+        (acorn - hcorn) * r.W_CORNERS +
+        ((apos_total - 50) * r.W_POSSESSION) +
+        red_bonus_away
+    )
 
-            if abs(gh - ga) > MAX_BEHIND_GOALS:
-                continue
+    gap = abs(score_home - score_away)
+
+    # dominant side
+    if score_home > score_away:
+        pick_side = "HOME"
+        dom_score = score_home
+        dom_sot = hsot
+        dom_shots = hshots
+        opp_sot = asot
+        opp_shots = ashots
+        sot_diff = hsot - asot
+    else:
+        pick_side = "AWAY"
+        dom_score = score_away
+        dom_sot = asot
+        dom_shots = ashots
+        opp_sot = hsot
+        opp_shots = hshots
+        sot_diff = asot - hsot
+
+    # Pace (dominant team)
+    pace10_shots, pace10_sot, pace5_shots, pace5_sot, prev5_shots, prev5_sot = hist.windows(minute)[pick_side]
+    hint = (gap, pace5_shots)
+
+    # Geen alert als dominant team VOOR staat
+    if pick_side == "HOME" and gh > ga:
+        return (None, hint)
+    if pick_side == "AWAY" and ga > gh:
+        return (None, hint)
+
+    # comeback max 2 goals
+    if pick_side == "HOME" and (ga - gh) > r.MAX_BEHIND_GOALS:
+        return (None, hint)
+    if pick_side == "AWAY" and (gh - ga) > r.MAX_BEHIND_GOALS:
+        return (None, hint)
+
+    # Risk window 30-39: minder streng (basisfilter)
+    is_risk = 1 if (r.EARLY_RISK_START <= minute <= r.EARLY_RISK_END) else 0
+    if is_risk:
+        if abs(sot_diff) < 3:   # was 4
+            return (None, hint)
+
+    # Pace rules
+    if minute >= 20 and not in_second_half:
+        if pace10_shots < r.PACE1_MIN_SHOTS_10:
+            return (None, hint)
+        if pace5_shots < r.PACE1_MIN_SHOTS_5:
+            return (None, hint)
+        if pace10_sot < r.PACE1_MIN_SOT_10:
+            return (None, hint)
+
+    if in_second_half:
+        if pace10_shots < r.PACE2_MIN_SHOTS_10:
+            return (None, hint)
+        if pace5_shots < r.PACE2_MIN_SHOTS_5:
+            return (None, hint)
+        if pace10_sot < r.PACE2_MIN_SOT_10:
+            return (None, hint)
+
+    # Post-goal strict: milder & slimmer (alleen skip als zowel sot_diff als pace5 zwak is)
+    post_goal_strict = 1 if (r.GOAL_COOLDOWN_SECONDS <= since_change < r.POST_GOAL_STRICT_UNTIL_SECONDS) else 0
+    if post_goal_strict:
+        if abs(sot_diff) < 2 and pace5_shots < 3:
+            return (None, hint)
+
+    # Late game filter (iets soepeler)
+    if minute >= r.LATE_MINUTE:
+        if abs(sot_diff) < r.LATE_MIN_SOT_DIFF:
+            return (None, hint)
+        if pace10_shots < r.LATE_MIN_SHOTS_10:
+            return (None, hint)
+        if opp_sot > r.LATE_MAX_OPP_SOT:
+            return (None, hint)
+
+    return (dict(
+        ctx,
+        half_text=half_text,
+        hsot=hsot, asot=asot, hshots=hshots, ashots=ashots, hcorn=hcorn, acorn=acorn,
+        hpos_total=hpos_total, apos_total=apos_total,
+        hred_total=hred_total, ared_total=ared_total,
+        score_home=score_home, score_away=score_away, gap=gap,
+        pick_side=pick_side, dom_score=dom_score, dom_sot=dom_sot, dom_shots=dom_shots,
+        opp_sot=opp_sot, opp_shots=opp_shots, sot_diff=sot_diff,
+        is_risk=is_risk, post_goal_strict=post_goal_strict,
+        pace10_shots=pace10_shots, pace10_sot=pace10_sot,
+        pace5_shots=pace5_shots, pace5_sot=pace5_sot,
+        prev5_shots=prev5_shots, prev5_sot=prev5_sot,
+    ), hint)
+
+def finalize_alert(cand, odd_1x2):
+    """Pure: odds filter + confidence + tier; geeft een alert of None."""
+    r = RULES
+    minute = cand["minute"]
+    pick_side = cand["pick_side"]
+    sot_diff = cand["sot_diff"]
+    opp_sot = cand["opp_sot"]
+    opp_shots = cand["opp_shots"]
+    dom_score = cand["dom_score"]
+    gap = cand["gap"]
+    pace10_shots = cand["pace10_shots"]
+
+    if odd_1x2 is None and r.REQUIRE_ODDS:
+        return None
+    if odd_1x2 is not None and odd_1x2 < r.ODD_MIN:
+        return None
+    if minute >= r.LATE_MINUTE and odd_1x2 is not None and odd_1x2 < r.LATE_MIN_ODD:
+        return None
 
-            # cooldown na score change
-            now = time.time()
-            cur_score = (gh, ga)
+    # Confidence
+    conf = confidence_score(
+        gap=gap,
+        sot_diff_total=abs(sot_diff),
+        opp_sot=opp_sot,
+        pace10_shots=pace10_shots,
+        pace5_shots=cand["pace5_shots"],
+        pace10_sot=cand["pace10_sot"],
+        odd_value=odd_1x2
+    )
 
-            if fid not in SCORE_STATE:
-                SCORE_STATE[fid] = {"score": cur_score, "changed_at": now}
-            else:
-                if cur_score != SCORE_STATE[fid]["score"]:
-                    SCORE_STATE[fid] = {"score": cur_score, "changed_at": now}
+    # Risk window extra check (nu milder dan eerst)
+    if cand["is_risk"]:
+        if not (abs(sot_diff) >= 3 and pace10_shots >= 8 and conf >= 80):
+            return None
+
+    # Tier
+    is_extreme = (
+        dom_score >= r.EXTREME_SCORE and
+        gap >= r.EXTREME_MIN_GAP and
+        opp_sot <= r.EXTREME_MAX_OPP_SOT and
+        opp_shots <= r.EXTREME_MAX_OPP_SHOTS and
+        conf >= 85
+    )
 
-            since_change = now - SCORE_STATE[fid]["changed_at"]
-            if since_change < GOAL_COOLDOWN_SECONDS:
-                continue
+    is_premium = (
+        dom_score >= r.PREMIUM_MIN_SCORE and
+        gap >= r.PREMIUM_MIN_GAP and
+        abs(sot_diff) >= r.PREMIUM_MIN_SOT_DIFF and
+        opp_sot <= r.PREMIUM_MAX_OPP_SOT and
+        opp_shots <= r.PREMIUM_MAX_OPP_SHOTS and
+        conf >= r.PREMIUM_MIN_CONF
+    )
 
-            # stats
-            stats_response = get_match_statistics(fid)
-            if not stats_response or len(stats_response) != 2:
-                continue
+    is_normal = (
+        dom_score >= r.NORMAL_MIN_SCORE and
+        gap >= r.NORMAL_MIN_GAP and
+        not (opp_sot > r.NORMAL_MAX_OPP_SOT and opp_shots > r.NORMAL_MAX_OPP_SHOTS) and
+        conf >= 55
+    )
 
-            home_stats = stats_response[0].get("statistics", [])
-            away_stats = stats_response[1].get("statistics", [])
+    if is_extreme:
+        tier = "EXTREME"
+        title = "🔥🔥 EXTREME NEXT GOAL ALERT"
+    elif is_premium:
+        tier = "PREMIUM"
+        title = "💎💎 PREMIUM NEXT GOAL ALERT"
+    elif is_normal:
+        tier = "NORMAL"
+        title = "⚠️ NEXT GOAL ALERT"
+    else:
+        return None
 
-            hsot_total = stat(home_stats, "Shots on Goal")
-            asot_total = stat(away_stats, "Shots on Goal")
+    pick_team = cand["home"] if pick_side == "HOME" else cand["away"]
+    return dict(cand, odd_1x2=odd_1x2, conf=conf, tier=tier, title=title, pick_team=pick_team,
+                rules_version=r.version)
+
+def emit_alert(a):
+    fid = a["fid"]
+    home, away = a["home"], a["away"]
+    gh, ga = a["gh"], a["ga"]
+    pick_team = a["pick_team"]
+    odd_1x2 = a["odd_1x2"]
+    half_text = a["half_text"]
+
+    red_txt = ""
+    if a["hred_total"] or a["ared_total"]:
+        red_txt = f"\n🟥 Red Cards: {a['hred_total']} - {a['ared_total']}"
+
+    odds_line = (
+        f"\n💰 1X2 Odd ({pick_team}): {odd_1x2} ✅"
+        if odd_1x2 is not None
+        else "\n💰 1X2 Odd: — (check bookie) 🟡"
+    )
 
-            hshots_total = stat(home_stats, "Total Shots")
-            ashots_total = stat(away_stats, "Total Shots")
+    # SEND ALERT
+    send_message(
+        f"{a['title']} ({half_text})\n\n"
+        f"🏆 {a['league_name']} ({a['league_country']})\n"
+        f"{home} vs {away}\n"
+        f"Minuut: {a['minute']}' | Stand: {gh}-{ga}\n\n"
+        f"✅ Confidence: {a['conf']}/100\n"
+        f"📏 GAP: {round(a['gap'],1)} | SOT diff: {a['sot_diff']}\n"
+        f"🛡️ Opp threat: SOT {a['opp_sot']} | Shots {a['opp_shots']}\n"
+        f"⚡ Pace last10m: shots {a['pace10_shots']} | SOT {a['pace10_sot']}\n"
+        f"⚡ Pace last5m: shots {a['pace5_shots']} | SOT {a['pace5_sot']}\n"
+        f"📉 Prev5m: shots {a['prev5_shots']} | SOT {a['prev5_sot']}\n\n"
+        f"📊 Stats ({half_text}):\n"
+        f"SOT: {a['hsot']} - {a['asot']}\n"
+        f"Shots: {a['hshots']} - {a['ashots']}\n"
+        f"Corners: {a['hcorn']} - {a['acorn']}\n"
+        f"Possession (totaal): {a['hpos_total']}% - {a['apos_total']}%"
+        f"{red_txt}"
+        f"{odds_line}\n\n"
+        f"🔥 Dominantie score: {round(a['score_home'],1)} - {round(a['score_away'],1)}\n"
+        f"➡️ Pick: {pick_team}"
+    )
 
-            hcorn_total = stat(home_stats, "Corner Kicks")
-            acorn_total = stat(away_stats, "Corner Kicks")
+    # LOG ALERT
+    alert_ts = datetime.now().isoformat(timespec="seconds")
+    log_alert_row([
+        alert_ts,
+        a["tier"],
+        fid,
+        f"{a['league_name']} ({a['league_country']})",
+        home,
+        away,
+        a["minute"],
+        f"{gh}-{ga}",
+        pick_team,
+        round(a["dom_score"], 2),
+        round(a["gap"], 2),
+        a["conf"],
+        odd_1x2 if odd_1x2 is not None else "",
+        a["pace10_shots"], a["pace10_sot"],
+        a["pace5_shots"], a["pace5_sot"],
+        a["dom_sot"], a["dom_shots"],
+        a["opp_sot"], a["opp_shots"],
+        str(a["is_risk"]),
+        str(a["post_goal_strict"]),
+        a.get("rules_version", ""),
+    ])
 
-            hpos_total = stat(home_stats, "Ball Possession")
-            apos_total = stat(away_stats, "Ball Possession")
+    agg_add(alert_ts[:10], a["tier"], a["minute"], a["is_risk"], a["post_goal_strict"], alerts=1)
+    index_add_alert(fid, alert_ts, a["tier"], a["minute"], a["is_risk"], a["post_goal_strict"])
+
+    # PENDING for HIT/MISS
+    PENDING[fid] = {
+        "tier": a["tier"],
+        "home": home,
+        "away": away,
+        "home_id": a.get("home_id"),
+        "away_id": a.get("away_id"),
+        "pick_side": a["pick_side"],
+        "pick_team": pick_team,
+        "score_at_alert": (gh, ga),
+        "alert_ts": alert_ts,
+        "minute": a["minute"],
+        "is_risk": a["is_risk"],
+        "post_goal_strict": a["post_goal_strict"],
+    }
+
+    ALERTED_MATCHES.add(fid)
+    with ODDS_LOCK:
+        ODDS_STATS["alerts"] += 1
 
-            hred_total = stat(home_stats, "Red Cards")
-            ared_total = stat(away_stats, "Red Cards")
+# =========================================================
+# ALERT SENDER (rate limited, hoogste tier/confidence eerst)
+# =========================================================
+def queue_alerts(alerts):
+    now = time.time()
+    for a in alerts:
+        if a["fid"] in ALERT_QUEUE:
+            ALERT_STATS["replaced"] += 1
+        ALERT_QUEUE[a["fid"]] = dict(a, queued_at=now)
+
+def _refill_alert_tokens(now):
+    last = ALERT_TOKENS["at"]
+    if last is not None:
+        ALERT_TOKENS["tokens"] = min(float(ALERT_BURST), ALERT_TOKENS["tokens"] + (now - last) * ALERT_PER_MINUTE / 60.0)
+    ALERT_TOKENS["at"] = now
+
+def drain_alert_queue():
+    """Stuurt wat de rate limit toelaat; geeft het aantal verstuurde alerts."""
+    now = time.time()
+    _refill_alert_tokens(now)
+
+    for fid, a in list(ALERT_QUEUE.items()):
+        score_now = SCORE_STATE.get(fid, {}).get("score", (a["gh"], a["ga"]))
+        if now - a["queued_at"] > ALERT_MAX_AGE_SECONDS or score_now != (a["gh"], a["ga"]):
+            ALERT_QUEUE.pop(fid)
+            ALERT_STATS["dropped_stale"] += 1
+
+    ranked = sorted(ALERT_QUEUE.values(), key=lambda a: (TIER_RANK.get(a["tier"], 9), -a["conf"], -a["gap"]))
+    sent = 0
+    for a in ranked:
+        if ALERT_TOKENS["tokens"] < 1:
+            break
+        ALERT_TOKENS["tokens"] -= 1
+        ALERT_QUEUE.pop(a["fid"])
+        emit_alert(a)
+        ALERT_STATS["sent"] += 1
+        sent += 1
+    return sent
+
+def seconds_until_next_alert_slot():
+    if not ALERT_QUEUE:
+        return None
+    missing = max(0.0, 1 - ALERT_TOKENS["tokens"])
+    return missing * 60.0 / ALERT_PER_MINUTE
+
+def idle(seconds):
+    """Slaapt tot de volgende tick, maar stuurt tussendoor alerts zodra de rate limit het toelaat."""
+    end = time.time() + seconds
+    while True:
+        left = end - time.time()
+        if left <= 0:
+            return
+        wait = seconds_until_next_alert_slot()
+        if wait is None:
+            time.sleep(left)
+            return
+        time.sleep(min(left, max(1.0, wait)))
+        if drain_alert_queue():
+            save_state()
+            flush_logs()
+
+# =========================================================
+# SHARDS (SHARD_WORKERS > 0: stap 2 van de cycle per league in aparte processen)
+# =========================================================
+# De coordinator (run_cycle) pollt live=all 1x, doet pending, odds en alerts, en stuurt elke worker
+# de fixtures van zijn leagues (league_id % SHARD_WORKERS) plus zijn deel van de quota. Een worker
+# is eigenaar van HISTORY/SCORE_STATE/HALF_TIME_SNAPSHOT en de poll scheduler van die fixtures en
+# geeft kandidaten terug; dedup (ALERTED_MATCHES, alert queue) en versturen blijven hier.
+# De coordinator houdt een kopie van de state bij (save_state, stale check in de alert queue) en
+# geeft die mee als een fixture voor het eerst bij een (herstarte) worker landt.
+SHARDS = {
+    "procs": [],       # per worker: Process
+    "conns": [],       # per worker: Pipe (coordinator kant)
+    "owned": [],       # per worker: fids waarvan de worker de state al heeft
+    "next_due": None,  # vroegste due poll over alle workers (epoch)
+}
+
+def shard_of(match):
+    return (match.get("league", {}).get("id") or 0) % len(SHARDS["conns"])
+
+def _start_shard(i):
+    mp = multiprocessing.get_context(SHARD_START_METHOD)
+    parent, child = mp.Pipe()
+    # quota per minuut eerlijk delen: elke worker + de coordinator een gelijk deel
+    proc = mp.Process(target=shard_worker, args=(child, API_PER_MINUTE_LIMIT), name=f"shard-{i}", daemon=True)
+    proc.start()
+    child.close()
+    SHARDS["procs"][i], SHARDS["conns"][i], SHARDS["owned"][i] = proc, parent, set()
+
+def start_shards(n):
+    global API_PER_MINUTE_LIMIT
+    API_PER_MINUTE_LIMIT = max(1, API_PER_MINUTE_LIMIT // (n + 1))
+    with BUDGET_LOCK:
+        BUDGET["minute_limit"] = min(BUDGET["minute_limit"], API_PER_MINUTE_LIMIT)
+    SHARDS["procs"], SHARDS["conns"], SHARDS["owned"] = [None] * n, [None] * n, [None] * n
+    for i in range(n):
+        _start_shard(i)
+
+def _restart_shard(i, reason):
+    print(f"⚠️ shard {i} herstart: {reason}", flush=True)
+    inc("shard_errors_total", kind="restart")
+    SHARDS["conns"][i].close()
+    SHARDS["procs"][i].terminate()
+    SHARDS["procs"][i].join(5)
+    _start_shard(i)
+
+def stop_shards():
+    for conn in SHARDS["conns"]:
+        try:
+            conn.send(None)
+        except OSError:
+            pass
+    for proc in SHARDS["procs"]:
+        proc.join(5)
+        if proc.is_alive():
+            proc.terminate()
+
+def _shard_seed(fid):
+    hist = HISTORY.get(fid)
+    if hist is None and fid not in SCORE_STATE and fid not in HALF_TIME_SNAPSHOT:
+        return None
+    return {"history": hist.to_rows() if hist else None, "ht": HALF_TIME_SNAPSHOT.get(fid), "score": SCORE_STATE.get(fid)}
 
-            # pace history
-            update_history(fid, minute, hsot_total, asot_total, hshots_total, ashots_total, hcorn_total, acorn_total)
+def _shard_exchange(jobs):
+    """Alle jobs versturen, dan de antwoorden ophalen (de workers draaien intussen parallel)."""
+    sent = []
+    for i, job in enumerate(jobs):
+        try:
+            SHARDS["conns"][i].send(job)
+            sent.append(i)
+        except OSError as e:
+            _restart_shard(i, e)
+    results = []
+    for i in sent:
+        conn = SHARDS["conns"][i]
+        try:
+            if not conn.poll(SHARD_TIMEOUT_SECONDS):
+                raise TimeoutError(f"geen antwoord binnen {SHARD_TIMEOUT_SECONDS}s")
+            res = conn.recv()
+        except (OSError, EOFError) as e:
+            _restart_shard(i, e)  # fixtures van deze worker slaan 1 cycle over
+            continue
+        if "error" in res:
+            print(f"⚠️ shard {i} fout:\n{res['error']}", flush=True)
+            inc("shard_errors_total", kind="cycle")
+            continue
+        results.append(res)
+    return results
+
+def scan_sharded(matches, max_calls, lap):
+    """scan_fixtures, maar verdeeld over de shard workers; geeft hetzelfde ScanResult."""
+    n = len(SHARDS["conns"])
+    slices = [[] for _ in range(n)]
+    for m in matches:
+        slices[shard_of(m)].append(m)
+
+    # quota naar rato van het aantal live fixtures per worker (telt exact op tot max_calls)
+    budget, total, done = max(0, max_calls), max(1, len(matches)), 0
+    drops = [[] for _ in range(n)]
+    for i, part in enumerate(slices):
+        for m in part:
+            fid = m.get("fixture", {}).get("id")
+            for j, owned in enumerate(SHARDS["owned"]):
+                if j != i and fid in owned:
+                    # league naar een andere shard (bv. id even leeg): oude worker laat de fixture los,
+                    # de nieuwe krijgt de state uit de kopie hier
+                    owned.discard(fid)
+                    drops[j].append(fid)
+    jobs = []
+    for i, part in enumerate(slices):
+        calls = budget * (done + len(part)) // total - budget * done // total
+        done += len(part)
+        fids = [m.get("fixture", {}).get("id") for m in part]
+        seed = {}
+        for fid in fids:
+            if fid and fid not in SHARDS["owned"][i]:
+                SHARDS["owned"][i].add(fid)
+                state = _shard_seed(fid)
+                if state:
+                    seed[fid] = state
+        jobs.append({
+            "today": TODAY.isoformat(),
+            "rules": RULES,
+            "matches": part,
+            "max_calls": calls,
+            "alerted": [fid for fid in fids if fid in ALERTED_MATCHES],
+            "seed": seed,
+            "drop": drops[i],
+        })
+    results = _shard_exchange(jobs)
+    lap("shards")
+
+    candidates, stats_by_fid = [], {}
+    eligible = scored = deferred = wanted = 0
+    next_due, messages = None, []
+    for res in results:
+        # single sender: wat al gealert is (bv. door een eerdere cycle) gaat er hier uit
+        candidates.extend(c for c in res["candidates"] if c["fid"] not in ALERTED_MATCHES)
+        stats_by_fid.update(res["stats"])
+        SCORE_STATE.update(res["score_state"])
+        HALF_TIME_SNAPSHOT.update(res["ht"])
+        for fid, rows in res["history"].items():
+            HISTORY[fid] = PaceHistory.from_rows(rows)
+        for fid in res["finished"]:
+            cleanup_finished(fid)
+        for rule, k in res["saved"].items():
+            PREFILTER_SAVED[rule] = PREFILTER_SAVED.get(rule, 0) + k
+        for row in res["features"]:
+            write_log_row(FEATURES_LOG, FEATURES_HEADER, row)
+        for msg in res["messages"]:
+            if msg not in messages:  # bv. dezelfde breaker melding uit meerdere workers
+                messages.append(msg)
+        budget_count_external(res["calls"])
+        metrics_merge(res["metrics"])
+        eligible += res["eligible"]
+        scored += res["scored"]
+        deferred += res["deferred"]
+        wanted += res["wanted"]
+        if res["next_due"] is not None:
+            next_due = res["next_due"] if next_due is None else min(next_due, res["next_due"])
+    for owned, res in zip(SHARDS["owned"], results):
+        owned.difference_update(res["finished"])
+    for text, kind in messages:
+        send_message(text, kind)
+    SHARDS["next_due"] = next_due
+    lap("scoring")
+    return ScanResult(candidates, stats_by_fid, eligible, scored, deferred, wanted)
+
+def shard_worker(conn, per_minute_limit):
+    """Worker proces: jobs van de coordinator afhandelen tot die None stuurt of wegvalt."""
+    global API_PER_MINUTE_LIMIT, WORKER_OUTBOX
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C: de coordinator stopt de workers
+    API_PER_MINUTE_LIMIT = per_minute_limit
+    BUDGET["minute_limit"] = per_minute_limit
+    WORKER_OUTBOX = {"features": [], "messages": []}
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        try:
+            res = shard_cycle(job)
+        except Exception:
+            res = {"error": traceback.format_exc(limit=8)}
+        conn.send(res)
+
+def shard_cycle(job):
+    """Eén cycle in een worker: scan_fixtures op de eigen fixtures; geeft een picklebare dict."""
+    global TODAY
+    if job["today"] != TODAY.isoformat():
+        TODAY = date.fromisoformat(job["today"])
+        for d in (HISTORY, SCORE_STATE, HALF_TIME_SNAPSHOT, NEXT_DUE, POLL_HINTS, INELIGIBLE, EXCLUDE_MEMO):
+            d.clear()
+        POLL_QUEUE.clear()
+    if job["rules"].version != RULES.version:
+        set_rules(job["rules"])
+        INELIGIBLE.clear()
+    for fid in job["drop"]:
+        cleanup_finished(fid)  # ook NEXT_DUE: anders plant collect_eligible hem nooit meer in als hij terugkomt
+    for fid, state in job["seed"].items():
+        if state["history"]:
+            HISTORY[fid] = PaceHistory.from_rows(state["history"])
+        if state["ht"]:
+            HALF_TIME_SNAPSHOT[fid] = state["ht"]
+        if state["score"]:
+            SCORE_STATE[fid] = state["score"]
+    ALERTED_MATCHES.clear()
+    ALERTED_MATCHES.update(job["alerted"])
+    PREFILTER_SAVED.clear()
+    calls_before = BUDGET["calls_today"]
+
+    matches = job["matches"]
+    fids = [m.get("fixture", {}).get("id") for m in matches]
+    finished = [fid for fid, m in zip(fids, matches)  # zelfde fixtures die collect_eligible opruimt
+                if m.get("fixture", {}).get("status", {}).get("short") in FINISHED_STATUSES and fid not in ALERTED_MATCHES]
+    scan = scan_fixtures(matches, job["max_calls"], lambda stage: None)
+
+    now = time.time()
+    wait = seconds_until_next_poll(now)
+    with METRICS_LOCK:
+        metrics = {"hist": {k: (h["counts"], h["sum"]) for k, h in HISTOGRAMS.items()}, "counters": dict(COUNTERS)}
+        HISTOGRAMS.clear()
+        COUNTERS.clear()
+    res = scan._asdict()
+    res.update(
+        stats=scan.stats if RECORD_PAYLOADS else {},
+        history={fid: HISTORY[fid].to_rows() for fid in scan.stats if fid in HISTORY},
+        ht={fid: HALF_TIME_SNAPSHOT[fid] for fid in scan.stats if fid in HALF_TIME_SNAPSHOT},
+        score_state={fid: SCORE_STATE[fid] for fid in fids if fid in SCORE_STATE},
+        finished=finished,
+        saved=dict(PREFILTER_SAVED),
+        calls=max(0, BUDGET["calls_today"] - calls_before),
+        metrics=metrics,
+        next_due=None if wait is None else now + wait,
+        features=WORKER_OUTBOX["features"],
+        messages=WORKER_OUTBOX["messages"],
+    )
+    WORKER_OUTBOX.update(features=[], messages=[])
+    return res
 
-            # halftime snapshot
-            if (status_short == "HT" or minute >= 45) and fid not in HALF_TIME_SNAPSHOT:
-                HALF_TIME_SNAPSHOT[fid] = {
-                    "home": {"sot": hsot_total, "shots": hshots_total, "corn": hcorn_total},
-                    "away": {"sot": asot_total, "shots": ashots_total, "corn": acorn_total},
-                }
+# =========================================================
+# CYCLE
+# =========================================================
+def run_cycle():
+    global TODAY, LAST_CYCLE_AT, NEXT_CYCLE_AT
 
-            # per-half stats
-            in_second_half = minute > 45
-            use_half_stats = in_second_half and fid in HALF_TIME_SNAPSHOT
+    # loop lag: zoveel later dan gepland start deze cycle (idle overshoot, save_state, rapporten)
+    if NEXT_CYCLE_AT is not None:
+        observe("loop_lag_seconds", max(0.0, time.time() - NEXT_CYCLE_AT))
+        NEXT_CYCLE_AT = None
 
-            if use_half_stats:
-                snap = HALF_TIME_SNAPSHOT[fid]
-                hsot = clamp_nonnegative(hsot_total - snap["home"]["sot"])
-                asot = clamp_nonnegative(asot_total - snap["away"]["sot"])
-                hshots = clamp_nonnegative(hshots_total - snap["home"]["shots"])
-                ashots = clamp_nonnegative(ashots_total - snap["away"]["shots"])
-                hcorn = clamp_nonnegative(hcorn_total - snap["home"]["corn"])
-                acorn = clamp_nonnegative(acorn_total - snap["away"]["corn"])
-                half_text = "2e helft"
-            else:
-                hsot, asot = hsot_total, asot_total
-                hshots, ashots = hshots_total, ashots_total
-                hcorn, acorn = hcorn_total, acorn_total
-                half_text = "1e helft"
-
-            # red card bonus
-            red_adv_home = ared_total - hred_total
-            red_adv_away = hred_total - ared_total
-            red_bonus_home = max(0, red_adv_home) * RED_CARD_BONUS
-            red_bonus_away = max(0, red_adv_away) * RED_CARD_BONUS
-
-            # dominance score
-            score_home = (
-                (hsot - asot) * W_SOT +
-                (hshots - ashots) * W_SHOTS +
-                (hcorn - acorn) * W_CORNERS +
-                ((hpos_total - 50) * W_POSSESSION) +
-                red_bonus_home
-            )
-            score_away = (
-                (asot - hsot) * W_SOT +
-                (ashots - hshots) * W_SHOTS +
-                (acorn - hcorn) * W_CORNERS +
-                ((apos_total - 50) * W_POSSESSION) +
-                red_bonus_away
-            )
-
-            gap = abs(score_home - score_away)
-
-            # dominant side
-            if score_home > score_away:
-                pick_side = "HOME"
-                dom_score = score_home
-                dom_sot = hsot
-                dom_shots = hshots
-                opp_sot = asot
-                opp_shots = ashots
-                sot_diff = hsot - asot
-            else:
-                pick_side = "AWAY"
-                dom_score = score_away
-                dom_sot = asot
-                dom_shots = ashots
-                opp_sot = hsot
-                opp_shots = hshots
-                sot_diff = asot - hsot
-
-            # Geen alert als dominant team VOOR staat
-            if pick_side == "HOME" and gh > ga:
-                continue
-            if pick_side == "AWAY" and ga > gh:
-                continue
+    # weekly report check (maandag)
+    maybe_send_weekly_report()
 
-            # comeback max 2 goals
-            if pick_side == "HOME" and (ga - gh) > MAX_BEHIND_GOALS:
-                continue
-            if pick_side == "AWAY" and (gh - ga) > MAX_BEHIND_GOALS:
-                continue
+    # config gewijzigd → nieuwe regels vanaf deze cycle; pre-filter marks opnieuw bepalen (kost geen calls)
+    try:
+        changed = reload_rules()
+    except (OSError, ValueError) as e:
+        send_message(f"⚠️ Config fout: {e}\nRegels v{RULES.version} blijven actief.")
+    else:
+        if changed:
+            INELIGIBLE.clear()
+            print(f"⚙️ regels v{RULES.version} geladen: {', '.join(changed)}", flush=True)
+            send_message(f"⚙️ Config v{RULES.version} actief\nGewijzigd: {', '.join(changed)}")
+
+    # new day -> report yesterday
+    if date.today() != TODAY:
+        yesterday = TODAY
+        send_daily_report(yesterday)
+        METRICS_DAY["base"] = metrics_snapshot()
+        PREFILTER_SAVED.clear()
+        EXCLUDE_MEMO.clear()
+        with ODDS_LOCK:
+            ODDS_STATS.update(calls=0, cache_hits=0, bulk=0, alerts=0)
+
+        TODAY = date.today()
+        ALERTED_MATCHES.clear()
+        HALF_TIME_SNAPSHOT.clear()
+        SCORE_STATE.clear()
+        PENDING.clear()
+        PENDING_RECHECK.clear()
+        EVENTS_CURSOR.clear()
+        HISTORY.clear()
+        NEXT_DUE.clear()
+        POLL_QUEUE.clear()
+        POLL_HINTS.clear()
+        INELIGIBLE.clear()
+        ALERT_QUEUE.clear()
+        for owned in SHARDS["owned"]:
+            owned.clear()  # workers resetten zelf bij de nieuwe TODAY in hun volgende job
+        SHARDS["next_due"] = None
+
+        send_message("🔄 Nieuwe dag — reset uitgevoerd ✅")
+
+    t0 = time.monotonic()
+    lap = stage_timer()
+    saved_before = sum(PREFILTER_SAVED.values())
+    # quota naar rato van de echte tick lengte (die varieert met de poll cadence)
+    tick_seconds = LOOP_SLEEP_SECONDS
+    if LAST_CYCLE_AT is not None:
+        tick_seconds = max(1, min(LOOP_SLEEP_SECONDS, time.time() - LAST_CYCLE_AT))
+    LAST_CYCLE_AT = time.time()
+    allowance = budget_cycle_allowance(tick_seconds)
+
+    matches = get_live_matches()
+    match_map = {m.get("fixture", {}).get("id"): m for m in matches if m.get("fixture", {}).get("id")}
+    left = allowance - 1
+    lap("live")
+
+    # 1) pending results (live payload; /fixtures/events alleen als er sinds de alert gescoord is)
+    events_by_fid = pending_goal_events(match_map, left)
+    left -= len(events_by_fid)
+    for fid, m in list(match_map.items()):
+        if fid in PENDING:
+            resolve_pending_from_match(m, events_by_fid.get(fid))
+    lap("results")
+
+    # 2) nieuwe alerts zoeken (in dit proces, of per league verdeeld over de shard workers)
+    pending_calls = -(-len(pending_not_in_live(match_map, time.time())) // PENDING_BATCH_SIZE)
+    scan = scan_sharded(matches, left, lap) if SHARDS["conns"] else scan_fixtures(matches, left, lap)
+    wanted = 1 + len(events_by_fid) + scan.wanted + pending_calls
+    left -= scan.scored
+    candidates, stats_by_fid = scan.candidates, scan.stats
+
+    # 3) odds pas ophalen voor kandidaten die door de filters komen (performance)
+    odds_by_fid, odds_calls = fetch_odds(candidates, max(0, left))
+    left -= odds_calls
+    lap("odds")
+
+    # alle fixtures scoren; de sender bepaalt wat er (en in welke volgorde) uitgaat
+    alerts = []
+    for cand in candidates:
+        resp = odds_by_fid.get(cand["fid"])
+        odd_1x2 = find_1x2_odd(resp, cand["pick_side"], cand["home"], cand["away"],
+                               decoded=decoded_odds(cand["fid"], resp, cand["home"], cand["away"]) if resp else None)
+        alert = finalize_alert(cand, odd_1x2)
+        if alert:
+            alerts.append(alert)
+    queue_alerts(alerts)
+    alerts_sent = drain_alert_queue()
+    lap("alerts")
+
+    record_cycle(time.time(), matches, stats_by_fid, odds_by_fid)
+    lap("record")
+
+    # 4) pending die niet (meer) live zijn: gebundeld, met wat er van de quota over is
+    if PENDING:
+        resolve_pending_not_in_live(match_map, max_calls=max(0, left))
+    lap("pending")
+
+    flush_logs()
+    lap("logging")
+
+    elapsed = time.monotonic() - t0
+    observe("cycle_seconds", elapsed)
+    inc("cycles_total")
+    for stage, n in (("live", len(matches)), ("eligible", scan.eligible), ("scored", scan.scored),
+                     ("candidate", len(candidates)), ("alert", len(alerts)), ("sent", alerts_sent)):
+        inc("fixtures_total", n, stage=stage)
+    api = http_stats()["api"]
+    budget = budget_status()
+    tg = telegram_stats()
+    breakers = breaker_status()
+    print(
+        f"⏱️ cycle {elapsed:.1f}s | live {len(matches)} | stats {scan.scored}/{scan.eligible} (deferred {scan.deferred}) | "
+        f"odds {len(odds_by_fid)}/{len(candidates)} ({odds_calls} calls) | alerts {len(alerts)} (sent {alerts_sent}, queued {len(ALERT_QUEUE)}) | "
+        f"prefilter saved {sum(PREFILTER_SAVED.values()) - saved_before} | "
+        f"conn reuse {api['reused']}/{api['requests']} | "
+        f"telegram sent {tg['sent']} failed {tg['failed']} backlog {tg['backlog']} avg {tg['latency_avg']}s | "
+        f"quota {budget['day_remaining']} left, {allowance}/cycle"
+        + (f" | circuit open {breakers}" if breakers else ""),
+        flush=True,
+    )
+    sleep_for = budget_next_sleep(next_tick_sleep(time.time(), spare_calls=left), wanted, allowance)
+    NEXT_CYCLE_AT = time.time() + sleep_for
+    return sleep_for
 
-            # Risk window 30-39: minder streng (basisfilter)
-            is_risk = 1 if (EARLY_RISK_START <= minute <= EARLY_RISK_END) else 0
-            if is_risk:
-                if abs(sot_diff) < 3:   # was 4
-                    continue
-
-            # Pace (dominant team)
-            pace10_shots, pace10_sot = pace_last_window(fid, minute, 10, pick_side)
-            pace5_shots, pace5_sot = pace_last_window(fid, minute, 5, pick_side)
-            prev5_shots, prev5_sot = pace_last_window(fid, minute - 5 if minute >= 5 else minute, 5, pick_side)
-
-            # Pace rules
-            if minute >= 20 and not in_second_half:
-                if pace10_shots < PACE1_MIN_SHOTS_10:
-                    continue
-                if pace5_shots < PACE1_MIN_SHOTS_5:
-                    continue
-                if pace10_sot < PACE1_MIN_SOT_10:
-                    continue
-
-            if in_second_half:
-                if pace10_shots < PACE2_MIN_SHOTS_10:
-                    continue
-                if pace5_shots < PACE2_MIN_SHOTS_5:
-                    continue
-                if pace10_sot < PACE2_MIN_SOT_10:
-                    continue
-
-            # Post-goal strict: milder & slimmer (alleen skip als zowel sot_diff als pace5 zwak is)
-            post_goal_strict = 1 if (GOAL_COOLDOWN_SECONDS <= since_change < POST_GOAL_STRICT_UNTIL_SECONDS) else 0
-            if post_goal_strict:
-                if abs(sot_diff) < 2 and pace5_shots < 3:
-                    continue
-
-            # Late game filter (iets soepeler)
-            if minute >= LATE_MINUTE:
-                if abs(sot_diff) < LATE_MIN_SOT_DIFF:
-                    continue
-                if pace10_shots < LATE_MIN_SHOTS_10:
-                    continue
-                if opp_sot > LATE_MAX_OPP_SOT:
-                    continue
-
-            # Odds pas later ophalen (performance)
-            odd_1x2 = None
-            odds_response = get_live_odds(fid)
-            odd_1x2 = find_1x2_odd(odds_response, pick_side, home, away)
-
-            if odd_1x2 is None and REQUIRE_ODDS:
-                continue
-            if odd_1x2 is not None and odd_1x2 < ODD_MIN:
-                continue
-            if minute >= LATE_MINUTE and odd_1x2 is not None and odd_1x2 < LATE_MIN_ODD:
-                continue
+# =========================================================
+# SUPERVISOR (fout → classificatie → backoff; Telegram alleen bij nieuwe fouten)
+# =========================================================
+SUPERVISOR = {"errors": 0, "since": None, "alerted": {}}  # alerted: fout key -> {"at", "suppressed"}
+
+def classify_error(e):
+    if isinstance(e, ApiBudgetExceeded):
+        return "quota"
+    if isinstance(e, UpstreamUnavailable):
+        return "circuit_open"
+    response = getattr(e, "response", None)
+    if isinstance(e, requests.HTTPError) and response is not None and response.status_code in (401, 403):
+        return "auth"  # key/plan probleem: herhalen helpt niet snel
+    if isinstance(e, requests.RequestException):
+        return "transient"
+    return "bug"
+
+def error_backoff(n):
+    """n-de fout op rij: exponentieel, met jitter zodat herstarts niet synchroon gaan hameren."""
+    cap = min(ERROR_BACKOFF_MAX, ERROR_BACKOFF_BASE * 2 ** n)
+    return random.uniform(cap / 2, cap)
+
+def alert_error(kind, e):
+    key = f"{kind}:{type(e).__name__}:{str(e)[:80]}"
+    now = time.time()
+    seen = SUPERVISOR["alerted"].get(key)
+    if seen and now - seen["at"] < ERROR_ALERT_REPEAT_SECONDS:
+        seen["suppressed"] += 1
+        return
+    repeats = f"\n(+{seen['suppressed']}x sinds de vorige melding)" if seen and seen["suppressed"] else ""
+    SUPERVISOR["alerted"][key] = {"at": now, "suppressed": 0}
+    send_message(f"❌ ERROR ({kind}): {e}{repeats}")
+
+def handle_cycle_error(e):
+    """Geeft de wachttijd (s) tot de volgende cycle."""
+    kind = classify_error(e)
+    n = SUPERVISOR["errors"]
+    SUPERVISOR["errors"] += 1
+    if SUPERVISOR["since"] is None:
+        SUPERVISOR["since"] = time.time()
+
+    if kind == "quota":
+        # geen ERROR spam: wachten tot de quota reset
+        print(f"⛔ {e} — pauze tot quota reset", flush=True)
+        return min(900, seconds_until_quota_reset())
+    if kind == "circuit_open":
+        wait = max(5.0, e.retry_in)  # breaker meldt zelf al; gewoon wachten tot de proefcall
+    elif kind == "auth":
+        wait = ERROR_BACKOFF_MAX
+    else:
+        wait = error_backoff(n)
+        if kind == "bug":
+            traceback.print_exc()
+    print(f"⚠️ {kind}: {e} — volgende poging over {wait:.0f}s (fout {n + 1} op rij)", flush=True)
+    if kind != "circuit_open":
+        alert_error(kind, e)
+    return wait
+
+def cycle_ok():
+    """Na een geslaagde cycle: backoff reset; na gemelde fouten 1 herstelbericht."""
+    if not SUPERVISOR["errors"]:
+        return
+    if SUPERVISOR["alerted"]:
+        down = (time.time() - SUPERVISOR["since"]) / 60
+        send_message(f"✅ Hersteld na {SUPERVISOR['errors']} fouten ({down:.0f} min)")
+    SUPERVISOR.update(errors=0, since=None, alerted={})
 
-            # Confidence
-            conf = confidence_score(
-                gap=gap,
-                sot_diff_total=abs(sot_diff),
-                opp_sot=opp_sot,
-                pace10_shots=pace10_shots,
-                pace5_shots=pace5_shots,
-                pace10_sot=pace10_sot,
-                odd_value=odd_1x2
-            )
-
-            # Risk window extra check (nu milder dan eerst)
-            if is_risk:
-                if not (abs(sot_diff) >= 3 and pace10_shots >= 8 and conf >= 80):
-                    continue
-
-            pick_team = home if pick_side == "HOME" else away
-
-            red_txt = ""
-            if hred_total or ared_total:
-                red_txt = f"\n🟥 Red Cards: {hred_total} - {ared_total}"
-
-            odds_line = (
-                f"\n💰 1X2 Odd ({pick_team}): {odd_1x2} ✅"
-                if odd_1x2 is not None
-                else "\n💰 1X2 Odd: — (check bookie) 🟡"
-            )
-
-            # Tier
-            is_extreme = (
-                dom_score >= EXTREME_SCORE and
-                gap >= EXTREME_MIN_GAP and
-                opp_sot <= EXTREME_MAX_OPP_SOT and
-                opp_shots <= EXTREME_MAX_OPP_SHOTS and
-                conf >= 85
-            )
-
-            is_premium = (
-                dom_score >= PREMIUM_MIN_SCORE and
-                gap >= PREMIUM_MIN_GAP and
-                abs(sot_diff) >= PREMIUM_MIN_SOT_DIFF and
-                opp_sot <= PREMIUM_MAX_OPP_SOT and
-                opp_shots <= PREMIUM_MAX_OPP_SHOTS and
-                conf >= PREMIUM_MIN_CONF
-            )
-
-            is_normal = (
-                dom_score >= NORMAL_MIN_SCORE and
-                gap >= NORMAL_MIN_GAP and
-                not (opp_sot > NORMAL_MAX_OPP_SOT and opp_shots > NORMAL_MAX_OPP_SHOTS) and
-                conf >= 55
-            )
-
-            if is_extreme:
-                tier = "EXTREME"
-                title = "🔥🔥 EXTREME NEXT GOAL ALERT"
-            elif is_premium:
-                tier = "PREMIUM"
-                title = "💎💎 PREMIUM NEXT GOAL ALERT"
-            elif is_normal:
-                tier = "NORMAL"
-                title = "⚠️ NEXT GOAL ALERT"
-            else:
-                continue
+# =========================================================
+# MAIN LOOP
+# =========================================================
+def main():
+    global TODAY
+
+    if not BOT_TOKEN or not CHAT_ID or not API_KEY:
+        print("❌ ERROR: Missing env vars. Check BOT_TOKEN, CHAT_ID, API_FOOTBALL_KEY")
+        raise SystemExit(1)
+
+    t0 = time.monotonic()
+    open_state_store()
+    saved_today = load_state()
+    if saved_today:
+        TODAY = saved_today
+    if agg_is_empty():
+        n_alerts, n_results = backfill_report_aggregates()
+        if n_alerts or n_results:
+            print(f"📚 report aggregates opgebouwd uit CSV logs ({n_alerts} alerts, {n_results} results)", flush=True)
+    print(
+        f"💾 state geladen in {(time.monotonic() - t0) * 1000:.0f} ms "
+        f"(pending {len(PENDING)}, alerted {len(ALERTED_MATCHES)}, history {len(HISTORY)})",
+        flush=True,
+    )
 
-            # SEND ALERT
-            send_message(
-                f"{title} ({half_text})\n\n"
-                f"🏆 {league_name} ({league_country})\n"
-                f"{home} vs {away}\n"
-                f"Minuut: {minute}' | Stand: {gh}-{ga}\n\n"
-                f"✅ Confidence: {conf}/100\n"
-                f"📏 GAP: {round(gap,1)} | SOT diff: {sot_diff}\n"
-                f"🛡️ Opp threat: SOT {opp_sot} | Shots {opp_shots}\n"
-                f"⚡ Pace last10m: shots {pace10_shots} | SOT {pace10_sot}\n"
-                f"⚡ Pace last5m: shots {pace5_shots} | SOT {pace5_sot}\n"
-                f"📉 Prev5m: shots {prev5_shots} | SOT {prev5_sot}\n\n"
-                f"📊 Stats ({half_text}):\n"
-                f"SOT: {hsot} - {asot}\n"
-                f"Shots: {hshots} - {ashots}\n"
-                f"Corners: {hcorn} - {acorn}\n"
-                f"Possession (totaal): {hpos_total}% - {apos_total}%"
-                f"{red_txt}"
-                f"{odds_line}\n\n"
-                f"🔥 Dominantie score: {round(score_home,1)} - {round(score_away,1)}\n"
-                f"➡️ Pick: {pick_team}"
-            )
-
-            # LOG ALERT
-            log_alert_row([
-                datetime.now().isoformat(timespec="seconds"),
-                tier,
-                fid,
-                f"{league_name} ({league_country})",
-                home,
-                away,
-                minute,
-                f"{gh}-{ga}",
-                pick_team,
-                round(dom_score, 2),
-                round(gap, 2),
-                conf,
-                odd_1x2 if odd_1x2 is not None else "",
-                pace10_shots, pace10_sot,
-                pace5_shots, pace5_sot,
-                dom_sot, dom_shots,
-                opp_sot, opp_shots,
-                str(is_risk),
-                str(post_goal_strict),
-            ])
-
-            # PENDING for HIT/MISS
-            PENDING[fid] = {
-                "tier": tier,
-                "home": home,
-                "away": away,
-                "pick_side": pick_side,
-                "pick_team": pick_team,
-                "score_at_alert": (gh, ga),
-            }
+    try:
+        reload_rules()
+    except (OSError, ValueError) as e:
+        print(f"❌ ERROR: config niet geladen: {e}")
+        raise SystemExit(1)
+    print(f"⚙️ regels v{RULES.version}", flush=True)
 
-            ALERTED_MATCHES.add(fid)
+    if SHARD_WORKERS > 0:
+        start_shards(SHARD_WORKERS)
+        print(f"🧩 {SHARD_WORKERS} shard workers ({SHARD_START_METHOD}), quota {API_PER_MINUTE_LIMIT}/min per proces", flush=True)
 
-            # anti spam: 1 alert per loop
-            break
+    try:
+        if start_metrics_server():
+            print(f"📈 metrics op http://{METRICS_HOST}:{METRICS_PORT}/metrics", flush=True)
+    except OSError as e:
+        print(f"⚠️ metrics endpoint niet gestart: {e}", flush=True)
 
-        time.sleep(91)
+    send_message("🟢 Bot gestart – logging + WEEKRAPPORT + minder strenge filters ✅")
 
-    except Exception as e:
-        send_message(f"❌ ERROR: {e}")
-        time.sleep(60)
\ No newline at end of file
+    try:
+        while True:
+            try:
+                sleep_for = run_cycle()
+                save_state()
+                cycle_ok()
+            except Exception as e:
+                flush_logs()
+                sleep_for = handle_cycle_error(e)
+            idle(sleep_for)
+    finally:
+        stop_shards()
+        close_logs()
+        left = flush_telegram()
+        if left:
+            print(f"⚠️ {left} Telegram berichten niet meer verstuurd bij afsluiten", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Replay/backtest: stuurt opgenomen payloads (RECORD_PAYLOADS=1 → recordings/*.jsonl.gz)
+door dezelfde scorer als de live bot, zonder API calls en zonder te slapen.
+
+Voorbeelden:
+  python replay.py                                   # laatste 7 dagen uit recordings/
+  python replay.py --days 30 --set NORMAL_MIN_GAP=20 --set PACE1_MIN_SHOTS_10=7
+  python replay.py recordings/2026-10-1*.jsonl.gz
+
+Let op: alleen fixtures waarvan de live bot in die cycle stats ophaalde kunnen scoren;
+een ruimer window dan live levert dus niet meer alerts op. Anti-spam (alert queue) telt niet mee.
+"""
+import argparse
+import csv
+import glob
+import gzip
+import json
+import os
+import time
+from datetime import date, timedelta
+
+import main as bot
+
+
+def iter_cycles(paths):
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def recording_paths(record_dir, days):
+    since = (date.today() - timedelta(days=days)).isoformat()
+    paths = sorted(glob.glob(os.path.join(record_dir, "*.jsonl.gz")))
+    return [p for p in paths if os.path.basename(p)[:10] >= since]
+
+
+def apply_overrides(pairs):
+    """--set NAAM=WAARDE bovenop de live config (RULES_FILE); type volgt de default in main.py."""
+    overrides = {}
+    for pair in pairs:
+        name, _, raw = pair.partition("=")
+        overrides[name.strip()] = raw
+    try:
+        bot.set_rules(bot.build_rules(overrides, base=bot.load_rules()))
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Ongeldige instelling: {e}")
+
+
+def run_replay(cycles):
+    """Geeft (alerts, stats) — alerts met 'result' HIT/MISS/OPEN."""
+    history, ht_snapshots, score_state = {}, {}, {}
+    alerted, pending = set(), {}
+    alerts = []
+    n_cycles = 0
+    fixtures = set()
+
+    for cyc in cycles:
+        n_cycles += 1
+        now = cyc["ts"]
+        stats = cyc.get("stats", {})
+        odds = cyc.get("odds", {})
+
+        for match in cyc.get("live", []):
+            ctx = bot.parse_live_fixture(match)
+            fid = ctx["fid"]
+            if not fid:
+                continue
+            fixtures.add(fid)
+
+            # pending eerst (zelfde regels als resolve_pending_from_match)
+            p = pending.get(fid)
+            if p:
+                result = bot.next_goal_result(p["pick_side"], p["score_at_alert"], ctx["gh"], ctx["ga"])
+                if not result and ctx["status_short"] in ("FT", "AET", "PEN"):
+                    result = "MISS"
+                if result:
+                    p["result"] = result
+                    p["minute_resolved"] = ctx["minute"]
+                    pending.pop(fid)
+
+            if fid in alerted:
+                continue
+            if ctx["status_short"] in bot.FINISHED_STATUSES:
+                history.pop(fid, None)
+                ht_snapshots.pop(fid, None)
+                score_state.pop(fid, None)
+                continue
+            if ctx["minute"] is None:
+                continue
+
+            rule, _ = bot.prefilter_rule(ctx["status_short"], ctx["minute"], ctx["gh"], ctx["ga"],
+                                         ctx["league_name"], ctx["home"], ctx["away"], now, bot.exclude_key(ctx))
+            if rule:
+                continue
+
+            since_change = bot.track_score_change(score_state, fid, ctx["gh"], ctx["ga"], now)
+            if since_change < bot.RULES.GOAL_COOLDOWN_SECONDS:
+                continue
+
+            decoded = bot.decode_stats_response(stats.get(str(fid)))
+            if not decoded:
+                continue  # live bot pollde deze fixture niet in deze cycle
+            home_stats, away_stats = decoded
+            ctx["since_change"] = since_change
+            hist, ht_snap = bot.apply_stats(fid, ctx["minute"], ctx["status_short"], home_stats, away_stats,
+                                            history, ht_snapshots)
+            cand, _ = bot.score_candidate(ctx, home_stats, away_stats, hist, ht_snap)
+            if not cand:
+                continue
+
+            odd_1x2 = bot.find_1x2_odd(odds.get(str(fid)), cand["pick_side"], cand["home"], cand["away"])
+            alert = bot.finalize_alert(cand, odd_1x2)
+            if not alert:
+                continue
+
+            alert = dict(alert, ts=now, score_at_alert=(ctx["gh"], ctx["ga"]), result="OPEN")
+            alerts.append(alert)
+            alerted.add(fid)
+            pending[fid] = alert
+
+    return alerts, {"cycles": n_cycles, "fixtures": len(fixtures)}
+
+
+def load_logged_results(path):
+    """fixture_id -> laatste HIT/MISS uit results_log_premium.csv."""
+    out = {}
+    for log_file in bot.log_paths(path):
+        with open(log_file, "r", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                out[str(r.get("fixture_id"))] = r.get("result")
+    return out
+
+
+def summarize(alerts, info, logged, elapsed):
+    def line(subset):
+        hits = sum(1 for a in subset if a["result"] == "HIT")
+        misses = sum(1 for a in subset if a["result"] == "MISS")
+        resolved = hits + misses
+        hr = round(hits / resolved * 100, 1) if resolved else 0.0
+        return f"{len(subset)} alerts | HIT {hits} | MISS {misses} | open {len(subset) - resolved} | hitrate {hr}%"
+
+    rate = info["cycles"] / elapsed if elapsed else 0.0
+    out = [
+        f"🔁 Replay: {info['cycles']} cycles, {info['fixtures']} fixtures in {elapsed:.2f}s ({rate:.0f} cycles/s)",
+        f"📌 Totaal: {line(alerts)}",
+    ]
+    for tier in ("EXTREME", "PREMIUM", "NORMAL"):
+        out.append(f"   {tier}: {line([a for a in alerts if a['tier'] == tier])}")
+
+    both = [a for a in alerts if str(a["fid"]) in logged]
+    same = sum(1 for a in both if logged[str(a["fid"])] == a["result"])
+    out.append(f"📒 vs results log: {len(both)} fixtures ook live resolved, {same} met dezelfde uitkomst")
+    return "\n".join(out)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backtest de scorer op opgenomen API payloads.")
+    ap.add_argument("paths", nargs="*", help="recording files (default: RECORD_DIR, laatste --days)")
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--record-dir", default=bot.RECORD_DIR)
+    ap.add_argument("--results", default=bot.RESULTS_LOG)
+    ap.add_argument("--set", action="append", default=[], metavar="NAAM=WAARDE")
+    args = ap.parse_args()
+
+    apply_overrides(args.set)
+    paths = []
+    for p in args.paths:
+        paths.extend(sorted(glob.glob(p)))
+    if not args.paths:
+        paths = recording_paths(args.record_dir, args.days)
+    if not paths:
+        raise SystemExit("Geen recordings gevonden (zet RECORD_PAYLOADS=1 op de live bot).")
+
+    t0 = time.perf_counter()
+    alerts, info = run_replay(iter_cycles(paths))
+    elapsed = time.perf_counter() - t0
+    print(f"⚙️ regels v{bot.RULES.version}")
+    print(summarize(alerts, info, load_logged_results(args.results), elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Threshold sweep: evalueert duizenden combinaties van tier/risk/late drempels in één keer
+(NumPy masks, geen Python loop per combinatie) op gelogde + resolved alerts, en print het
+Pareto front van hitrate vs. volume.
+
+Alleen strengere instellingen zijn zinvol: de log bevat enkel alerts die de huidige filters al
+passeerden, dus een soepelere drempel kan geen nieuwe alerts "terugvinden" (daarvoor: replay.py).
+
+  python sweep_thresholds.py --days 60 --min-alerts 30
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+import analytics_store as store
+import main as bot
+
+RULES = bot.load_rules()  # live config (RULES_FILE + defaults uit main.py)
+
+# Per parameter de waarden om te proberen (eerste = huidige instelling)
+GRID = {
+    "NORMAL_MIN_GAP": [RULES.NORMAL_MIN_GAP, 20.0, 22.0, 24.0, 26.0],
+    "NORMAL_MIN_CONF": [55, 60, 65, 70],
+    "PREMIUM_MIN_GAP": [RULES.PREMIUM_MIN_GAP, 27.0, 30.0],
+    "PREMIUM_MIN_CONF": [RULES.PREMIUM_MIN_CONF, 75, 80],
+    "EXTREME_MIN_GAP": [RULES.EXTREME_MIN_GAP, 36.0, 40.0],
+    "MIN_PACE10_SHOTS": [0, 7, 8, 9],
+    "RISK_MIN_CONF": [80, 85, 90],
+    "RISK_MIN_PACE10": [8, 9, 10],
+    "LATE_MIN_SHOTS_10": [RULES.LATE_MIN_SHOTS_10, 8, 9],
+    "LATE_MIN_ODD": [RULES.LATE_MIN_ODD, 1.7, 1.85],
+}
+
+CHUNK = 4096  # combinaties per blok (geheugen: CHUNK x alerts/8 bytes)
+
+
+ALERT_COLUMNS = [
+    "dominant_score", "gap", "confidence", "odd_1x2", "pace10_shots",
+    "sot_half", "opp_sot_half", "opp_shots_half",
+]
+
+
+def load_resolved(days, root=None):
+    # Parquet: alleen de partities in --days en de kolommen die de masks nodig hebben
+    store.ingest(root)
+    since_day = (pd.Timestamp.now() - pd.Timedelta(days=days)).date().isoformat() if days else None
+    joined = store.load_resolved(since_day, alert_columns=ALERT_COLUMNS, root=root)
+    return joined.dropna(subset=["dominant_score"]).reset_index(drop=True)  # alert rij niet (meer) in de store
+
+
+def feature_arrays(df):
+    def col(name):
+        return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+    sot = col("sot_half")
+    opp_sot = col("opp_sot_half")
+    return {
+        "minute": col("minute"),
+        "dom_score": col("dominant_score"),
+        "gap": col("gap"),
+        "conf": col("confidence"),
+        "odd": col("odd_1x2"),
+        "pace10_shots": col("pace10_shots"),
+        "sot_diff": np.abs(sot - opp_sot),
+        "opp_sot": opp_sot,
+        "opp_shots": col("opp_shots_half"),
+        "is_risk": df["is_risk_31_39"].fillna(False).to_numpy(dtype=bool),
+        "hit": (df["result"] == "HIT").to_numpy(),
+    }
+
+
+def tier_masks(f):
+    """Per parameter(groep) een (waarden, alerts) bool matrix; combinaties = AND/OR van rijen."""
+    g = GRID
+
+    normal = np.array([
+        (f["dom_score"] >= RULES.NORMAL_MIN_SCORE) & (f["gap"] >= gap) & (f["conf"] >= conf)
+        & ~((f["opp_sot"] > RULES.NORMAL_MAX_OPP_SOT) & (f["opp_shots"] > RULES.NORMAL_MAX_OPP_SHOTS))
+        for gap, conf in itertools.product(g["NORMAL_MIN_GAP"], g["NORMAL_MIN_CONF"])
+    ])
+    premium = np.array([
+        (f["dom_score"] >= RULES.PREMIUM_MIN_SCORE) & (f["gap"] >= gap) & (f["conf"] >= conf)
+        & (f["sot_diff"] >= RULES.PREMIUM_MIN_SOT_DIFF)
+        & (f["opp_sot"] <= RULES.PREMIUM_MAX_OPP_SOT) & (f["opp_shots"] <= RULES.PREMIUM_MAX_OPP_SHOTS)
+        for gap, conf in itertools.product(g["PREMIUM_MIN_GAP"], g["PREMIUM_MIN_CONF"])
+    ])
+    extreme = np.array([
+        (f["dom_score"] >= RULES.EXTREME_SCORE) & (f["gap"] >= gap) & (f["conf"] >= 85)
+        & (f["opp_sot"] <= RULES.EXTREME_MAX_OPP_SOT) & (f["opp_shots"] <= RULES.EXTREME_MAX_OPP_SHOTS)
+        for gap in g["EXTREME_MIN_GAP"]
+    ])
+    pace = np.array([f["pace10_shots"] >= v for v in g["MIN_PACE10_SHOTS"]])
+    risk = np.array([
+        ~f["is_risk"] | ((f["sot_diff"] >= 3) & (f["pace10_shots"] >= p10) & (f["conf"] >= conf))
+        for conf, p10 in itertools.product(g["RISK_MIN_CONF"], g["RISK_MIN_PACE10"])
+    ])
+    late_game = f["minute"] >= RULES.LATE_MINUTE
+    late = np.array([
+        ~late_game | ((f["pace10_shots"] >= shots) & (np.isnan(f["odd"]) | (f["odd"] >= odd)))
+        for shots, odd in itertools.product(g["LATE_MIN_SHOTS_10"], g["LATE_MIN_ODD"])
+    ])
+    return normal, premium, extreme, pace, risk, late
+
+
+# popcount per byte (werkt op elke NumPy versie)
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def sweep(f):
+    """Geeft (combo index matrix, volume, hits) voor alle combinaties.
+
+    Masks worden bit-packed (8 alerts per byte): AND/OR op uint8 + popcount via lookup table.
+    """
+    packed = [np.packbits(m, axis=1) for m in tier_masks(f)]
+    normal, premium, extreme, pace, risk, late = packed
+    sizes = [len(m) for m in packed]
+    combos = np.indices(sizes).reshape(len(sizes), -1).T  # (C, 6)
+    hit = np.packbits(f["hit"])
+
+    volume = np.empty(len(combos), dtype=np.int64)
+    hits = np.empty(len(combos), dtype=np.int64)
+    for start in range(0, len(combos), CHUNK):
+        c = combos[start:start + CHUNK]
+        keep = (normal[c[:, 0]] | premium[c[:, 1]] | extreme[c[:, 2]]) & pace[c[:, 3]] & risk[c[:, 4]] & late[c[:, 5]]
+        volume[start:start + CHUNK] = POPCOUNT[keep].sum(axis=1)
+        hits[start:start + CHUNK] = POPCOUNT[keep & hit].sum(axis=1)
+    return combos, volume, hits
+
+
+def combo_params(combo):
+    g = GRID
+    n_gap, n_conf = list(itertools.product(g["NORMAL_MIN_GAP"], g["NORMAL_MIN_CONF"]))[combo[0]]
+    p_gap, p_conf = list(itertools.product(g["PREMIUM_MIN_GAP"], g["PREMIUM_MIN_CONF"]))[combo[1]]
+    r_conf, r_p10 = list(itertools.product(g["RISK_MIN_CONF"], g["RISK_MIN_PACE10"]))[combo[4]]
+    l_shots, l_odd = list(itertools.product(g["LATE_MIN_SHOTS_10"], g["LATE_MIN_ODD"]))[combo[5]]
+    return {
+        "NORMAL_MIN_GAP": n_gap, "NORMAL_MIN_CONF": n_conf,
+        "PREMIUM_MIN_GAP": p_gap, "PREMIUM_MIN_CONF": p_conf,
+        "EXTREME_MIN_GAP": g["EXTREME_MIN_GAP"][combo[2]],
+        "MIN_PACE10_SHOTS": g["MIN_PACE10_SHOTS"][combo[3]],
+        "RISK_MIN_CONF": r_conf, "RISK_MIN_PACE10": r_p10,
+        "LATE_MIN_SHOTS_10": l_shots, "LATE_MIN_ODD": l_odd,
+    }
+
+
+def pareto_front(volume, hits, min_alerts):
+    """Indices waar geen andere combinatie meer volume én hogere hitrate heeft."""
+    ok = np.flatnonzero(volume >= max(1, min_alerts))
+    if not len(ok):
+        return ok
+    hitrate = hits[ok] / volume[ok]
+    order = np.lexsort((-hitrate, -volume[ok]))  # volume aflopend, bij gelijk volume beste hitrate eerst
+    front, best = [], -1.0
+    for i in order:
+        if hitrate[i] > best:
+            front.append(ok[i])
+            best = hitrate[i]
+    return np.array(front)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Vectorized threshold sweep over alerts/results logs.")
+    ap.add_argument("--dir", default=store.ANALYTICS_DIR, help="analytics store (Parquet)")
+    ap.add_argument("--days", type=int, default=0, help="0 = alle data")
+    ap.add_argument("--min-alerts", type=int, default=20)
+    ap.add_argument("--csv", help="schrijf het Pareto front ook naar dit bestand")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    df = load_resolved(args.days, args.dir)
+    if df.empty:
+        raise SystemExit("Geen resolved alerts gevonden.")
+    f = feature_arrays(df)
+    combos, volume, hits = sweep(f)
+    front = pareto_front(volume, hits, args.min_alerts)
+    elapsed = time.perf_counter() - t0
+
+    base_vol, base_hits = int(volume[0]), int(hits[0])  # combo 0 = huidige instellingen
+    print(f"🧪 {len(combos)} combinaties x {len(df)} resolved alerts in {elapsed:.2f}s")
+    print(f"📌 Huidig: {base_vol} alerts | hitrate {round(base_hits / base_vol * 100, 1) if base_vol else 0.0}%")
+    print("🏁 Pareto front (volume ↓, hitrate ↑):")
+
+    rows = []
+    for i in front:
+        params = combo_params(combos[i])
+        hr = round(hits[i] / volume[i] * 100, 1)
+        rows.append(dict(params, alerts=int(volume[i]), hits=int(hits[i]), hitrate=hr))
+        changed = ", ".join(f"{k}={v}" for k, v in params.items() if v != GRID[k][0]) or "huidig"
+        print(f"• {int(volume[i]):5d} alerts | {hr:5.1f}% | {changed}")
+
+    if args.csv and rows:
+        pd.DataFrame(rows).to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Circuit breakers: half open mag precies 1 proefcall door, de rest wacht op de uitkomst."""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+
+@pytest.fixture
+def half_open(monkeypatch):
+    """Breaker "odds" 1x open geweest, cooldown net voorbij."""
+    monkeypatch.setattr(bot, "send_message", lambda *a, **k: None)
+    b = bot.BREAKERS["odds"]
+    b.update(failures=bot.BREAKER_FAILURES, opened=1, open_until=bot.time.time() - 1, probe_in_flight=0.0)
+    yield b
+    b.update(failures=0, opened=0, open_until=0.0, probe_in_flight=0.0)
+
+
+def check():
+    try:
+        bot.breaker_check("odds")
+        return True
+    except bot.UpstreamUnavailable:
+        return False
+
+
+def test_only_one_concurrent_probe(half_open):
+    start = threading.Barrier(8)
+    results = []
+
+    def caller():
+        start.wait()
+        results.append(check())
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+
+
+def test_probe_success_closes_breaker(half_open):
+    assert check() and not check()
+    bot.breaker_success("odds")
+    assert check() and check()
+
+
+def test_probe_failure_reopens_longer(half_open):
+    assert check()
+    bot.breaker_failure("odds")
+    assert half_open["opened"] == 2 and half_open["probe_in_flight"] == 0.0
+    assert not check()
+
+
+def test_stale_probe_expires(half_open):
+    assert check()
+    half_open["probe_in_flight"] -= bot.BREAKER_PROBE_SECONDS
+    assert check()
+
+
+def test_released_probe_lets_next_caller_through(half_open):
+    assert check()
+    bot.breaker_release("odds")
+    assert check()
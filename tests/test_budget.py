@@ -0,0 +1,145 @@
+"""API quota: dagteller, minuut-venster, headers, 429 afhandeling en de allowance per cycle."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+
+class Clock:
+    """Nep-tijd: sleep() schuift de klok door in plaats van te wachten."""
+    def __init__(self):
+        self.now = 1_700_000_000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, s):
+        self.slept.append(s)
+        self.now += s
+
+
+class Resp:
+    def __init__(self, status=200, headers=None, data=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self._data = {"errors": [], "response": []} if data is None else data
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise bot.requests.HTTPError(f"{self.status_code}")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(bot, "time", c)
+    monkeypatch.setattr(bot, "send_message", lambda *a, **k: None)
+    bot.BUDGET.update(day=bot._utc_today(), day_limit=100, day_remaining=None, calls_today=0,
+                      minute_limit=bot.API_PER_MINUTE_LIMIT, blocked_until=0.0)
+    bot.BUDGET["minute_calls"].clear()
+    bot.BREAKERS["fixtures"].update(failures=0, opened=0, open_until=0.0, probe_in_flight=0.0)
+    yield c
+    bot.BUDGET.update(day=None, day_limit=bot.API_DAILY_LIMIT, day_remaining=None, calls_today=0,
+                      minute_limit=bot.API_PER_MINUTE_LIMIT, blocked_until=0.0)
+    bot.BUDGET["minute_calls"].clear()
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """session.replies: af te spelen responses; session.calls: aantal echte HTTP calls."""
+    class Session:
+        replies = []
+        calls = 0
+
+        @classmethod
+        def get(cls, url, params=None, timeout=None):
+            cls.calls += 1
+            return cls.replies.pop(0)
+
+    monkeypatch.setattr(bot, "API_SESSION", Session)
+    return Session
+
+
+def test_acquire_counts_calls_today(clock):
+    for _ in range(3):
+        bot.budget_acquire()
+    assert bot.budget_status() == {"day_remaining": 97, "calls_today": 3}
+
+
+def test_headers_override_estimate(clock):
+    bot.budget_acquire()
+    bot.budget_update_from_headers({"x-ratelimit-requests-limit": "7500",
+                                    "x-ratelimit-requests-remaining": "40"})
+    bot.budget_acquire()
+    assert bot.budget_status()["day_remaining"] == 39
+    assert bot.BUDGET["day_limit"] == 7500
+
+
+def test_day_quota_used_up_raises(clock):
+    bot.BUDGET["calls_today"] = 100
+    with pytest.raises(bot.ApiBudgetExceeded):
+        bot.budget_acquire()
+
+
+def test_minute_window_waits(clock):
+    bot.BUDGET["minute_limit"] = 2
+    bot.budget_acquire()
+    bot.budget_acquire()
+    bot.budget_acquire()
+    assert sum(clock.slept) >= 60 - 1e-6
+
+
+def test_external_calls_count_against_day(clock):
+    bot.budget_count_external(30)
+    assert bot.budget_status() == {"day_remaining": 70, "calls_today": 30}
+
+
+def test_cycle_allowance_keeps_reserve(clock):
+    reserve = int(100 * bot.API_BUDGET_RESERVE)
+    bot.BUDGET["calls_today"] = 100 - reserve
+    assert bot.budget_cycle_allowance(60) == 0
+    bot.BUDGET["calls_today"] = 0
+    allowance = bot.budget_cycle_allowance(60)
+    assert 1 <= allowance <= 100 - reserve
+
+
+def test_next_sleep_stretches_when_short(clock):
+    base = bot.LOOP_SLEEP_SECONDS
+    assert bot.budget_next_sleep(base, 5, 10) == base
+    assert bot.budget_next_sleep(base, 20, 10) == base * 2
+    assert bot.budget_next_sleep(base, 5, 0) == base * bot.API_MAX_SLOWDOWN
+
+
+def test_429_backs_off_and_retries(clock, session):
+    session.replies = [Resp(429, {"Retry-After": "7"}), Resp(200)]
+    assert bot.api_get("/fixtures", {"live": "all"}) == {"errors": [], "response": []}
+    assert session.calls == 2
+    assert sum(clock.slept) >= 7 - 1e-6
+    assert bot.budget_status()["calls_today"] == 2
+    assert bot.BREAKERS["fixtures"]["failures"] == 0  # 429 is geen storing
+
+
+def test_429_without_retry_after_uses_default_backoff(clock, session):
+    session.replies = [Resp(429), Resp(200)]
+    bot.api_get("/fixtures", {"live": "all"})
+    assert sum(clock.slept) >= bot.API_RATE_LIMIT_BACKOFF - 1e-6
+
+
+def test_requests_error_marks_day_exhausted(clock, session):
+    session.replies = [Resp(200, data={"errors": {"requests": "limit reached"}, "response": []})]
+    with pytest.raises(bot.ApiBudgetExceeded):
+        bot.api_get("/fixtures", {"live": "all"})
+    with pytest.raises(bot.ApiBudgetExceeded):
+        bot.budget_acquire()
+    assert session.calls == 1
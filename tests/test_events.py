@@ -0,0 +1,91 @@
+"""HIT/MISS uit /fixtures/events: volgorde, eigen goals, VAR, achterlopende en aangepaste events."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+FID = 77
+HOME_ID, AWAY_ID = 10, 20
+
+
+def goal(team_id, elapsed, extra=None, detail="Normal Goal"):
+    return {"type": "Goal", "detail": detail, "team": {"id": team_id}, "time": {"elapsed": elapsed, "extra": extra}}
+
+
+def var_cancelled(team_id, elapsed):
+    return {"type": "Var", "detail": "Goal cancelled", "team": {"id": team_id}, "time": {"elapsed": elapsed}}
+
+
+def match(gh, ga, status="2H", minute=70):
+    return {"fixture": {"id": FID, "status": {"short": status, "elapsed": minute}}, "goals": {"home": gh, "away": ga}}
+
+
+@pytest.fixture
+def pending(monkeypatch):
+    """pending.results: [(result, minuut)], pending.messages: verstuurde teksten."""
+    class P:
+        results = []
+        messages = []
+
+    monkeypatch.setattr(bot, "send_message", lambda text, kind="info": P.messages.append(text))
+    monkeypatch.setattr(bot, "record_result", lambda fid, p, result, minute, score: P.results.append((result, minute)))
+    bot.PENDING.clear()
+    bot.EVENTS_CURSOR.clear()
+    bot.PENDING[FID] = {
+        "pick_side": "HOME", "score_at_alert": (0, 0), "tier": "PREMIUM",
+        "home": "Ajax", "away": "PSV", "pick_team": "Ajax", "home_id": HOME_ID, "away_id": AWAY_ID,
+    }
+    yield P
+    bot.PENDING.clear()
+    bot.EVENTS_CURSOR.clear()
+
+
+def test_both_scored_order_from_events(pending):
+    bot.resolve_pending_from_match(match(1, 1), [goal(AWAY_ID, 52), goal(HOME_ID, 60)])
+    assert pending.results == [("MISS", 52)]
+    assert FID not in bot.PENDING
+
+
+def test_own_goal_counts_for_opponent(pending):
+    # eigen goal van een PSV speler = goal voor Ajax
+    bot.resolve_pending_from_match(match(1, 1), [goal(AWAY_ID, 30, detail="Own Goal"), goal(AWAY_ID, 40)])
+    assert pending.results == [("HIT", 30)]
+
+
+def test_var_cancelled_goal_is_removed(pending):
+    events = [goal(AWAY_ID, 20), var_cancelled(AWAY_ID, 21), goal(HOME_ID, 50), goal(AWAY_ID, 65)]
+    bot.resolve_pending_from_match(match(1, 1), events)
+    assert pending.results == [("HIT", 50)]
+
+
+def test_lagging_events_wait_then_fall_back(pending):
+    events = [goal(AWAY_ID, 52)]  # tweede goal nog niet in de events
+    for _ in range(bot.EVENTS_MAX_WAIT_CYCLES):
+        bot.resolve_pending_from_match(match(1, 1), events)
+        assert pending.results == [] and FID in bot.PENDING
+    bot.resolve_pending_from_match(match(1, 1), events)
+    # score-diff fallback (beide gescoord → telt als goal voor de thuisploeg), minuut uit de live payload
+    assert pending.results == [("HIT", 70)]
+    assert "rond 70'" in pending.messages[0]
+
+
+def test_events_disagreeing_with_score_use_score_diff(pending):
+    bot.resolve_pending_from_match(match(0, 1), [goal(HOME_ID, 52)])  # events zeggen Ajax, de stand PSV
+    assert pending.results == [("MISS", 70)]
+
+
+def test_edit_with_same_length_rebuilds_cursor(pending):
+    p = bot.PENDING[FID]
+    assert bot.goal_after_alert(FID, p, [goal(HOME_ID, 10), goal(HOME_ID, 80)], 2, 0) == ("HOME", (10, 0))
+    # zelfde lengte: de eerste goal is achteraf aan PSV toegekend
+    assert bot.goal_after_alert(FID, p, [goal(AWAY_ID, 10), goal(HOME_ID, 80)], 1, 1) == ("AWAY", (10, 0))
+
+
+def test_stoppage_time_minute_text(pending):
+    bot.resolve_pending_from_match(match(1, 0, minute=46), [goal(HOME_ID, 45, extra=2)])
+    assert pending.results == [("HIT", 45)]
+    assert "in 45+2'" in pending.messages[0]
@@ -0,0 +1,68 @@
+"""Odds lookups: gebudgetteerde calls = echte API calls, en "geen odds" alleen cachen na echte lege antwoorden."""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """api.calls: alle (path, params); api.mode: "empty" of "error" per call."""
+    class Api:
+        calls = []
+        mode = "empty"
+    lock = threading.Lock()
+
+    def fake_get(path, params=None):
+        with lock:
+            Api.calls.append((path, params))
+        if Api.mode == "error":
+            raise bot.requests.ConnectionError("down")
+        return {"response": []}
+
+    monkeypatch.setattr(bot, "api_get", fake_get)
+    bot.ODDS_CACHE.clear()
+    bot.ODDS_ENDPOINT.clear()
+    bot.ODDS_INDEX.clear()
+    return Api
+
+
+def cands(n):
+    return [{"fid": 500 + i, "league_id": 7} for i in range(n)]
+
+
+@pytest.mark.parametrize("max_calls", [0, 1, 4, 6, 20])
+def test_reported_calls_match_real_calls(api, max_calls):
+    out, calls = bot.fetch_odds(cands(3), max_calls)
+    assert calls == len(api.calls)
+    assert calls <= max_calls
+
+
+def test_every_endpoint_tried_when_budget_allows(api):
+    out, calls = bot.fetch_odds(cands(1), 10)
+    assert calls == len(bot.ODDS_ENDPOINTS)  # 1 fixture onder ODDS_BULK_MIN: geen bulk call
+    assert out == {500: None}
+
+
+def test_empty_answers_are_negative_cached(api):
+    bot.fetch_odds(cands(1), 10)
+    found, resp = bot.odds_cache_get(500, bot.time.time())
+    assert found and resp is None
+
+
+def test_errors_are_not_negative_cached(api):
+    api.mode = "error"
+    bot.fetch_odds(cands(1), 10)
+    found, _ = bot.odds_cache_get(500, bot.time.time())
+    assert not found
+
+
+def test_cut_short_lookup_is_not_cached(api):
+    bot.fetch_odds(cands(1), 1)  # budget voor 1 van de 3 endpoints
+    found, _ = bot.odds_cache_get(500, bot.time.time())
+    assert not found
@@ -0,0 +1,72 @@
+"""Poll scheduler: een fixture die even uit de live feed valt moet weer gepolld worden.
+
+  python -m pytest -q tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+FID = 4242
+
+
+def live_match(minute=60):
+    return {
+        "fixture": {"id": FID, "status": {"short": "2H", "elapsed": minute}},
+        "league": {"id": 88, "name": "Eredivisie", "country": "Netherlands"},
+        "teams": {"home": {"id": 1, "name": "Ajax"}, "away": {"id": 2, "name": "PSV"}},
+        "goals": {"home": 0, "away": 0},
+    }
+
+
+@pytest.fixture
+def polls(monkeypatch):
+    calls = []
+
+    def fake_stats(fid):
+        calls.append(fid)
+        return []
+
+    monkeypatch.setattr(bot, "get_match_statistics", fake_stats)
+    monkeypatch.setattr(bot, "LOG_FEATURES", False)
+    for d in (bot.NEXT_DUE, bot.POLL_HINTS, bot.INELIGIBLE, bot.SCORE_STATE, bot.ALERTED_MATCHES, bot.PENDING):
+        d.clear()
+    bot.POLL_QUEUE.clear()
+    # stand al lang gelijk: geen goal cooldown
+    bot.SCORE_STATE[FID] = {"score": (0, 0), "changed_at": 0.0}
+    return calls
+
+
+def scan(matches):
+    return bot.scan_fixtures(matches, 10, lambda stage: None)
+
+
+def make_due():
+    bot.schedule_poll(FID, time.time() - 1)
+
+
+@pytest.mark.parametrize("gap", ["missing", "no_minute"])
+def test_fixture_polled_again_after_gap(polls, gap):
+    scan([live_match()])
+    assert polls == [FID]
+
+    make_due()
+    scan([] if gap == "missing" else [live_match(None)])  # 1 tick niet in de feed / zonder minuut
+    assert polls == [FID]
+
+    scan([live_match(61)])
+    assert polls == [FID, FID]
+
+
+@pytest.mark.parametrize("spare, expected", [(0, bot.LOOP_SLEEP_SECONDS), (3, bot.POLL_FAST_SECONDS)])
+def test_pending_fast_tick_only_with_spare_quota(polls, spare, expected):
+    bot.PENDING[FID] = {}
+    try:
+        assert bot.next_tick_sleep(time.time(), spare_calls=spare) == expected
+    finally:
+        bot.PENDING.clear()
@@ -0,0 +1,67 @@
+"""Rules: overrides uit RULES_FILE, validatie, en hot reload alleen bij een gewijzigd bestand."""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    monkeypatch.setattr(bot, "RULES_FILE", str(path))
+    monkeypatch.setattr(bot, "EXCLUDE_KEYWORDS_FILE", None)
+    monkeypatch.setattr(bot, "RULES", bot.build_rules())
+    monkeypatch.setitem(bot.RULES_SOURCE, "mtimes", None)
+    return path
+
+
+def write(path, data, mtime_ns):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_overrides_are_coerced():
+    rules = bot.build_rules({"NORMAL_MAX_OPP_SOT": "3.0", "REQUIRE_ODDS": "ja", "EXCLUDE_KEYWORDS": "U21, Women"})
+    assert rules.NORMAL_MAX_OPP_SOT == 3 and type(rules.NORMAL_MAX_OPP_SOT) is int
+    assert rules.REQUIRE_ODDS is True
+    assert rules.EXCLUDE_KEYWORDS == ("U21", "Women")
+
+
+@pytest.mark.parametrize("overrides", [
+    {"NO_SUCH_RULE": 1},
+    {"NORMAL_MAX_OPP_SOT": 2.5},
+    {"ODDS_PRICE": "worst"},
+    {"FIRST_HALF_MAX": 80},
+])
+def test_invalid_overrides_rejected(overrides):
+    with pytest.raises(ValueError):
+        bot.build_rules(overrides)
+
+
+def test_reload_only_when_file_changes(rules_file):
+    write(rules_file, {"NORMAL_MIN_GAP": bot.NORMAL_MIN_GAP + 5}, 1_000_000_000)
+    assert bot.reload_rules() == ["NORMAL_MIN_GAP"]
+    version = bot.RULES.version
+    assert bot.reload_rules() == []
+    assert bot.RULES.version == version
+
+    write(rules_file, {"NORMAL_MIN_GAP": bot.NORMAL_MIN_GAP + 6}, 2_000_000_000)
+    assert bot.reload_rules() == ["NORMAL_MIN_GAP"]
+    assert bot.RULES.NORMAL_MIN_GAP == bot.NORMAL_MIN_GAP + 6
+
+
+def test_broken_file_keeps_old_rules(rules_file):
+    write(rules_file, {"NORMAL_MIN_GAP": bot.NORMAL_MIN_GAP + 5}, 1_000_000_000)
+    bot.reload_rules()
+    old = bot.RULES
+    rules_file.write_text("{kapot", encoding="utf-8")
+    os.utime(rules_file, ns=(2_000_000_000, 2_000_000_000))
+    with pytest.raises(ValueError):
+        bot.reload_rules()
+    assert bot.RULES is old
+    assert bot.reload_rules() == []  # fout komt 1x, tot het bestand weer wijzigt
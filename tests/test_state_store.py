@@ -0,0 +1,63 @@
+"""State store: wat save_state wegschrijft komt na een herstart terug, en alleen diffs worden geschreven."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+STATE = (bot.ALERTED_MATCHES, bot.HALF_TIME_SNAPSHOT, bot.SCORE_STATE, bot.HISTORY, bot.PENDING)
+
+
+@pytest.fixture
+def store(tmp_path):
+    for d in STATE:
+        d.clear()
+    bot.open_state_store(str(tmp_path / "state.sqlite3"))
+    yield str(tmp_path / "state.sqlite3")
+    bot.STATE_CONN["conn"].close()
+    bot.STATE_CONN["conn"] = None
+    bot.STATE_WRITTEN.clear()
+    for d in STATE:
+        d.clear()
+
+
+def restart(path):
+    bot.STATE_CONN["conn"].close()
+    for d in STATE:
+        d.clear()
+    bot.open_state_store(path)
+    return bot.load_state()
+
+
+def test_round_trip(store):
+    bot.ALERTED_MATCHES.add(11)
+    bot.SCORE_STATE[11] = {"score": (1, 0), "changed_at": 123.0}
+    bot.HALF_TIME_SNAPSHOT[11] = {"hsot": 3}
+    bot.HISTORY[11] = bot.PaceHistory()
+    bot.HISTORY[11].update(60, 3, 1, 8, 4, 5, 2)
+    bot.PENDING[11] = {"score_at_alert": (1, 0), "minute": 60}
+    rows = bot.HISTORY[11].to_rows()
+    assert bot.save_state() == 5
+
+    assert restart(store) == bot.TODAY
+    assert bot.ALERTED_MATCHES == {11}
+    assert bot.SCORE_STATE[11] == {"score": (1, 0), "changed_at": 123.0}
+    assert bot.HALF_TIME_SNAPSHOT[11] == {"hsot": 3}
+    assert bot.HISTORY[11].to_rows() == rows and len(bot.HISTORY[11]) == 1
+    assert bot.PENDING[11]["score_at_alert"] == (1, 0)
+
+
+def test_only_changes_are_written(store):
+    bot.SCORE_STATE[1] = {"score": (0, 0), "changed_at": 1.0}
+    bot.SCORE_STATE[2] = {"score": (0, 0), "changed_at": 1.0}
+    assert bot.save_state() == 2
+    assert bot.save_state() == 0
+    bot.SCORE_STATE[1] = {"score": (1, 0), "changed_at": 2.0}
+    del bot.SCORE_STATE[2]
+    assert bot.save_state() == 2
+
+    restart(store)
+    assert bot.SCORE_STATE == {1: {"score": (1, 0), "changed_at": 2.0}}
@@ -0,0 +1,67 @@
+"""Telegram worker: 429 is geen storing, en de queue wordt bij afsluiten afgeleverd."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as bot  # noqa: E402
+
+
+class Resp:
+    def __init__(self, status, body=None):
+        self.status_code = status
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    """telegram.replies: statuscodes (of Resp) voor de volgende posts; telegram.posts: verstuurde teksten."""
+    class Tg:
+        replies = []
+        posts = []
+
+    def fake_post(url, data=None, timeout=None):
+        Tg.posts.append(data["text"])
+        reply = Tg.replies.pop(0) if Tg.replies else 200
+        return reply if isinstance(reply, Resp) else Resp(reply)
+
+    monkeypatch.setattr(bot.TELEGRAM_SESSION, "post", fake_post)
+    monkeypatch.setattr(bot, "TELEGRAM_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(bot, "RESULT_BATCH_SECONDS", 0.05)
+    bot.BREAKERS["telegram"].update(failures=0, opened=0, open_until=0.0, probe_in_flight=0.0)
+    return Tg
+
+
+@pytest.mark.parametrize("reply", [Resp(429), Resp(429, {"parameters": {"retry_after": "x"}})])
+def test_429_without_retry_after_backs_off_without_breaker(telegram, reply):
+    telegram.replies.append(reply)
+    ok, retry_after = bot._telegram_post("hoi")
+    assert not ok and retry_after == bot.TELEGRAM_BACKOFF_BASE
+
+    telegram.replies[:] = [Resp(429), Resp(429)]
+    bot._deliver("hoi", [bot.time.time()])
+    assert bot.BREAKERS["telegram"]["failures"] == 0
+    assert len(telegram.posts) == 4  # 1 los + 2x 429 + geslaagd
+
+
+def test_5xx_counts_as_failure(telegram, monkeypatch):
+    failures = []
+    monkeypatch.setattr(bot, "breaker_failure", failures.append)
+    telegram.replies[:] = [500]
+    bot._deliver("hoi", [bot.time.time()])
+    assert failures == ["telegram"]
+    assert telegram.posts == ["hoi", "hoi"]
+
+
+def test_flush_delivers_queued_messages(telegram):
+    for i in range(3):
+        bot.send_message(f"RESULT {i}", kind="result")
+    bot.send_message("info")
+    assert bot.flush_telegram(5) == 0
+    assert "info" in telegram.posts
+    assert all(f"RESULT {i}" in "\n".join(telegram.posts) for i in range(3))
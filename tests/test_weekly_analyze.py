@@ -0,0 +1,26 @@
+"""weekly_analyze: oude aanroep (alerts_file, results_file) blijft werken, met een DeprecationWarning."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import weekly_analyze  # noqa: E402
+
+
+@pytest.fixture
+def empty_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path / "analytics")
+
+
+def test_old_positional_call_warns(empty_store):
+    with pytest.warns(DeprecationWarning):
+        text, row = weekly_analyze.generate_weekly_summary("alerts.csv", "results.csv", root=empty_store)
+    assert row is None and "laatste 7 dagen" in text
+
+
+def test_no_data_text_uses_days(empty_store):
+    text, _ = weekly_analyze.generate_weekly_summary(days=14, root=empty_store)
+    assert "laatste 14 dagen" in text
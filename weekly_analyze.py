@@ -1,118 +1,46 @@
-import csv
-from datetime import datetime, timedelta
-
-def _parse_ts(s):
-    # verwacht: 2026-02-04T10:12:34 of 2026-02-04 10:12:34
-    try:
-        return datetime.fromisoformat(s)
-    except:
-        try:
-            return datetime.fromisoformat(s.replace(" ", "T"))
-        except:
-            return None
-
-def _read_csv(path):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return list(csv.DictReader(f))
-    except FileNotFoundError:
-        return []
-
-def _safe_float(x):
-    try:
-        if x is None or x == "":
-            return None
-        return float(x)
-    except:
-        return None
-
-def _bucket_minute(m):
-    # simpele buckets voor jouw probleem
-    if m <= 25: return "15-25"
-    if m <= 30: return "26-30"
-    if m <= 39: return "31-39 (risk)"
-    if m <= 45: return "40-45"
-    if m <= 60: return "46-60"
-    if m <= 75: return "61-75"
-    return "76-85"
-
-def generate_weekly_summary(alerts_file, results_file, days=7):
-    since = datetime.now() - timedelta(days=days)
-
-    alerts = _read_csv(alerts_file)
-    results = _read_csv(results_file)
-
-    # results map by fixture_id
-    res_map = {}
-    for r in results:
-        ts = _parse_ts(r.get("timestamp", ""))
-        if not ts or ts < since:
-            continue
-        res_map[str(r.get("fixture_id"))] = r
-
-    rows = []
-    for a in alerts:
-        ts = _parse_ts(a.get("timestamp", ""))
-        if not ts or ts < since:
-            continue
-
-        fid = str(a.get("fixture_id"))
-        r = res_map.get(fid)
-        if not r:
-            continue  # alleen resolved in weekrapport
-
-        tier = a.get("tier", "NA")
-        minute = int(float(a.get("minute", 0)))
-        result = r.get("result")
-
-        rows.append({
-            "tier": tier,
-            "minute": minute,
-            "bucket": _bucket_minute(minute),
-            "result": result,
-            "in_risk": int(a.get("in_early_risk_window", 0) or 0),
-            "post_goal_strict": int(a.get("in_post_goal_strict", 0) or 0),
-            "late_game": int(a.get("is_late_game", 0) or 0),
-        })
-
-    if not rows:
-        return ("📊 WEEKRAPPORT\nGeen (resolved) data in de laatste 7 dagen.", None)
-
-    total = len(rows)
-    hits = sum(1 for x in rows if x["result"] == "HIT")
-    misses = sum(1 for x in rows if x["result"] == "MISS")
+import warnings
+from datetime import datetime
+
+import analytics_store as store
+import main as bot
+
+
+def generate_weekly_summary(alerts_file=None, results_file=None, days=7, *, root=None):
+    # alerts_file/results_file: alleen nog voor oude aanroepen; de cijfers komen uit de live store
+    if alerts_file is not None or results_file is not None:
+        warnings.warn("generate_weekly_summary: alerts_file/results_file worden genegeerd "
+                      "(bron is de analytics store); gebruik root= voor een andere store",
+                      DeprecationWarning, stacklevel=2)
+    # vectorized query over de Parquet store (ingest is incrementeel; de live CSV logs + state store zijn de bron)
+    store.ingest(root)
+    agg = store.weekly_summary(days, root)
+    if not agg["total"]:
+        return (f"📊 WEEKRAPPORT\nGeen (resolved) data in de laatste {days} dagen.", None)
+
+    total = agg["total"]
+    hits = agg["hits"]
+    misses = agg["misses"]
     hitrate = round((hits / total) * 100, 1) if total else 0.0
 
-    def stats(filter_fn):
-        subset = [x for x in rows if filter_fn(x)]
-        if not subset:
+    def stats(counts):
+        t, h = counts
+        if not t:
             return (0, 0.0)
-        t = len(subset)
-        h = sum(1 for x in subset if x["result"] == "HIT")
         return (t, round((h / t) * 100, 1))
 
-    n_cnt, n_hr = stats(lambda x: x["tier"] == "NORMAL")
-    p_cnt, p_hr = stats(lambda x: x["tier"] == "PREMIUM")
-    e_cnt, e_hr = stats(lambda x: x["tier"] == "EXTREME")
+    n_cnt, n_hr = stats(agg["tiers"].get("NORMAL", (0, 0)))
+    p_cnt, p_hr = stats(agg["tiers"].get("PREMIUM", (0, 0)))
+    e_cnt, e_hr = stats(agg["tiers"].get("EXTREME", (0, 0)))
 
-    risk_cnt, risk_hr = stats(lambda x: x["in_risk"] == 1)
-    pg_cnt, pg_hr = stats(lambda x: x["post_goal_strict"] == 1)
-    late_cnt, late_hr = stats(lambda x: x["late_game"] == 1)
+    risk_cnt, risk_hr = stats(agg["risk"])
+    pg_cnt, pg_hr = stats(agg["post_goal"])
+    late_cnt, late_hr = stats(agg["late"])
 
     # bucket hitrates
-    buckets = {}
-    for x in rows:
-        b = x["bucket"]
-        buckets.setdefault(b, {"t": 0, "h": 0})
-        buckets[b]["t"] += 1
-        if x["result"] == "HIT":
-            buckets[b]["h"] += 1
-
     bucket_lines = []
-    for b in ["15-25","26-30","31-39 (risk)","40-45","46-60","61-75","76-85"]:
-        if b in buckets:
-            t = buckets[b]["t"]
-            hr = round((buckets[b]["h"]/t)*100, 1) if t else 0
+    for _, b in bot.MINUTE_BUCKETS:
+        if b in agg["buckets"]:
+            t, hr = stats(agg["buckets"][b])
             bucket_lines.append(f"• {b}: {hr}% ({t})")
 
     # simpele tips gebaseerd op jouw pain points